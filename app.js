@@ -48,6 +48,28 @@ function loadTabData(tab) {
     }
 }
 
+// ========== PAGINATION ==========
+// List endpoints return one page at a time; the X-Next-Cursor header
+// carries the cursor of the next page until the last one
+const PAGE_SIZE = 1000;
+
+async function fetchAllPages(url) {
+    const separator = url.includes('?') ? '&' : '?';
+    const items = [];
+    let cursor = null;
+    do {
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${url}${separator}limit=${PAGE_SIZE}${cursorParam}`);
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || response.statusText);
+        }
+        items.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return items;
+}
+
 // ========== EXERCISES ==========
 function showExerciseForm() {
     document.getElementById('exercise-form').style.display = 'block';
@@ -118,20 +140,19 @@ async function loadExercises() {
     const difficultyFilter = document.getElementById('filter-difficulty')?.value || '';
     const muscleFilter = document.getElementById('filter-muscle')?.value || '';
     
-    let url = `${API_BASE_URL}/exercises?`;
+    let url = `${API_BASE_URL}/exercises`;
     const params = [];
     if (typeFilter) params.push(`exercise_type=${typeFilter}`);
     if (difficultyFilter) params.push(`difficulty=${difficultyFilter}`);
     if (muscleFilter) params.push(`muscle_group=${muscleFilter}`);
     
-    url += params.join('&');
+    if (params.length > 0) url += '?' + params.join('&');
     
     const container = document.getElementById('exercises-list');
     container.innerHTML = '<div class="loading">Cargando ejercicios...</div>';
     
     try {
-        const response = await fetch(url);
-        const exercises = await response.json();
+        const exercises = await fetchAllPages(url);
         
         if (exercises.length === 0) {
             container.innerHTML = '<div class="empty-state"><h3>No hay ejercicios</h3><p>Crea tu primer ejercicio usando el botón de arriba</p></div>';
@@ -243,8 +264,7 @@ async function loadRoutines() {
     container.innerHTML = '<div class="loading">Cargando rutinas...</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/routines`);
-        const routines = await response.json();
+        const routines = await fetchAllPages(`${API_BASE_URL}/routines`);
         
         if (routines.length === 0) {
             container.innerHTML = '<div class="empty-state"><h3>No hay rutinas</h3><p>Crea tu primera rutina usando el botón de arriba</p></div>';
@@ -357,8 +377,7 @@ async function loadUsers() {
     container.innerHTML = '<div class="loading">Cargando usuarios...</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/users`);
-        const users = await response.json();
+        const users = await fetchAllPages(`${API_BASE_URL}/users`);
         
         if (users.length === 0) {
             container.innerHTML = '<div class="empty-state"><h3>No hay usuarios</h3><p>Registra tu primer usuario usando el botón de arriba</p></div>';
@@ -462,8 +481,7 @@ async function loadSessions() {
     container.innerHTML = '<div class="loading">Cargando sesiones...</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/sessions`);
-        const sessions = await response.json();
+        const sessions = await fetchAllPages(`${API_BASE_URL}/sessions`);
         
         if (sessions.length === 0) {
             container.innerHTML = '<div class="empty-state"><h3>No hay sesiones</h3><p>Inicia tu primera sesión usando el botón de arriba</p></div>';
@@ -515,8 +533,7 @@ async function handleProgressSubmit(event) {
         weight_kg: document.getElementById('progress-weight').value ? parseFloat(document.getElementById('progress-weight').value) : null,
         reps: document.getElementById('progress-reps').value ? parseInt(document.getElementById('progress-reps').value) : null,
         sets: document.getElementById('progress-sets').value ? parseInt(document.getElementById('progress-sets').value) : null,
-        duration_minutes: document.getElementById('progress-duration').value ? parseInt(document.getElementById('progress-duration').value) : null,
-        personal_record: document.getElementById('progress-record').checked
+        duration_minutes: document.getElementById('progress-duration').value ? parseInt(document.getElementById('progress-duration').value) : null
     };
     
     try {
@@ -547,8 +564,7 @@ async function loadProgress() {
     container.innerHTML = '<div class="loading">Cargando progreso...</div>';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/progress`);
-        const progressList = await response.json();
+        const progressList = await fetchAllPages(`${API_BASE_URL}/progress`);
         
         if (progressList.length === 0) {
             container.innerHTML = '<div class="empty-state"><h3>No hay registros de progreso</h3><p>Registra tu primer progreso usando el botón de arriba</p></div>';
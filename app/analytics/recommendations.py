@@ -0,0 +1,139 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List
+import numpy as np
+
+LEVELS = ("beginner", "intermediate", "advanced")
+
+# Feature columns of the muscle part of a routine vector; a full_body target
+# counts as every one of them
+MUSCLE_GROUPS = ("chest", "back", "shoulders", "arms", "legs", "core")
+
+# Goal words (English and Spanish) that point at muscle groups
+GOAL_KEYWORDS = {
+    "chest": ("chest",), "pecho": ("chest",), "pectorales": ("chest",),
+    "back": ("back",), "espalda": ("back",),
+    "shoulders": ("shoulders",), "hombros": ("shoulders",),
+    "arms": ("arms",), "biceps": ("arms",), "triceps": ("arms",), "brazos": ("arms",),
+    "legs": ("legs",), "glutes": ("legs",), "piernas": ("legs",), "gluteos": ("legs",),
+    "core": ("core",), "abs": ("core",), "abdominales": ("core",),
+    "full_body": MUSCLE_GROUPS,
+}
+
+# Weights of difficulty fit, muscle coverage and duration fit in the score
+SCORE_WEIGHTS = np.array([0.4, 0.4, 0.2])
+
+# Session length assumed for users with no completed sessions
+DEFAULT_SESSION_MINUTES = 45.0
+
+
+def muscle_vector(groups: Iterable[str]) -> np.ndarray:
+    """Indicator vector of the muscle groups in MUSCLE_GROUPS order"""
+    vector = np.zeros(len(MUSCLE_GROUPS))
+    for group in groups:
+        if group == "full_body":
+            vector[:] = 1.0
+        elif group in MUSCLE_GROUPS:
+            vector[MUSCLE_GROUPS.index(group)] = 1.0
+    return vector
+
+
+def exercise_muscle_load(exercise_ids: Iterable[int], muscle_groups: Dict[int, List[str]]) -> np.ndarray:
+    """Sum of the muscle vectors of the given exercises, one per progress record.
+
+    Records are counted per exercise, so the sum is one product of the counts
+    with the muscle matrix of the distinct exercises.
+    """
+    ids, counts = np.unique(np.fromiter(exercise_ids, dtype=np.int64), return_counts=True)
+    matrix = np.zeros((len(ids), len(MUSCLE_GROUPS)))
+    for row, exercise_id in enumerate(ids.tolist()):
+        matrix[row] = muscle_vector(muscle_groups.get(exercise_id, []))
+    return counts @ matrix
+
+
+def goal_vector(goals: Iterable[str]) -> np.ndarray:
+    """Muscle groups named by a user's free-text goals"""
+    vector = np.zeros(len(MUSCLE_GROUPS))
+    for goal in goals:
+        # Accents are dropped so "glúteos" and "gluteos" match alike
+        text = unicodedata.normalize("NFKD", goal.lower()).encode("ascii", "ignore").decode()
+        text = text.replace("full body", "full_body")
+        for word in re.findall(r"\w+", text):
+            for group in GOAL_KEYWORDS.get(word, ()):
+                vector[MUSCLE_GROUPS.index(group)] = 1.0
+    return vector
+
+
+class RoutineCatalog:
+    """Feature matrix of every routine, scored against a user in one pass.
+
+    Row i describes routines[i]: its difficulty level (0 to 2), the muscle
+    groups it targets and its estimated duration in minutes.
+    """
+
+    def __init__(self, routines: List[Dict[str, Any]]):
+        self.routines = routines
+        self.ids = np.array([routine["id"] for routine in routines], dtype=np.int64)
+        self.levels = np.array([LEVELS.index(routine["difficulty"]) for routine in routines], dtype=np.float64)
+        self.muscles = np.zeros((len(routines), len(MUSCLE_GROUPS)))
+        for row, routine in enumerate(routines):
+            self.muscles[row] = muscle_vector(routine.get("target_muscle_groups") or [])
+        self.durations = np.array(
+            [routine.get("estimated_duration_minutes") or 0 for routine in routines], dtype=np.float64
+        )
+        self._rows = {routine_id: row for row, routine_id in enumerate(self.ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.routines)
+
+    def muscle_load(self, routine_ids: Iterable[int]) -> np.ndarray:
+        """Sum of the muscle vectors of the given routines, one per session"""
+        rows = [self._rows[routine_id] for routine_id in routine_ids if routine_id in self._rows]
+        return self.muscles[rows].sum(axis=0)
+
+    def score(self, level: str, trained: np.ndarray, goals: np.ndarray, session_minutes: float) -> np.ndarray:
+        """Score every routine for a user; returns an (n, 4) array.
+
+        Columns are the total score followed by its three components, each
+        in [0, 1]:
+        - difficulty fit: 1 at the user's level, 0.5 one level away, 0 two away
+        - muscle coverage: share of the routine's targets the user needs,
+          where need is 1 for untrained groups and falls with recent training
+          load (trained), and is always 1 for groups named in goals
+        - duration fit: 1 at the user's usual session length, falling
+          linearly to 0 at twice or zero times it
+        """
+        difficulty = 1.0 - np.abs(self.levels - LEVELS.index(level)) / 2.0
+
+        need = 1.0 - trained / trained.max() if trained.max() > 0 else np.ones(len(MUSCLE_GROUPS))
+        need = np.maximum(need, goals)
+        targets = self.muscles.sum(axis=1)
+        coverage = np.divide(self.muscles @ need, targets, out=np.zeros(len(self)), where=targets > 0)
+
+        duration = np.clip(1.0 - np.abs(self.durations - session_minutes) / session_minutes, 0.0, 1.0)
+
+        components = np.column_stack([difficulty, coverage, duration])
+        return np.column_stack([components @ SCORE_WEIGHTS, components])
+
+    def recommend(
+        self, k: int, level: str, trained: np.ndarray, goals: np.ndarray, session_minutes: float
+    ) -> List[Dict[str, Any]]:
+        """The k best routines, highest score first (ties by routine id)"""
+        if not len(self):
+            return []
+        scores = self.score(level, trained, goals, session_minutes)
+        k = min(k, len(self))
+        # Partial selection of the top k, then a full sort of just those
+        top = np.argpartition(-scores[:, 0], k - 1)[:k]
+        top = top[np.lexsort((self.ids[top], -scores[top, 0]))]
+        return [
+            {
+                "routine": self.routines[row],
+                "score": round(float(scores[row, 0]), 4),
+                "difficulty_fit": round(float(scores[row, 1]), 4),
+                "muscle_coverage": round(float(scores[row, 2]), 4),
+                "duration_fit": round(float(scores[row, 3]), 4),
+            }
+            for row in top
+        ]
+
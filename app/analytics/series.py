@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, Dict, List
+import numpy as np
+
+# Columns of a progress row needed to build a series; id is the keyset cursor
+SERIES_COLUMNS = "id,date,weight_kg,reps,sets"
+
+# 1970-01-01 was a Thursday: day number + 3 gives days since the previous Monday
+_EPOCH_WEEKDAY_OFFSET = 3
+
+
+def bucket_starts(dates: np.ndarray, bucket: str) -> np.ndarray:
+    """Map datetime64 values to the start day of their day, ISO week or month"""
+    days = dates.astype("datetime64[D]")
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        weekday = (days.astype(np.int64) + _EPOCH_WEEKDAY_OFFSET) % 7
+        return days - weekday.astype("timedelta64[D]")
+    if bucket == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+def utc_dates(values: List[str]) -> np.ndarray:
+    """Parse ISO 8601 timestamps into UTC datetime64 values; naive ones are taken as UTC.
+
+    The first 19 characters (the wall-clock time) are parsed in one NumPy
+    pass. Postgres always returns +00:00, but SQLite keeps dates as the client
+    sent them, so any other offset is then subtracted from its row.
+    """
+    dates = np.array(values, dtype="U19").astype("datetime64[s]")
+    for index, value in enumerate(values):
+        offset = value[19:].lstrip(".0123456789")
+        if offset and offset not in ("Z", "+00:00"):
+            seconds = datetime.strptime(offset, "%z").utcoffset().total_seconds()
+            dates[index] -= np.timedelta64(int(seconds), "s")
+    return dates
+
+
+def _column(rows: List[Dict[str, Any]], name: str) -> np.ndarray:
+    return np.array([row.get(name) for row in rows], dtype=np.float64)
+
+
+def progress_series(rows: List[Dict[str, Any]], bucket: str) -> List[Dict[str, Any]]:
+    """Aggregate progress rows into per-bucket strength metrics.
+
+    For each bucket: the number of records, the max weight, the total volume
+    (sets x reps x weight, counting a missing sets value as one set) and the
+    best estimated one-rep max (Epley: weight x (1 + reps / 30)). The work
+    is done with NumPy over whole columns, not per row.
+    """
+    rows = [row for row in rows if row.get("date")]
+    if not rows:
+        return []
+
+    dates = utc_dates([row["date"] for row in rows])
+    weight = _column(rows, "weight_kg")
+    reps = _column(rows, "reps")
+    sets = np.nan_to_num(_column(rows, "sets"), nan=1.0)
+
+    volume = np.nan_to_num(sets * reps * weight)
+    one_rep_max = np.where(reps > 1, weight * (1 + reps / 30), weight)
+
+    starts = bucket_starts(dates, bucket)
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    counts = np.diff(np.r_[boundaries, len(starts)])
+
+    # NaN (missing weight) must not win a max, so it is replaced by -inf
+    max_weight = np.maximum.reduceat(np.nan_to_num(weight[order], nan=-np.inf), boundaries)
+    max_one_rep = np.maximum.reduceat(np.nan_to_num(one_rep_max[order], nan=-np.inf), boundaries)
+    total_volume = np.add.reduceat(volume[order], boundaries)
+
+    return [
+        {
+            "bucket_start": str(start),
+            "records": int(count),
+            "max_weight_kg": float(best) if np.isfinite(best) else None,
+            "total_volume_kg": float(total),
+            "estimated_one_rep_max_kg": round(float(orm), 2) if np.isfinite(orm) else None,
+        }
+        for start, count, best, total, orm in zip(starts[boundaries], counts, max_weight, total_volume, max_one_rep)
+    ]
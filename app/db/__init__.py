@@ -1,3 +1,39 @@
-from app.db.supabase_client import supabase
+import os
+from dotenv import load_dotenv
+from app.db.repository import ForeignKeyViolation, Repository, TABLES, search_terms
+from app.db.cache import CachedRepository
+from app.db.instrumented import InstrumentedRepository
+from app.metrics import observe_query
+from app.timing import record_query
 
-__all__ = ['supabase']
+# Load environment variables from .env file
+load_dotenv()
+
+# Storage backend: "supabase" (default) or "sqlite" for self-hosted/embedded use
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+
+if DB_BACKEND == "sqlite":
+    from app.db.sqlite_repository import SQLiteRepository
+    repository: Repository = SQLiteRepository(os.getenv("SQLITE_PATH", "fitness.db"))
+elif DB_BACKEND == "supabase":
+    # The Supabase SDK is imported and its client built on the first query
+    from app.db.supabase_client import get_supabase
+    from app.db.supabase_repository import SupabaseRepository
+    repository = SupabaseRepository(get_supabase)
+else:
+    raise ValueError(f"Unknown DB_BACKEND '{DB_BACKEND}', expected 'supabase' or 'sqlite'")
+
+# Every backend call is timed by table and operation for /metrics, and
+# added to the current request's Server-Timing and slow request log
+repository = InstrumentedRepository(repository, observe_query, record_query)
+
+# In-process cache for the read-mostly exercise catalog and routines.
+# Set CATALOG_CACHE_TTL_SECONDS=0 to disable it.
+repository = CachedRepository(
+    repository,
+    tables=("exercises", "routines"),
+    maxsize=int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60")),
+)
+
+__all__ = ['repository', 'Repository', 'ForeignKeyViolation', 'TABLES', 'DB_BACKEND', 'search_terms']
@@ -0,0 +1,239 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from app.db.repository import Repository
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded cache whose entries expire after ttl seconds.
+
+    When full, the least recently used entry is evicted. Hit, miss, eviction
+    and expiration counters are kept so the cache can be sized from /stats/cache.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0,
+        }
+
+
+class DerivedCache:
+    """Holds one value computed from a cached table until the table changes.
+
+    The value is reused while CachedRepository.generation() of its table is
+    the one it was built at and it is younger than ttl seconds; the age
+    limit picks up writes made by other worker processes.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._value: Any = None
+        self._generation: Optional[int] = None
+        self._expires_at = 0.0
+
+    def get(self, generation: int) -> Any:
+        if self._generation != generation or self._expires_at <= time.monotonic():
+            return None
+        return self._value
+
+    def set(self, value: Any, generation: int) -> None:
+        self._value = value
+        self._generation = generation
+        self._expires_at = time.monotonic() + self.ttl
+
+
+class CachedRepository(Repository):
+    """Repository wrapper that caches reads of read-mostly tables.
+
+    get() is cached by id and list() by its full filter/page combination.
+    Any write to a cached table clears that table's cache, so the next read
+    goes to the database. Cached rows are shared and must not be mutated.
+
+    Each cached table also has a write generation, bumped on every write,
+    so values derived from a table can tell when to rebuild, and reads that
+    overlapped a write are not cached.
+    """
+
+    def __init__(self, inner: Repository, tables: Iterable[str], maxsize: int = 1024, ttl: float = 60.0):
+        self.inner = inner
+        self.ttl = ttl
+        self.caches = {table: TTLCache(maxsize=maxsize, ttl=ttl) for table in tables}
+        self.generations = {table: 0 for table in tables}
+
+    @staticmethod
+    def _key(*parts: Any) -> str:
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def invalidate(self, table: str) -> None:
+        if table in self.caches:
+            self.caches[table].clear()
+            self.generations[table] += 1
+
+    def _store(self, table: str, generation: int, key: str, value: Any) -> None:
+        """Cache a read unless the table was written while it was in flight.
+
+        A read that started before a write may return the old row after the
+        write's invalidate(); caching it would serve that row for the TTL.
+        """
+        if self.generations[table] == generation:
+            self.caches[table].set(key, value)
+
+    def generation(self, table: str) -> int:
+        return self.generations.get(table, 0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {table: cache.stats() for table, cache in self.caches.items()}
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        row = await self.inner.insert(table, data)
+        self.invalidate(table)
+        return row
+
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        created = await self.inner.insert_many(table, rows)
+        self.invalidate(table)
+        return created
+
+    async def get(self, table: str, row_id: int, columns: str = "*") -> Optional[Dict[str, Any]]:
+        cache = self.caches.get(table)
+        if cache is None:
+            return await self.inner.get(table, row_id, columns)
+        key = self._key("get", row_id, columns)
+        row = cache.get(key, _MISSING)
+        if row is _MISSING:
+            generation = self.generations[table]
+            row = await self.inner.get(table, row_id, columns)
+            self._store(table, generation, key, row)
+        return row
+
+    async def list(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        contains_any: Optional[Dict[str, List[Any]]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        gte: Optional[Dict[str, Any]] = None,
+        lt: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+    ) -> List[Dict[str, Any]]:
+        cache = self.caches.get(table)
+        if cache is None:
+            return await self.inner.list(table, filters, contains, contains_any, limit, after_id, gte, lt, columns)
+        key = self._key("list", filters, contains, contains_any, limit, after_id, gte, lt, columns)
+        rows = cache.get(key, _MISSING)
+        if rows is _MISSING:
+            generation = self.generations[table]
+            rows = await self.inner.list(table, filters, contains, contains_any, limit, after_id, gte, lt, columns)
+            self._store(table, generation, key, rows)
+        return rows
+
+    async def update(
+        self,
+        table: str,
+        row_id: int,
+        data: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        returning: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        row = await self.inner.update(table, row_id, data, filters, returning)
+        self.invalidate(table)
+        return row
+
+    async def delete(self, table: str, row_id: int, returning: bool = True) -> Optional[Dict[str, Any]]:
+        row = await self.inner.delete(table, row_id, returning)
+        self.invalidate(table)
+        return row
+
+    async def existing_ids(self, table: str, ids: Iterable[int]) -> Set[int]:
+        return await self.inner.existing_ids(table, ids)
+
+    async def get_many(self, table: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        ids = sorted(set(ids))
+        cache = self.caches.get(table)
+        if cache is None:
+            return await self.inner.get_many(table, ids)
+        key = self._key("get_many", ids)
+        rows = cache.get(key, _MISSING)
+        if rows is _MISSING:
+            generation = self.generations[table]
+            rows = await self.inner.get_many(table, ids)
+            self._store(table, generation, key, rows)
+        return rows
+
+    async def user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self.inner.user_stats(user_id)
+
+    async def exercise_stats(self, exercise_id: int) -> Optional[Dict[str, Any]]:
+        return await self.inner.exercise_stats(exercise_id)
+
+    async def leaderboard(
+        self, exercise_id: int, metric: str, k: int, fitness_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.inner.leaderboard(exercise_id, metric, k, fitness_level)
+
+    async def search_exercises(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        cache = self.caches.get("exercises")
+        if cache is None:
+            return await self.inner.search_exercises(terms, limit)
+        key = self._key("search", terms, limit)
+        rows = cache.get(key, _MISSING)
+        if rows is _MISSING:
+            generation = self.generations["exercises"]
+            rows = await self.inner.search_exercises(terms, limit)
+            self._store("exercises", generation, key, rows)
+        return rows
+
+    async def rebuild_rollups(self) -> None:
+        await self.inner.rebuild_rollups()
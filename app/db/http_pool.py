@@ -0,0 +1,177 @@
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+
+# httpcore trace events that mark the moment a request got a connection:
+# either a new one starts connecting or a pooled one starts sending
+CONNECT_EVENT = "connection.connect_tcp.started"
+TLS_EVENT = "connection.start_tls.started"
+SEND_EVENTS = ("http11.send_request_headers.started", "http2.send_request_headers.started")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PoolSettings:
+    """Transport settings of the HTTP connection pool to PostgREST.
+
+    Every worker process builds its own client, so the limits are per
+    worker. httpx's own default opens up to 100 connections but keeps only
+    20 of them, for 5 seconds, so a burst above 20 concurrent queries or a
+    pause of a few seconds meant new TCP and TLS handshakes. Here every
+    pooled connection is kept, for longer. The pool is not made larger:
+    httpcore checks each idle connection on every request it queues, which
+    costs more than it saves beyond a few tens of connections.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        write_timeout: float = 30.0,
+        pool_timeout: float = 5.0,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_connections if max_keepalive is None else max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.pool_timeout = pool_timeout
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        max_keepalive = os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE")
+        return cls(
+            max_connections=int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive=int(max_keepalive) if max_keepalive else None,
+            keepalive_expiry=float(os.getenv("SUPABASE_HTTP_KEEPALIVE_SECONDS", "30")),
+            http2=_env_flag("SUPABASE_HTTP2", True),
+            connect_timeout=float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("SUPABASE_HTTP_READ_TIMEOUT", "30")),
+            write_timeout=float(os.getenv("SUPABASE_HTTP_WRITE_TIMEOUT", "30")),
+            pool_timeout=float(os.getenv("SUPABASE_HTTP_POOL_TIMEOUT", "5")),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class PoolMetrics:
+    """Counters of how requests got their connection from the pool.
+
+    pool wait is the time from handing a request to the pool until it
+    starts connecting or sending on a pooled connection, so it measures
+    queueing for a free connection (and any event loop lag), not the
+    handshake itself.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.tls_handshakes = 0
+        self.pool_timeouts = 0
+        self.pool_wait_seconds = 0.0
+        self.max_pool_wait_seconds = 0.0
+
+    def record(self, trace: "_ConnectionTrace") -> None:
+        self.requests += 1
+        if trace.acquired_at is None:
+            return
+        if trace.new_connection:
+            self.connections_opened += 1
+        else:
+            self.connections_reused += 1
+        if trace.tls:
+            self.tls_handshakes += 1
+        wait = trace.acquired_at - trace.started
+        self.pool_wait_seconds += wait
+        self.max_pool_wait_seconds = max(self.max_pool_wait_seconds, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        acquired = self.connections_opened + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_rate": self.connections_reused / acquired if acquired else 0,
+            "pool_timeouts": self.pool_timeouts,
+            "mean_pool_wait_ms": self.pool_wait_seconds * 1000 / acquired if acquired else 0,
+            "max_pool_wait_ms": self.max_pool_wait_seconds * 1000,
+        }
+
+
+# Connection metrics of this worker's Supabase client, served at /stats/http
+pool_metrics = PoolMetrics()
+
+
+class _ConnectionTrace:
+    """httpcore trace hook noting how and when a request got its connection"""
+
+    def __init__(self, forward: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]]):
+        self.forward = forward
+        self.started = time.perf_counter()
+        self.acquired_at: Optional[float] = None
+        self.new_connection = False
+        self.tls = False
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        if self.acquired_at is None and (event == CONNECT_EVENT or event in SEND_EVENTS):
+            self.acquired_at = time.perf_counter()
+            self.new_connection = event == CONNECT_EVENT
+        elif event == TLS_EVENT:
+            self.tls = True
+        if self.forward is not None:
+            await self.forward(event, info)
+
+
+class MeteredTransport(httpx.AsyncHTTPTransport):
+    """Pooled transport that records connection reuse and pool wait"""
+
+    def __init__(self, metrics: PoolMetrics, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        trace = _ConnectionTrace(request.extensions.get("trace"))
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            return await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.metrics.pool_timeouts += 1
+            raise
+        finally:
+            self.metrics.record(trace)
+
+
+def pooled_client(settings: PoolSettings, metrics: Optional[PoolMetrics] = None, **kwargs: Any) -> httpx.AsyncClient:
+    """HTTP client with a tuned, metered connection pool, shared by every query of a worker"""
+    transport = MeteredTransport(metrics or pool_metrics, http2=settings.http2, limits=settings.limits(), **kwargs)
+    return httpx.AsyncClient(transport=transport, timeout=settings.timeout(), follow_redirects=True)
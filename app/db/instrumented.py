@@ -0,0 +1,113 @@
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from app.db.repository import Repository
+
+
+class _Timed:
+    """Context manager reporting one backend call's duration and outcome"""
+
+    __slots__ = ("observe", "table", "operation", "start")
+
+    def __init__(self, observe: Callable[[str, str, float, bool], None], table: str, operation: str):
+        self.observe = observe
+        self.table = table
+        self.operation = operation
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.observe(self.table, self.operation, time.perf_counter() - self.start, exc_type is not None)
+
+
+class InstrumentedRepository(Repository):
+    """Repository wrapper that times every backend call.
+
+    Each observer(table, operation, seconds, failed) is called after each call.
+    Calls reading rollups or the search index are labelled with the table
+    they read, and rebuild_rollups() with "rollups". Wrap the backend
+    itself, under CachedRepository, so cache hits are not counted as queries.
+    """
+
+    def __init__(self, inner: Repository, *observers: Callable[[str, str, float, bool], None]):
+        self.inner = inner
+        self.observers = observers
+
+    def _observe(self, table: str, operation: str, seconds: float, failed: bool) -> None:
+        for observer in self.observers:
+            observer(table, operation, seconds, failed)
+
+    def _timed(self, table: str, operation: str) -> _Timed:
+        return _Timed(self._observe, table, operation)
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._timed(table, "insert"):
+            return await self.inner.insert(table, data)
+
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._timed(table, "insert_many"):
+            return await self.inner.insert_many(table, rows)
+
+    async def get(self, table: str, row_id: int, columns: str = "*") -> Optional[Dict[str, Any]]:
+        with self._timed(table, "get"):
+            return await self.inner.get(table, row_id, columns)
+
+    async def list(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        contains_any: Optional[Dict[str, List[Any]]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        gte: Optional[Dict[str, Any]] = None,
+        lt: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+    ) -> List[Dict[str, Any]]:
+        with self._timed(table, "list"):
+            return await self.inner.list(table, filters, contains, contains_any, limit, after_id, gte, lt, columns)
+
+    async def update(
+        self,
+        table: str,
+        row_id: int,
+        data: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        returning: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        with self._timed(table, "update"):
+            return await self.inner.update(table, row_id, data, filters, returning)
+
+    async def delete(self, table: str, row_id: int, returning: bool = True) -> Optional[Dict[str, Any]]:
+        with self._timed(table, "delete"):
+            return await self.inner.delete(table, row_id, returning)
+
+    async def existing_ids(self, table: str, ids: Iterable[int]) -> Set[int]:
+        with self._timed(table, "existing_ids"):
+            return await self.inner.existing_ids(table, ids)
+
+    async def get_many(self, table: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        with self._timed(table, "get_many"):
+            return await self.inner.get_many(table, ids)
+
+    async def user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._timed("user_rollups", "user_stats"):
+            return await self.inner.user_stats(user_id)
+
+    async def exercise_stats(self, exercise_id: int) -> Optional[Dict[str, Any]]:
+        with self._timed("exercise_rollups", "exercise_stats"):
+            return await self.inner.exercise_stats(exercise_id)
+
+    async def leaderboard(
+        self, exercise_id: int, metric: str, k: int, fitness_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        with self._timed("user_exercise_rollups", "leaderboard"):
+            return await self.inner.leaderboard(exercise_id, metric, k, fitness_level)
+
+    async def search_exercises(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        with self._timed("exercise_search", "search"):
+            return await self.inner.search_exercises(terms, limit)
+
+    async def rebuild_rollups(self) -> None:
+        with self._timed("rollups", "rebuild_rollups"):
+            await self.inner.rebuild_rollups()
@@ -0,0 +1,15 @@
+"""Recompute the statistics rollups from scratch.
+
+Usage: python -m app.db.rebuild_rollups
+"""
+import asyncio
+from app.db import repository
+
+
+async def main() -> None:
+    await repository.rebuild_rollups()
+    print("Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Tables defined in supabase_schema.sql
+TABLES = ("exercises", "users", "routines", "sessions", "progress")
+
+# user_exercise_rollups column holding each leaderboard metric; "<column>_at"
+# is the date the best was first reached
+LEADERBOARD_COLUMNS = {"weight": "best_weight_kg", "reps": "best_reps", "volume": "best_volume_kg"}
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a search query into lowercase words; punctuation never reaches the engine"""
+    return re.findall(r"\w+", query.lower())
+
+
+class ForeignKeyViolation(Exception):
+    """A write referenced a row that does not exist in another table"""
+
+
+class Repository(ABC):
+    """Storage interface shared by every backend.
+
+    Rows are plain dicts using the column names from supabase_schema.sql.
+    JSONB columns hold Python lists/dicts and timestamps are ISO 8601 strings,
+    exactly as PostgREST returns them, so routes work the same on any backend.
+    Every method but exists() is abstract, so a backend or wrapper missing
+    one fails when it is constructed rather than when the method is called.
+    """
+
+    @abstractmethod
+    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a row and return it as stored.
+
+        Raises ForeignKeyViolation if a referenced row does not exist.
+        """
+
+    @abstractmethod
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows in one multi-row statement and return them in input order.
+
+        The statement is atomic: if any row is rejected, none are inserted.
+        """
+
+    @abstractmethod
+    async def get(self, table: str, row_id: int, columns: str = "*") -> Optional[Dict[str, Any]]:
+        """Get a row by id, or None if it does not exist"""
+
+    @abstractmethod
+    async def list(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        contains_any: Optional[Dict[str, List[Any]]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        gte: Optional[Dict[str, Any]] = None,
+        lt: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+    ) -> List[Dict[str, Any]]:
+        """Get rows whose columns equal the given filter values, ordered by id.
+
+        contains keeps rows whose JSON array column holds every listed value;
+        contains_any keeps rows whose column holds at least one of them.
+
+        gte and lt bound columns to a half-open range: column >= value and
+        column < value respectively. columns selects a subset of columns, as
+        in get().
+
+        after_id and limit select a keyset page: rows with id > after_id, at
+        most limit of them.
+        """
+
+    @abstractmethod
+    async def update(
+        self,
+        table: str,
+        row_id: int,
+        data: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        returning: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """Update a row in one round trip and return it, or None if no row matched.
+
+        filters adds equality conditions the row must also meet. With
+        returning=False the row is not sent back and only {"id": row_id} is
+        returned when a row matched.
+        """
+
+    @abstractmethod
+    async def delete(self, table: str, row_id: int, returning: bool = True) -> Optional[Dict[str, Any]]:
+        """Delete a row in one round trip and return it, or None if it did not exist.
+
+        With returning=False only {"id": row_id} is returned when a row matched.
+        """
+
+    async def exists(self, table: str, row_id: int) -> bool:
+        """Check whether a row with the given id exists"""
+        return await self.get(table, row_id, columns="id") is not None
+
+    @abstractmethod
+    async def existing_ids(self, table: str, ids: Iterable[int]) -> Set[int]:
+        """Return the subset of ids that exist in the table, in one set-based lookup"""
+
+    @abstractmethod
+    async def get_many(self, table: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Get the rows with the given ids in one "in" lookup, ordered by id; missing ids are skipped"""
+
+    @abstractmethod
+    async def user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Read a user's rollup, or None if the user does not exist.
+
+        Returns total_sessions, completed_sessions, total_workout_time_minutes,
+        total_calories_burned, progress_records and personal_records, kept
+        current by database triggers.
+        """
+
+    @abstractmethod
+    async def exercise_stats(self, exercise_id: int) -> Optional[Dict[str, Any]]:
+        """Read an exercise's rollup, or None if the exercise does not exist.
+
+        Returns exercise_name, total_attempts, unique_users, personal_records,
+        total_weight and total_reps, kept current by database triggers.
+        """
+
+    @abstractmethod
+    async def leaderboard(
+        self, exercise_id: int, metric: str, k: int, fitness_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Top k users of an exercise by their best value of a metric.
+
+        metric is a key of LEADERBOARD_COLUMNS. Rows have user_id, username,
+        fitness_level, value and achieved_at, ordered by value and then by
+        who reached it first. They are read from the per-(user, exercise)
+        bests kept by database triggers, never from the progress history.
+        """
+
+    @abstractmethod
+    async def search_exercises(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        """Exercises matching every term, best match first.
+
+        terms come from search_terms(). Each term matches words starting
+        with it, ignoring case and accents, in the name, description or
+        instructions; name matches rank above description matches, and
+        those above instruction matches. Backed by a full-text index kept
+        current by database triggers.
+        """
+
+    @abstractmethod
+    async def rebuild_rollups(self) -> None:
+        """Recompute every rollup from the base tables"""
@@ -0,0 +1,961 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.db.repository import ForeignKeyViolation, LEADERBOARD_COLUMNS, Repository, TABLES
+
+# SQLite version of supabase_schema.sql.
+# JSONB columns are stored as JSON text, BOOLEAN as INTEGER and TIMESTAMPTZ as
+# ISO 8601 text, and are converted back on read so rows match PostgREST output.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    exercise_type TEXT NOT NULL CHECK (exercise_type IN ('cardio', 'strength', 'flexibility', 'balance', 'sports')),
+    difficulty TEXT NOT NULL CHECK (difficulty IN ('beginner', 'intermediate', 'advanced')),
+    muscle_groups TEXT NOT NULL DEFAULT '[]',
+    duration_minutes INTEGER,
+    calories_burned_per_minute INTEGER,
+    equipment_needed TEXT DEFAULT '[]',
+    instructions TEXT DEFAULT '[]',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    age INTEGER,
+    weight_kg REAL,
+    height_cm REAL,
+    fitness_level TEXT NOT NULL DEFAULT 'beginner' CHECK (fitness_level IN ('beginner', 'intermediate', 'advanced')),
+    goals TEXT DEFAULT '[]',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS routines (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    difficulty TEXT NOT NULL CHECK (difficulty IN ('beginner', 'intermediate', 'advanced')),
+    target_muscle_groups TEXT NOT NULL DEFAULT '[]',
+    estimated_duration_minutes INTEGER NOT NULL,
+    exercises TEXT DEFAULT '[]',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    created_by TEXT DEFAULT 'admin'
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    routine_id INTEGER NOT NULL REFERENCES routines(id) ON DELETE CASCADE,
+    started_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    completed_at TEXT,
+    total_duration_minutes INTEGER,
+    calories_burned INTEGER,
+    notes TEXT,
+    completed INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    date TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    weight_kg REAL,
+    reps INTEGER,
+    sets INTEGER,
+    duration_minutes INTEGER,
+    personal_record INTEGER DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_exercises_type ON exercises(exercise_type);
+CREATE INDEX IF NOT EXISTS idx_exercises_difficulty ON exercises(difficulty);
+CREATE INDEX IF NOT EXISTS idx_routines_difficulty ON routines(difficulty);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_routine_id ON sessions(routine_id);
+CREATE INDEX IF NOT EXISTS idx_progress_user_id ON progress(user_id);
+CREATE INDEX IF NOT EXISTS idx_progress_exercise_id ON progress(exercise_id);
+CREATE INDEX IF NOT EXISTS idx_progress_date ON progress(date);
+CREATE INDEX IF NOT EXISTS idx_progress_user_exercise_date ON progress(user_id, exercise_id, date);
+
+-- Exercise search: an FTS5 index over name, description and the instruction
+-- steps, folded to lowercase without accents, with prefix indexes for
+-- search-as-you-type. Triggers keep it in step with exercises.
+CREATE VIRTUAL TABLE IF NOT EXISTS exercise_search USING fts5(
+    name, description, instructions,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS exercises_search_insert AFTER INSERT ON exercises
+BEGIN
+    INSERT INTO exercise_search (rowid, name, description, instructions)
+    VALUES (NEW.id, NEW.name, NEW.description, (SELECT group_concat(value, ' ') FROM json_each(NEW.instructions)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS exercises_search_update AFTER UPDATE OF name, description, instructions ON exercises
+BEGIN
+    UPDATE exercise_search SET
+        name = NEW.name,
+        description = NEW.description,
+        instructions = (SELECT group_concat(value, ' ') FROM json_each(NEW.instructions))
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS exercises_search_delete AFTER DELETE ON exercises
+BEGIN
+    DELETE FROM exercise_search WHERE rowid = OLD.id;
+END;
+
+-- Index exercises stored before the search table existed
+INSERT INTO exercise_search (rowid, name, description, instructions)
+SELECT id, name, description, (SELECT group_concat(value, ' ') FROM json_each(instructions))
+FROM exercises WHERE id NOT IN (SELECT rowid FROM exercise_search);
+
+-- Rollups kept current by triggers, so /stats/* is a keyed read
+CREATE TABLE IF NOT EXISTS user_rollups (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_sessions INTEGER NOT NULL DEFAULT 0,
+    completed_sessions INTEGER NOT NULL DEFAULT 0,
+    total_workout_time_minutes INTEGER NOT NULL DEFAULT 0,
+    total_calories_burned INTEGER NOT NULL DEFAULT 0,
+    progress_records INTEGER NOT NULL DEFAULT 0,
+    personal_records INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS exercise_rollups (
+    exercise_id INTEGER PRIMARY KEY REFERENCES exercises(id) ON DELETE CASCADE,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    unique_users INTEGER NOT NULL DEFAULT 0,
+    personal_records INTEGER NOT NULL DEFAULT 0,
+    total_weight REAL NOT NULL DEFAULT 0,
+    total_reps INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_exercise_rollups (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    best_weight_kg REAL,
+    best_reps INTEGER,
+    best_duration_minutes INTEGER,
+    best_volume_kg REAL,
+    best_weight_kg_at TEXT,
+    best_reps_at TEXT,
+    best_volume_kg_at TEXT,
+    PRIMARY KEY (user_id, exercise_id)
+);
+
+-- Leaderboards: the top k of an exercise is the head of one of these indexes
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_weight ON user_exercise_rollups(exercise_id, best_weight_kg DESC, best_weight_kg_at);
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_reps ON user_exercise_rollups(exercise_id, best_reps DESC, best_reps_at);
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_volume ON user_exercise_rollups(exercise_id, best_volume_kg DESC, best_volume_kg_at);
+
+CREATE TRIGGER IF NOT EXISTS users_rollup_insert AFTER INSERT ON users
+BEGIN
+    INSERT INTO user_rollups (user_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS exercises_rollup_insert AFTER INSERT ON exercises
+BEGIN
+    INSERT INTO exercise_rollups (exercise_id) VALUES (NEW.id);
+END;
+
+-- unique_users follows the (user, exercise) pairs, including cascaded deletes
+CREATE TRIGGER IF NOT EXISTS user_exercise_rollups_insert AFTER INSERT ON user_exercise_rollups
+BEGIN
+    UPDATE exercise_rollups SET unique_users = unique_users + 1 WHERE exercise_id = NEW.exercise_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_exercise_rollups_delete AFTER DELETE ON user_exercise_rollups
+BEGIN
+    UPDATE exercise_rollups SET unique_users = unique_users - 1 WHERE exercise_id = OLD.exercise_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sessions_rollup_insert AFTER INSERT ON sessions
+BEGIN
+    UPDATE user_rollups SET
+        total_sessions = total_sessions + 1,
+        completed_sessions = completed_sessions + (CASE WHEN NEW.completed THEN 1 ELSE 0 END),
+        total_workout_time_minutes = total_workout_time_minutes + (CASE WHEN NEW.completed THEN COALESCE(NEW.total_duration_minutes, 0) ELSE 0 END),
+        total_calories_burned = total_calories_burned + (CASE WHEN NEW.completed THEN COALESCE(NEW.calories_burned, 0) ELSE 0 END)
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sessions_rollup_delete AFTER DELETE ON sessions
+BEGIN
+    UPDATE user_rollups SET
+        total_sessions = total_sessions - 1,
+        completed_sessions = completed_sessions - (CASE WHEN OLD.completed THEN 1 ELSE 0 END),
+        total_workout_time_minutes = total_workout_time_minutes - (CASE WHEN OLD.completed THEN COALESCE(OLD.total_duration_minutes, 0) ELSE 0 END),
+        total_calories_burned = total_calories_burned - (CASE WHEN OLD.completed THEN COALESCE(OLD.calories_burned, 0) ELSE 0 END)
+    WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sessions_rollup_update AFTER UPDATE ON sessions
+BEGIN
+    UPDATE user_rollups SET
+        total_sessions = total_sessions - 1,
+        completed_sessions = completed_sessions - (CASE WHEN OLD.completed THEN 1 ELSE 0 END),
+        total_workout_time_minutes = total_workout_time_minutes - (CASE WHEN OLD.completed THEN COALESCE(OLD.total_duration_minutes, 0) ELSE 0 END),
+        total_calories_burned = total_calories_burned - (CASE WHEN OLD.completed THEN COALESCE(OLD.calories_burned, 0) ELSE 0 END)
+    WHERE user_id = OLD.user_id;
+    UPDATE user_rollups SET
+        total_sessions = total_sessions + 1,
+        completed_sessions = completed_sessions + (CASE WHEN NEW.completed THEN 1 ELSE 0 END),
+        total_workout_time_minutes = total_workout_time_minutes + (CASE WHEN NEW.completed THEN COALESCE(NEW.total_duration_minutes, 0) ELSE 0 END),
+        total_calories_burned = total_calories_burned + (CASE WHEN NEW.completed THEN COALESCE(NEW.calories_burned, 0) ELSE 0 END)
+    WHERE user_id = NEW.user_id;
+END;
+
+-- progress triggers are recreated on every start so existing database files
+-- pick up changes to them
+DROP TRIGGER IF EXISTS progress_rollup_insert;
+CREATE TRIGGER progress_rollup_insert AFTER INSERT ON progress
+BEGIN
+    UPDATE user_rollups SET
+        progress_records = progress_records + 1,
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END)
+    WHERE user_id = NEW.user_id;
+    UPDATE exercise_rollups SET
+        total_attempts = total_attempts + 1,
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END),
+        total_weight = total_weight + COALESCE(NEW.weight_kg, 0),
+        total_reps = total_reps + COALESCE(NEW.reps, 0)
+    WHERE exercise_id = NEW.exercise_id;
+    INSERT INTO user_exercise_rollups (
+        user_id, exercise_id, attempts, best_weight_kg, best_reps, best_duration_minutes, best_volume_kg,
+        best_weight_kg_at, best_reps_at, best_volume_kg_at
+    )
+    VALUES (
+        NEW.user_id, NEW.exercise_id, 1, NEW.weight_kg, NEW.reps, NEW.duration_minutes,
+        COALESCE(NEW.sets, 1) * NEW.reps * NEW.weight_kg,
+        CASE WHEN NEW.weight_kg IS NOT NULL THEN NEW.date END,
+        CASE WHEN NEW.reps IS NOT NULL THEN NEW.date END,
+        CASE WHEN NEW.reps * NEW.weight_kg IS NOT NULL THEN NEW.date END
+    )
+    ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+        attempts = attempts + 1,
+        best_weight_kg = COALESCE(MAX(best_weight_kg, excluded.best_weight_kg), best_weight_kg, excluded.best_weight_kg),
+        best_reps = COALESCE(MAX(best_reps, excluded.best_reps), best_reps, excluded.best_reps),
+        best_duration_minutes = COALESCE(MAX(best_duration_minutes, excluded.best_duration_minutes), best_duration_minutes, excluded.best_duration_minutes),
+        best_volume_kg = COALESCE(MAX(best_volume_kg, excluded.best_volume_kg), best_volume_kg, excluded.best_volume_kg),
+        best_weight_kg_at = CASE
+            WHEN COALESCE(excluded.best_weight_kg > best_weight_kg, excluded.best_weight_kg IS NOT NULL) THEN excluded.best_weight_kg_at
+            WHEN excluded.best_weight_kg = best_weight_kg THEN MIN(best_weight_kg_at, excluded.best_weight_kg_at)
+            ELSE best_weight_kg_at END,
+        best_reps_at = CASE
+            WHEN COALESCE(excluded.best_reps > best_reps, excluded.best_reps IS NOT NULL) THEN excluded.best_reps_at
+            WHEN excluded.best_reps = best_reps THEN MIN(best_reps_at, excluded.best_reps_at)
+            ELSE best_reps_at END,
+        best_volume_kg_at = CASE
+            WHEN COALESCE(excluded.best_volume_kg > best_volume_kg, excluded.best_volume_kg IS NOT NULL) THEN excluded.best_volume_kg_at
+            WHEN excluded.best_volume_kg = best_volume_kg THEN MIN(best_volume_kg_at, excluded.best_volume_kg_at)
+            ELSE best_volume_kg_at END;
+END;
+
+DROP TRIGGER IF EXISTS progress_rollup_delete;
+CREATE TRIGGER progress_rollup_delete AFTER DELETE ON progress
+BEGIN
+    UPDATE user_rollups SET
+        progress_records = progress_records - 1,
+        personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END)
+    WHERE user_id = OLD.user_id;
+    UPDATE exercise_rollups SET
+        total_attempts = total_attempts - 1,
+        personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END),
+        total_weight = total_weight - COALESCE(OLD.weight_kg, 0),
+        total_reps = total_reps - COALESCE(OLD.reps, 0)
+    WHERE exercise_id = OLD.exercise_id;
+    UPDATE user_exercise_rollups SET attempts = attempts - 1
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id;
+    DELETE FROM user_exercise_rollups
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND attempts <= 0;
+    -- Only a record that held a best forces a rescan of the pair
+    UPDATE user_exercise_rollups SET
+        best_weight_kg = (SELECT MAX(weight_kg) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_reps = (SELECT MAX(reps) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_duration_minutes = (SELECT MAX(duration_minutes) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_volume_kg = (SELECT MAX(COALESCE(sets, 1) * reps * weight_kg) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_weight_kg_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND weight_kg IS NOT NULL
+            ORDER BY weight_kg DESC, date LIMIT 1
+        ),
+        best_reps_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND reps IS NOT NULL
+            ORDER BY reps DESC, date LIMIT 1
+        ),
+        best_volume_kg_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND reps * weight_kg IS NOT NULL
+            ORDER BY COALESCE(sets, 1) * reps * weight_kg DESC, date LIMIT 1
+        )
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+      AND (OLD.weight_kg >= best_weight_kg OR OLD.reps >= best_reps OR OLD.duration_minutes >= best_duration_minutes
+           OR COALESCE(OLD.sets, 1) * OLD.reps * OLD.weight_kg >= best_volume_kg);
+END;
+
+DROP TRIGGER IF EXISTS progress_rollup_update;
+CREATE TRIGGER progress_rollup_update AFTER UPDATE ON progress
+WHEN NOT (OLD.user_id IS NEW.user_id AND OLD.exercise_id IS NEW.exercise_id AND OLD.date IS NEW.date
+          AND OLD.weight_kg IS NEW.weight_kg AND OLD.reps IS NEW.reps AND OLD.sets IS NEW.sets
+          AND OLD.duration_minutes IS NEW.duration_minutes)
+BEGIN
+    UPDATE user_rollups SET
+        progress_records = progress_records - 1,
+        personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END)
+    WHERE user_id = OLD.user_id;
+    UPDATE exercise_rollups SET
+        total_attempts = total_attempts - 1,
+        personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END),
+        total_weight = total_weight - COALESCE(OLD.weight_kg, 0),
+        total_reps = total_reps - COALESCE(OLD.reps, 0)
+    WHERE exercise_id = OLD.exercise_id;
+    UPDATE user_exercise_rollups SET attempts = attempts - 1
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id;
+    DELETE FROM user_exercise_rollups
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND attempts <= 0;
+    -- Only a record that held a best forces a rescan of the pair
+    UPDATE user_exercise_rollups SET
+        best_weight_kg = (SELECT MAX(weight_kg) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_reps = (SELECT MAX(reps) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_duration_minutes = (SELECT MAX(duration_minutes) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_volume_kg = (SELECT MAX(COALESCE(sets, 1) * reps * weight_kg) FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id),
+        best_weight_kg_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND weight_kg IS NOT NULL
+            ORDER BY weight_kg DESC, date LIMIT 1
+        ),
+        best_reps_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND reps IS NOT NULL
+            ORDER BY reps DESC, date LIMIT 1
+        ),
+        best_volume_kg_at = (
+            SELECT date FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND reps * weight_kg IS NOT NULL
+            ORDER BY COALESCE(sets, 1) * reps * weight_kg DESC, date LIMIT 1
+        )
+    WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+      AND (OLD.weight_kg >= best_weight_kg OR OLD.reps >= best_reps OR OLD.duration_minutes >= best_duration_minutes
+           OR COALESCE(OLD.sets, 1) * OLD.reps * OLD.weight_kg >= best_volume_kg);
+    UPDATE user_rollups SET
+        progress_records = progress_records + 1,
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END)
+    WHERE user_id = NEW.user_id;
+    UPDATE exercise_rollups SET
+        total_attempts = total_attempts + 1,
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END),
+        total_weight = total_weight + COALESCE(NEW.weight_kg, 0),
+        total_reps = total_reps + COALESCE(NEW.reps, 0)
+    WHERE exercise_id = NEW.exercise_id;
+    INSERT INTO user_exercise_rollups (
+        user_id, exercise_id, attempts, best_weight_kg, best_reps, best_duration_minutes, best_volume_kg,
+        best_weight_kg_at, best_reps_at, best_volume_kg_at
+    )
+    VALUES (
+        NEW.user_id, NEW.exercise_id, 1, NEW.weight_kg, NEW.reps, NEW.duration_minutes,
+        COALESCE(NEW.sets, 1) * NEW.reps * NEW.weight_kg,
+        CASE WHEN NEW.weight_kg IS NOT NULL THEN NEW.date END,
+        CASE WHEN NEW.reps IS NOT NULL THEN NEW.date END,
+        CASE WHEN NEW.reps * NEW.weight_kg IS NOT NULL THEN NEW.date END
+    )
+    ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+        attempts = attempts + 1,
+        best_weight_kg = COALESCE(MAX(best_weight_kg, excluded.best_weight_kg), best_weight_kg, excluded.best_weight_kg),
+        best_reps = COALESCE(MAX(best_reps, excluded.best_reps), best_reps, excluded.best_reps),
+        best_duration_minutes = COALESCE(MAX(best_duration_minutes, excluded.best_duration_minutes), best_duration_minutes, excluded.best_duration_minutes),
+        best_volume_kg = COALESCE(MAX(best_volume_kg, excluded.best_volume_kg), best_volume_kg, excluded.best_volume_kg),
+        best_weight_kg_at = CASE
+            WHEN COALESCE(excluded.best_weight_kg > best_weight_kg, excluded.best_weight_kg IS NOT NULL) THEN excluded.best_weight_kg_at
+            WHEN excluded.best_weight_kg = best_weight_kg THEN MIN(best_weight_kg_at, excluded.best_weight_kg_at)
+            ELSE best_weight_kg_at END,
+        best_reps_at = CASE
+            WHEN COALESCE(excluded.best_reps > best_reps, excluded.best_reps IS NOT NULL) THEN excluded.best_reps_at
+            WHEN excluded.best_reps = best_reps THEN MIN(best_reps_at, excluded.best_reps_at)
+            ELSE best_reps_at END,
+        best_volume_kg_at = CASE
+            WHEN COALESCE(excluded.best_volume_kg > best_volume_kg, excluded.best_volume_kg IS NOT NULL) THEN excluded.best_volume_kg_at
+            WHEN excluded.best_volume_kg = best_volume_kg THEN MIN(best_volume_kg_at, excluded.best_volume_kg_at)
+            ELSE best_volume_kg_at END;
+END;
+
+-- Only the personal_record flag changed: the record was re-flagged after an
+-- earlier-dated write to its pair
+DROP TRIGGER IF EXISTS progress_rollup_flag;
+CREATE TRIGGER progress_rollup_flag AFTER UPDATE OF personal_record ON progress
+WHEN OLD.user_id IS NEW.user_id AND OLD.exercise_id IS NEW.exercise_id AND OLD.date IS NEW.date
+     AND OLD.weight_kg IS NEW.weight_kg AND OLD.reps IS NEW.reps AND OLD.sets IS NEW.sets
+     AND OLD.duration_minutes IS NEW.duration_minutes AND OLD.personal_record IS NOT NEW.personal_record
+BEGIN
+    UPDATE user_rollups SET
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE -1 END)
+    WHERE user_id = NEW.user_id;
+    UPDATE exercise_rollups SET
+        personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE -1 END)
+    WHERE exercise_id = NEW.exercise_id;
+END;
+
+-- A record's personal_record depends on the records of its pair dated before
+-- it (by date, then id). A write with records dated after it, such as a
+-- backdated entry, an edit or a delete, re-flags the pair in one window pass.
+-- Writing the pair's newest record, the usual case, finds none and skips it.
+DROP TRIGGER IF EXISTS progress_reflag_insert;
+CREATE TRIGGER progress_reflag_insert AFTER INSERT ON progress
+WHEN EXISTS (
+    SELECT 1 FROM progress WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id
+      AND (date > COALESCE(NEW.date, '') OR (date IS NEW.date AND id > NEW.id))
+)
+BEGIN
+    UPDATE progress SET personal_record = f.personal_record FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id
+        WINDOW earlier AS (ORDER BY date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS NOT f.personal_record;
+END;
+
+DROP TRIGGER IF EXISTS progress_reflag_delete;
+CREATE TRIGGER progress_reflag_delete AFTER DELETE ON progress
+WHEN EXISTS (
+    SELECT 1 FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+      AND (date > COALESCE(OLD.date, '') OR (date IS OLD.date AND id > OLD.id))
+)
+BEGIN
+    UPDATE progress SET personal_record = f.personal_record FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+        WINDOW earlier AS (ORDER BY date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS NOT f.personal_record;
+END;
+
+DROP TRIGGER IF EXISTS progress_reflag_update;
+CREATE TRIGGER progress_reflag_update AFTER UPDATE OF user_id, exercise_id, date, weight_kg, reps, duration_minutes ON progress
+WHEN EXISTS (
+    SELECT 1 FROM progress WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+      AND (date > COALESCE(OLD.date, '') OR (date IS OLD.date AND id > OLD.id))
+) OR EXISTS (
+    SELECT 1 FROM progress WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id
+      AND (date > COALESCE(NEW.date, '') OR (date IS NEW.date AND id > NEW.id))
+)
+BEGIN
+    UPDATE progress SET personal_record = f.personal_record FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id
+        WINDOW earlier AS (ORDER BY date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS NOT f.personal_record;
+    UPDATE progress SET personal_record = f.personal_record FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id
+          AND (NEW.user_id IS NOT OLD.user_id OR NEW.exercise_id IS NOT OLD.exercise_id)
+        WINDOW earlier AS (ORDER BY date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS NOT f.personal_record;
+END;
+"""
+
+# Recompute every rollup from the base tables (repair after drift or migration).
+# exercise_rollups is emptied first and refilled last so the unique_users
+# triggers on user_exercise_rollups have nothing to update in between.
+REBUILD_ROLLUPS = """
+DELETE FROM exercise_rollups;
+DELETE FROM user_exercise_rollups;
+DELETE FROM user_rollups;
+
+UPDATE progress SET personal_record = f.personal_record FROM (
+    SELECT id,
+           COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+           OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+           OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+           AS personal_record
+    FROM progress
+    WINDOW earlier AS (
+        PARTITION BY user_id, exercise_id ORDER BY date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+    )
+) f
+WHERE progress.id = f.id AND progress.personal_record IS NOT f.personal_record;
+
+INSERT INTO user_exercise_rollups (
+    user_id, exercise_id, attempts, best_weight_kg, best_reps, best_duration_minutes, best_volume_kg
+)
+SELECT user_id, exercise_id, COUNT(*), MAX(weight_kg), MAX(reps), MAX(duration_minutes), MAX(COALESCE(sets, 1) * reps * weight_kg)
+FROM progress GROUP BY user_id, exercise_id;
+
+UPDATE user_exercise_rollups SET
+    best_weight_kg_at = (
+        SELECT MIN(date) FROM progress p
+        WHERE p.user_id = user_exercise_rollups.user_id AND p.exercise_id = user_exercise_rollups.exercise_id
+          AND p.weight_kg = user_exercise_rollups.best_weight_kg
+    ),
+    best_reps_at = (
+        SELECT MIN(date) FROM progress p
+        WHERE p.user_id = user_exercise_rollups.user_id AND p.exercise_id = user_exercise_rollups.exercise_id
+          AND p.reps = user_exercise_rollups.best_reps
+    ),
+    best_volume_kg_at = (
+        SELECT MIN(date) FROM progress p
+        WHERE p.user_id = user_exercise_rollups.user_id AND p.exercise_id = user_exercise_rollups.exercise_id
+          AND COALESCE(p.sets, 1) * p.reps * p.weight_kg = user_exercise_rollups.best_volume_kg
+    );
+
+INSERT INTO user_rollups (
+    user_id, total_sessions, completed_sessions, total_workout_time_minutes,
+    total_calories_burned, progress_records, personal_records
+)
+SELECT u.id,
+       COALESCE(s.total_sessions, 0),
+       COALESCE(s.completed_sessions, 0),
+       COALESCE(s.total_workout_time_minutes, 0),
+       COALESCE(s.total_calories_burned, 0),
+       COALESCE(p.progress_records, 0),
+       COALESCE(p.personal_records, 0)
+FROM users u
+LEFT JOIN (
+    SELECT user_id,
+           COUNT(*) AS total_sessions,
+           COUNT(*) FILTER (WHERE completed) AS completed_sessions,
+           SUM(total_duration_minutes) FILTER (WHERE completed) AS total_workout_time_minutes,
+           SUM(calories_burned) FILTER (WHERE completed) AS total_calories_burned
+    FROM sessions GROUP BY user_id
+) s ON s.user_id = u.id
+LEFT JOIN (
+    SELECT user_id,
+           COUNT(*) AS progress_records,
+           COUNT(*) FILTER (WHERE personal_record) AS personal_records
+    FROM progress GROUP BY user_id
+) p ON p.user_id = u.id;
+
+INSERT INTO exercise_rollups (
+    exercise_id, total_attempts, unique_users, personal_records, total_weight, total_reps
+)
+SELECT e.id,
+       COALESCE(p.total_attempts, 0),
+       COALESCE(p.unique_users, 0),
+       COALESCE(p.personal_records, 0),
+       COALESCE(p.total_weight, 0),
+       COALESCE(p.total_reps, 0)
+FROM exercises e
+LEFT JOIN (
+    SELECT exercise_id,
+           COUNT(*) AS total_attempts,
+           COUNT(DISTINCT user_id) AS unique_users,
+           COUNT(*) FILTER (WHERE personal_record) AS personal_records,
+           SUM(weight_kg) AS total_weight,
+           SUM(reps) AS total_reps
+    FROM progress GROUP BY exercise_id
+) p ON p.exercise_id = e.id;
+"""
+
+JSON_COLUMNS = {
+    "exercises": ("muscle_groups", "equipment_needed", "instructions"),
+    "users": ("goals",),
+    "routines": ("target_muscle_groups", "exercises"),
+    "sessions": (),
+    "progress": (),
+}
+
+BOOL_COLUMNS = {
+    "exercises": (),
+    "users": (),
+    "routines": (),
+    "sessions": ("completed",),
+    "progress": ("personal_record",),
+}
+
+# bm25 weights of the exercise_search columns: name, description, instructions
+SEARCH_WEIGHTS = (10.0, 3.0, 1.0)
+
+# Columns computed by the database on write; values sent by callers are ignored
+DERIVED_COLUMNS = {
+    "progress": ("personal_record",),
+}
+
+# Columns added after the first schema; older database files get them on start
+ADDED_COLUMNS = {
+    "user_exercise_rollups": (
+        ("best_weight_kg", "REAL"), ("best_reps", "INTEGER"), ("best_duration_minutes", "INTEGER"),
+        ("best_volume_kg", "REAL"), ("best_weight_kg_at", "TEXT"), ("best_reps_at", "TEXT"),
+        ("best_volume_kg_at", "TEXT"),
+    ),
+}
+
+# A progress record is a personal record when any of these beats every record
+# of its (user, exercise) pair dated before it, or none of those has a value
+# for it. Records with the same date are ordered by id.
+PERSONAL_RECORD_METRICS = ("weight_kg", "reps", "duration_minutes")
+
+# Default of progress.date, for inserts that leave it out
+PROGRESS_DATE_DEFAULT = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+
+def personal_record_sql(values: Dict[str, str], bests: Dict[str, str]) -> str:
+    """SQL condition comparing each metric's new value with its best"""
+    return " OR ".join(
+        f"COALESCE({values[metric]} > {bests[metric]}, {values[metric]} IS NOT NULL)"
+        for metric in PERSONAL_RECORD_METRICS
+    )
+
+
+class SQLiteRepository(Repository):
+    """Repository backed by an embedded SQLite database.
+
+    Queries run synchronously on the calling thread: local SQLite calls take
+    well under a millisecond, which is cheaper than handing them to a thread.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        # Files written before the rollup tables existed get them empty from
+        # SCHEMA, so they are filled from the base tables, like an upgrade.
+        # Files written before records were re-flagged by date also get their
+        # personal_record flags recomputed.
+        had_rollups = self._has_object("table", "user_rollups")
+        had_reflag = self._has_object("trigger", "progress_reflag_insert")
+        upgraded = self._add_columns()
+        self.conn.executescript(SCHEMA)
+        if upgraded or not had_rollups or not had_reflag:
+            self._rebuild_rollups()
+        self.columns = {
+            table: {info["name"] for info in self.conn.execute(f"PRAGMA table_info({table})")}
+            for table in TABLES
+        }
+
+    def _has_object(self, kind: str, name: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)
+        ).fetchone() is not None
+
+    def _add_columns(self) -> bool:
+        """Add the columns missing from tables created by an older schema.
+
+        Runs before SCHEMA, whose indexes may use them; returns whether any
+        column was added, in which case the rollups need rebuilding.
+        """
+        added = False
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {info["name"] for info in self.conn.execute(f"PRAGMA table_info({table})")}
+            if not existing:
+                continue
+            for column, column_type in columns:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    added = True
+        return added
+
+    def _check(self, table: str, columns) -> None:
+        if table not in self.columns:
+            raise ValueError(f"Unknown table: {table}")
+        unknown = set(columns) - self.columns[table]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {', '.join(sorted(unknown))}")
+
+    def _encode(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        encoded = {column: value for column, value in data.items() if column not in DERIVED_COLUMNS.get(table, ())}
+        for column in JSON_COLUMNS[table]:
+            if column in encoded and encoded[column] is not None:
+                encoded[column] = json.dumps(encoded[column])
+        return encoded
+
+    def _derived(self, table: str, encoded: Dict[str, Any], updating: bool = False) -> Dict[str, str]:
+        """SQL expressions for the derived columns of a row being written.
+
+        SQLite triggers cannot change the row they fire for, so personal_record
+        is computed inside the INSERT or UPDATE itself. An insert dated after
+        every record of its pair, the usual case, compares against the bests
+        kept in user_exercise_rollups, a primary-key lookup; a backdated one
+        compares against the records dated before it. Edits that change a
+        metric, the date or the pair compare against the records dated before
+        the edited one; other edits keep the stored flag. The pair's later
+        records are re-flagged by the progress_reflag_* triggers.
+        """
+        if table != "progress":
+            return {}
+        keys = (*PERSONAL_RECORD_METRICS, "user_id", "exercise_id", "date")
+        if not updating:
+            values = {column: f":{column}" if column in encoded else "NULL" for column in keys}
+            if "date" not in encoded:
+                values["date"] = PROGRESS_DATE_DEFAULT
+            pair = f"p.user_id = {values['user_id']} AND p.exercise_id = {values['exercise_id']}"
+            bests = {metric: f"r.best_{metric}" for metric in PERSONAL_RECORD_METRICS}
+            earlier_bests = {metric: f"MAX(p.{metric})" for metric in PERSONAL_RECORD_METRICS}
+            return {"personal_record": (
+                f"(CASE WHEN EXISTS (SELECT 1 FROM progress p WHERE {pair} AND p.date > COALESCE({values['date']}, '')) "
+                f"THEN (SELECT {personal_record_sql(values, earlier_bests)} FROM progress p "
+                f"WHERE {pair} AND COALESCE(p.date, '') <= COALESCE({values['date']}, '')) "
+                f"ELSE (SELECT {personal_record_sql(values, bests)} FROM (SELECT 1) "
+                f"LEFT JOIN user_exercise_rollups r "
+                f"ON r.user_id = {values['user_id']} AND r.exercise_id = {values['exercise_id']}) END)"
+            )}
+        if not set(encoded) & set(keys):
+            return {}
+        values = {column: f":{column}" if column in encoded else f"progress.{column}" for column in keys}
+        bests = {metric: f"MAX(p.{metric})" for metric in PERSONAL_RECORD_METRICS}
+        return {"personal_record": (
+            f"(SELECT {personal_record_sql(values, bests)} FROM progress p "
+            f"WHERE p.user_id = {values['user_id']} AND p.exercise_id = {values['exercise_id']} "
+            f"AND p.id <> progress.id AND (COALESCE(p.date, '') < COALESCE({values['date']}, '') "
+            f"OR (p.date IS {values['date']} AND p.id < progress.id)))"
+        )}
+
+    @staticmethod
+    @contextmanager
+    def _foreign_keys_checked():
+        try:
+            yield
+        except sqlite3.IntegrityError as e:
+            if "FOREIGN KEY" in str(e):
+                raise ForeignKeyViolation(str(e)) from e
+            raise
+
+    def _decode(self, table: str, row: sqlite3.Row) -> Dict[str, Any]:
+        decoded = dict(row)
+        for column in JSON_COLUMNS[table]:
+            if decoded.get(column) is not None:
+                decoded[column] = json.loads(decoded[column])
+        for column in BOOL_COLUMNS[table]:
+            if decoded.get(column) is not None:
+                decoded[column] = bool(decoded[column])
+        return decoded
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._check(table, data)
+        encoded = self._encode(table, data)
+        values = {**{column: f":{column}" for column in encoded}, **self._derived(table, encoded)}
+        columns = ", ".join(values)
+        placeholders = ", ".join(values.values())
+        with self._foreign_keys_checked():
+            row = self.conn.execute(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING *", encoded
+            ).fetchone()
+        return self._decode(table, row)
+
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        columns = list(rows[0])
+        self._check(table, columns)
+        if any(list(row) != columns for row in rows):
+            raise ValueError("All rows in a multi-row insert must have the same columns")
+        if table in DERIVED_COLUMNS:
+            # Derived values depend on the rows written before them, which a
+            # multi-row VALUES list cannot see, so rows go in one at a time
+            return await self._insert_each(table, rows)
+        values = ", ".join(["(" + ", ".join("?" * len(columns)) + ")"] * len(rows))
+        params = [value for row in rows for value in self._encode(table, row).values()]
+        with self._foreign_keys_checked():
+            created = self.conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} RETURNING *", params
+            ).fetchall()
+        # AUTOINCREMENT ids follow VALUES order, so sorting restores input order
+        return sorted((self._decode(table, row) for row in created), key=lambda row: row["id"])
+
+    async def _insert_each(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.conn.execute("SAVEPOINT insert_each")
+        try:
+            created = [await self.insert(table, row) for row in rows]
+        except Exception:
+            self.conn.execute("ROLLBACK TO insert_each")
+            raise
+        finally:
+            self.conn.execute("RELEASE insert_each")
+        return created
+
+    async def get(self, table: str, row_id: int, columns: str = "*") -> Optional[Dict[str, Any]]:
+        if columns != "*":
+            self._check(table, [column.strip() for column in columns.split(",")])
+        else:
+            self._check(table, ())
+        row = self.conn.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (row_id,)).fetchone()
+        return self._decode(table, row) if row else None
+
+    async def list(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        contains_any: Optional[Dict[str, List[Any]]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        gte: Optional[Dict[str, Any]] = None,
+        lt: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+    ) -> List[Dict[str, Any]]:
+        filters = filters or {}
+        contains = contains or {}
+        contains_any = contains_any or {}
+        gte = gte or {}
+        lt = lt or {}
+        selected = [column.strip() for column in columns.split(",")] if columns != "*" else []
+        self._check(table, [*filters, *contains, *contains_any, *gte, *lt, *selected])
+        conditions = [f"{column} = :{column}" for column in filters]
+        params = dict(filters)
+        for prefix, op, bounds in (("gte", ">=", gte), ("lt", "<", lt)):
+            for column, value in bounds.items():
+                conditions.append(f"{column} {op} :_{prefix}_{column}")
+                params[f"_{prefix}_{column}"] = value
+        for mode, json_filters in (("all", contains), ("any", contains_any)):
+            for column, values in json_filters.items():
+                names = [f"_{mode}_{column}_{i}" for i in range(len(values))]
+                params.update(zip(names, values))
+                placeholders = ", ".join(f":{name}" for name in names)
+                matches = f"SELECT COUNT(DISTINCT value) FROM json_each({column}) WHERE value IN ({placeholders})"
+                required = len(set(values)) if mode == "all" else min(len(values), 1)
+                conditions.append(f"({matches}) >= {required}")
+        if after_id is not None:
+            conditions.append("id > :_after_id")
+            params["_after_id"] = after_id
+        sql = f"SELECT {columns} FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT :_limit"
+            params["_limit"] = limit
+        rows = self.conn.execute(sql, params).fetchall()
+        return [self._decode(table, row) for row in rows]
+
+    async def update(
+        self,
+        table: str,
+        row_id: int,
+        data: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        returning: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        if not data:
+            return await self.get(table, row_id, columns="*" if returning else "id")
+        filters = filters or {}
+        self._check(table, [*data, *filters])
+        encoded = self._encode(table, data)
+        values = {**{column: f":{column}" for column in encoded}, **self._derived(table, encoded, updating=True)}
+        if not values:
+            return await self.get(table, row_id, columns="*" if returning else "id")
+        assignments = ", ".join(f"{column} = {value}" for column, value in values.items())
+        conditions = " AND ".join(["id = :_id", *(f"{column} = :_where_{column}" for column in filters)])
+        params = {**encoded, "_id": row_id, **{f"_where_{column}": value for column, value in filters.items()}}
+        row = self.conn.execute(
+            f"UPDATE {table} SET {assignments} WHERE {conditions} RETURNING {'*' if returning else 'id'}", params
+        ).fetchone()
+        if not row:
+            return None
+        return self._decode(table, row) if returning else {"id": row_id}
+
+    async def delete(self, table: str, row_id: int, returning: bool = True) -> Optional[Dict[str, Any]]:
+        self._check(table, ())
+        row = self.conn.execute(
+            f"DELETE FROM {table} WHERE id = ? RETURNING {'*' if returning else 'id'}", (row_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return self._decode(table, row) if returning else {"id": row_id}
+
+    async def existing_ids(self, table: str, ids: Iterable[int]) -> Set[int]:
+        self._check(table, ())
+        ids = list(set(ids))
+        if not ids:
+            return set()
+        placeholders = ", ".join("?" * len(ids))
+        rows = self.conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", ids)
+        return {row["id"] for row in rows}
+
+    async def get_many(self, table: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        self._check(table, ())
+        ids = list(set(ids))
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        rows = self.conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders}) ORDER BY id", ids)
+        return [self._decode(table, row) for row in rows]
+
+    async def user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM user_rollups WHERE user_id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def exercise_stats(self, exercise_id: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            """
+            SELECT r.*, e.name AS exercise_name
+            FROM exercise_rollups r
+            JOIN exercises e ON e.id = r.exercise_id
+            WHERE r.exercise_id = ?
+            """,
+            (exercise_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    async def leaderboard(
+        self, exercise_id: int, metric: str, k: int, fitness_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        column = LEADERBOARD_COLUMNS[metric]
+        params = {"exercise_id": exercise_id, "k": k}
+        level = ""
+        if fitness_level is not None:
+            level = "AND u.fitness_level = :fitness_level"
+            params["fitness_level"] = fitness_level
+        rows = self.conn.execute(
+            f"""
+            SELECT r.user_id, u.username, u.fitness_level, r.{column} AS value, r.{column}_at AS achieved_at
+            FROM user_exercise_rollups r
+            JOIN users u ON u.id = r.user_id
+            WHERE r.exercise_id = :exercise_id AND r.{column} IS NOT NULL {level}
+            ORDER BY r.{column} DESC, r.{column}_at, r.user_id
+            LIMIT :k
+            """,
+            params,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    async def search_exercises(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        if not terms:
+            return []
+        # Each term is quoted, so it is matched as a word prefix, never parsed as syntax
+        match = " ".join(f'"{term}"*' for term in terms)
+        rows = self.conn.execute(
+            f"""
+            SELECT e.* FROM exercise_search s
+            JOIN exercises e ON e.id = s.rowid
+            WHERE exercise_search MATCH ?
+            ORDER BY bm25(exercise_search, {", ".join(map(str, SEARCH_WEIGHTS))}), e.id
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [self._decode("exercises", row) for row in rows]
+
+    def _rebuild_rollups(self) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in REBUILD_ROLLUPS.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    async def rebuild_rollups(self) -> None:
+        self._rebuild_rollups()
@@ -1,19 +1,46 @@
-from supabase import create_client, Client
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+    from app.db.http_pool import PoolMetrics, PoolSettings
 
-# Supabase configuration from environment variables
+# Supabase configuration from environment variables (app.db loads .env first)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Validate that environment variables are set
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "SUPABASE_URL and SUPABASE_KEY must be set in environment variables or .env file"
-    )
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+@lru_cache(maxsize=None)
+def get_supabase() -> "AsyncClient":
+    """Build the async Supabase client on first use.
+
+    The SDK takes a few hundred milliseconds to import, so it is imported
+    here rather than at module load: serverless cold starts that only serve
+    the web interface or /docs never pay for it. Route handlers await
+    PostgREST calls on the event loop instead of blocking a threadpool
+    worker. The constructor is synchronous; acreate_client() would only add
+    a session lookup, which is not needed when authenticating with the API key.
+    """
+    # Validate that environment variables are set
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError(
+            "SUPABASE_URL and SUPABASE_KEY must be set in environment variables or .env file"
+        )
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+def create_client(
+    url: str, key: str, settings: Optional["PoolSettings"] = None, metrics: Optional["PoolMetrics"] = None
+) -> "AsyncClient":
+    """Build a Supabase client whose PostgREST calls share one pooled HTTP client.
+
+    Pool limits, keep-alive, HTTP/2 and timeouts come from the
+    SUPABASE_HTTP_* environment variables unless settings are given, and
+    connection counters go to the worker's pool_metrics unless metrics are.
+    """
+    from supabase import AsyncClient, AsyncClientOptions
+    from app.db.http_pool import PoolSettings, pooled_client
+
+    settings = settings or PoolSettings.from_env()
+    return AsyncClient(url, key, AsyncClientOptions(httpx_client=pooled_client(settings, metrics)))
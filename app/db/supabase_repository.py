@@ -0,0 +1,192 @@
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set
+from app.db.repository import ForeignKeyViolation, LEADERBOARD_COLUMNS, Repository
+
+# Ids per "in" filter, keeping lookup URLs well under PostgREST/proxy limits
+IN_FILTER_CHUNK_SIZE = 500
+
+# PostgreSQL SQLSTATE for foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+
+class SupabaseRepository(Repository):
+    """Repository backed by the Supabase PostgREST API.
+
+    The client is built by client_factory on the first query, so importing
+    the app does not import the Supabase SDK. The postgrest names used below
+    are imported where needed, after the client has loaded them.
+    """
+
+    def __init__(self, client_factory: Callable[[], "AsyncClient"]):
+        self.client_factory = client_factory
+        self._client: Optional["AsyncClient"] = None
+
+    @property
+    def client(self) -> "AsyncClient":
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    @staticmethod
+    async def _write(query):
+        from postgrest.exceptions import APIError
+
+        try:
+            return await query.execute()
+        except APIError as e:
+            if e.code == FOREIGN_KEY_VIOLATION:
+                raise ForeignKeyViolation(e.details or e.message) from e
+            raise
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self._write(self.client.table(table).insert(data))
+        if not result.data:
+            raise RuntimeError(f"Insert into {table} returned no rows")
+        return result.data[0]
+
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        result = await self._write(self.client.table(table).insert(rows))
+        # Ids come from a sequence in VALUES order, so sorting restores input order
+        return sorted(result.data, key=lambda row: row["id"])
+
+    async def get(self, table: str, row_id: int, columns: str = "*") -> Optional[Dict[str, Any]]:
+        result = await self.client.table(table).select(columns).eq("id", row_id).execute()
+        return result.data[0] if result.data else None
+
+    async def list(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        contains_any: Optional[Dict[str, List[Any]]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        gte: Optional[Dict[str, Any]] = None,
+        lt: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+    ) -> List[Dict[str, Any]]:
+        query = self.client.table(table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        # JSONB containment (@>) so the GIN indexes on the array columns are used
+        for column, values in (contains or {}).items():
+            query = query.filter(column, "cs", json.dumps(values))
+        for column, values in (contains_any or {}).items():
+            query = query.or_(",".join(f"{column}.cs.{json.dumps([value])}" for value in values))
+        for column, value in (gte or {}).items():
+            query = query.gte(column, value)
+        for column, value in (lt or {}).items():
+            query = query.lt(column, value)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        query = query.order("id")
+        if limit is not None:
+            query = query.limit(limit)
+        result = await query.execute()
+        return result.data
+
+    async def update(
+        self,
+        table: str,
+        row_id: int,
+        data: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None,
+        returning: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        if not data:
+            return await self.get(table, row_id, columns="*" if returning else "id")
+        query = self.client.table(table).update(data, **self._returning_options(returning)).eq("id", row_id)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        return self._affected_row(await query.execute(), row_id, returning)
+
+    async def delete(self, table: str, row_id: int, returning: bool = True) -> Optional[Dict[str, Any]]:
+        query = self.client.table(table).delete(**self._returning_options(returning)).eq("id", row_id)
+        return self._affected_row(await query.execute(), row_id, returning)
+
+    @staticmethod
+    def _returning_options(returning: bool) -> Dict[str, Any]:
+        # return=minimal skips the row body; count=exact still reports whether a row matched
+        if returning:
+            return {}
+        from postgrest import CountMethod, ReturnMethod
+
+        return {"count": CountMethod.exact, "returning": ReturnMethod.minimal}
+
+    @staticmethod
+    def _affected_row(result, row_id: int, returning: bool) -> Optional[Dict[str, Any]]:
+        if returning:
+            return result.data[0] if result.data else None
+        return {"id": row_id} if result.count else None
+
+    async def existing_ids(self, table: str, ids: Iterable[int]) -> Set[int]:
+        return {row["id"] for row in await self._select_in(table, ids, "id")}
+
+    async def get_many(self, table: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return sorted(await self._select_in(table, ids, "*"), key=lambda row: row["id"])
+
+    async def _select_in(self, table: str, ids: Iterable[int], columns: str) -> List[Dict[str, Any]]:
+        ids = sorted(set(ids))
+        chunks = [ids[i:i + IN_FILTER_CHUNK_SIZE] for i in range(0, len(ids), IN_FILTER_CHUNK_SIZE)]
+        results = await asyncio.gather(
+            *(self.client.table(table).select(columns).in_("id", chunk).execute() for chunk in chunks)
+        )
+        return [row for result in results for row in result.data]
+
+    async def user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        result = await self.client.table("user_rollups").select("*").eq("user_id", user_id).execute()
+        return result.data[0] if result.data else None
+
+    async def exercise_stats(self, exercise_id: int) -> Optional[Dict[str, Any]]:
+        # Embed the exercise name through the exercise_rollups -> exercises foreign key
+        result = await (
+            self.client.table("exercise_rollups").select("*, exercises(name)").eq("exercise_id", exercise_id).execute()
+        )
+        if not result.data:
+            return None
+        row = result.data[0]
+        row["exercise_name"] = row.pop("exercises")["name"]
+        return row
+
+    async def leaderboard(
+        self, exercise_id: int, metric: str, k: int, fitness_level: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        column = LEADERBOARD_COLUMNS[metric]
+        # The inner join on users lets the fitness level filter drop pairs
+        query = (
+            self.client.table("user_exercise_rollups")
+            .select(f"user_id, {column}, {column}_at, users!inner(username, fitness_level)")
+            .eq("exercise_id", exercise_id)
+            .not_.is_(column, "null")
+        )
+        if fitness_level is not None:
+            query = query.eq("users.fitness_level", fitness_level)
+        result = await (
+            query.order(column, desc=True).order(f"{column}_at").order("user_id").limit(k).execute()
+        )
+        return [
+            {
+                "user_id": row["user_id"],
+                "username": row["users"]["username"],
+                "fitness_level": row["users"]["fitness_level"],
+                "value": row[column],
+                "achieved_at": row[f"{column}_at"],
+            }
+            for row in result.data
+        ]
+
+    async def search_exercises(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        if not terms:
+            return []
+        # Ranked against the GIN-indexed tsvectors of exercise_search
+        result = await self.client.rpc("search_exercises", {"terms": terms, "max_results": limit}).execute()
+        return result.data
+
+    async def rebuild_rollups(self) -> None:
+        await self.client.rpc("rebuild_rollups", {}).execute()
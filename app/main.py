@@ -1,8 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 from pathlib import Path
+from app import metrics
+from app.timing import ServerTimingMiddleware
 from app.routes import sample
+from app.routes.static import StaticAssets
 
 app = FastAPI()
 
@@ -13,38 +15,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[sample.NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Server-Timing header (backend calls per table, model construction,
+# serialization) and the SLOW_REQUEST_MS log of slow requests' queries.
+# Its total covers the CORS middleware and the app.
+app.add_middleware(ServerTimingMiddleware)
+
+# Count and time every request per route template, served at /metrics.
+# Added last so it is outermost and its timing includes the other middleware.
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Get the project root directory
 project_root = Path(__file__).parent.parent
 
-# Include the sample routes FIRST (so API routes take precedence)
-app.include_router(sample.router)
+# Web interface files, read once and served from memory with ETags and
+# gzip/brotli; index.html links the others by content-hash versioned URLs
+static_assets = StaticAssets(
+    project_root,
+    {"styles.css": "text/css; charset=utf-8", "app.js": "application/javascript; charset=utf-8"},
+)
 
 # Serve index.html at root
 @app.get("/", include_in_schema=False)
-async def read_root():
-    index_path = project_root / "index.html"
-    if index_path.exists():
-        return FileResponse(str(index_path))
+async def read_root(request: Request):
+    if static_assets.index is not None:
+        return static_assets.index.response(request)
     return {"message": "API is running. Visit /docs for documentation."}
 
 # Serve specific static files
 @app.get("/styles.css", include_in_schema=False)
-async def serve_css():
-    css_path = project_root / "styles.css"
-    if css_path.exists():
-        return FileResponse(str(css_path), media_type="text/css")
-    from fastapi import HTTPException
-    raise HTTPException(status_code=404)
+async def serve_css(request: Request):
+    response = static_assets.response("styles.css", request)
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
 
 @app.get("/app.js", include_in_schema=False)
-async def serve_js():
-    js_path = project_root / "app.js"
-    if js_path.exists():
-        return FileResponse(str(js_path), media_type="application/javascript")
-    from fastapi import HTTPException
-    raise HTTPException(status_code=404)
+async def serve_js(request: Request):
+    response = static_assets.response("app.js", request)
+    if response is None:
+        raise HTTPException(status_code=404)
+    return response
+
+# Request and backend call metrics of this worker in Prometheus text format
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# Include the sample routes after the web interface ones: FastAPI sets up a
+# route's validators when matching first reaches it, so a cold start that
+# only serves the web interface skips the ~100 API routes. No API path
+# overlaps the ones above.
+app.include_router(sample.router)
 
 if __name__ == "__main__":
     import uvicorn
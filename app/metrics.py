@@ -0,0 +1,162 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format served at /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label of requests that matched no route, so unknown paths cannot
+# grow the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with one series per combination of label values"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{{{_format_labels(self.labels, labels)}}} {_format_number(value)}"
+            for labels, value in sorted(self.series.items())
+        ]
+
+
+class Histogram:
+    """Histogram with one series per combination of label values.
+
+    An observation increments a single bucket, found by bisection; the
+    cumulative counts Prometheus expects are only summed when rendering.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self.series.items()):
+            label_text = _format_labels(self.labels, labels)
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {_format_number(series[-1])}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+# Metrics of this worker process; each worker is scraped on its own
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code", ("route", "method", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, until its last body chunk is sent",
+    ("route", "method"), LATENCY_BUCKETS,
+)
+http_response_size = Histogram(
+    "http_response_size_bytes", "Size of response bodies as sent, after compression", ("route", "method"), SIZE_BUCKETS
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Time of backend calls by table and operation, cache hits excluded",
+    ("table", "operation"), LATENCY_BUCKETS,
+)
+db_query_errors = Counter("db_query_errors_total", "Backend calls that raised, by table and operation", ("table", "operation"))
+
+METRICS = (http_requests, http_request_duration, http_response_size, db_query_duration, db_query_errors)
+
+
+def observe_query(table: str, operation: str, seconds: float, failed: bool) -> None:
+    labels = (table, operation)
+    db_query_duration.observe(labels, seconds)
+    if failed:
+        db_query_errors.inc(labels)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing requests per route template.
+
+    Labels use the matched route's path ("/exercises/{exercise_id}"), never
+    the raw URL. Written as plain ASGI rather than BaseHTTPMiddleware so
+    responses are not re-wrapped: the per-request cost is one closure and
+    a few dictionary updates.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_requests.inc((path, method, str(status)))
+            http_request_duration.observe((path, method), time.perf_counter() - start)
+            http_response_size.observe((path, method), size)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Generic, Iterable, List, Tuple, Type, TypeVar, get_args
+from pydantic import BaseModel, TypeAdapter
+from app.models.item import Exercise, WorkoutRoutine, User, WorkoutSession, UserProgress
+from app.timing import phase
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _datetime_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Names of the datetime fields of a model, computed once per model"""
+    return tuple(
+        name for name, field in model.model_fields.items()
+        if field.annotation is datetime or datetime in get_args(field.annotation)
+    )
+
+
+def encode(model: BaseModel, exclude_unset: bool = False, **overrides: Any) -> Dict[str, Any]:
+    """Turn a model (or a partial update model) into a database payload.
+
+    Enums become their values and nested models plain dicts. Timestamps are
+    written with isoformat(), as the routes have always stored them.
+    """
+    data = model.model_dump(mode="json", exclude={"id"}, exclude_unset=exclude_unset)
+    for name in _datetime_fields(type(model)):
+        value = getattr(model, name)
+        if name in data and value is not None:
+            data[name] = value.isoformat()
+    data.update(overrides)
+    return data
+
+
+class RowCodec(Generic[M]):
+    """Converts database rows into one model with its compiled pydantic validator.
+
+    Enum values, ISO 8601 timestamps (including a trailing "Z"), JSON lists
+    and defaults for missing columns are all handled in pydantic-core, so
+    decoding a row costs one call instead of per-field Python conversions.
+    Columns the model does not declare are ignored.
+    """
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self._one = TypeAdapter(model)
+        self._many = TypeAdapter(List[model])
+
+    def decode(self, row: Dict[str, Any]) -> M:
+        with phase("model"):
+            return self._one.validate_python(row)
+
+    def decode_many(self, rows: Iterable[Dict[str, Any]]) -> List[M]:
+        with phase("model"):
+            return self._many.validate_python(list(rows))
+
+    def dump_json(self, rows: Iterable[Dict[str, Any]]) -> bytes:
+        """Decode rows and serialize them as a JSON array, without intermediate dicts"""
+        models = self.decode_many(rows)
+        with phase("serialize"):
+            return self._many.dump_json(models)
+
+    def encode(self, model: M, **overrides: Any) -> Dict[str, Any]:
+        return encode(model, **overrides)
+
+
+exercise_codec = RowCodec(Exercise)
+routine_codec = RowCodec(WorkoutRoutine)
+user_codec = RowCodec(User)
+session_codec = RowCodec(WorkoutSession)
+progress_codec = RowCodec(UserProgress)
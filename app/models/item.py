@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List, Dict
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 class ExerciseType(str, Enum):
@@ -24,6 +24,24 @@ class MuscleGroup(str, Enum):
     CORE = "core"
     FULL_BODY = "full_body"
 
+class MatchMode(str, Enum):
+    ANY = "any"
+    ALL = "all"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class SeriesBucket(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class LeaderboardMetric(str, Enum):
+    WEIGHT = "weight"
+    REPS = "reps"
+    VOLUME = "volume"
+
 class Exercise(BaseModel):
     id: Optional[int] = None
     name: str
@@ -66,6 +84,15 @@ class WorkoutRoutine(BaseModel):
     created_at: Optional[datetime] = None
     created_by: Optional[str] = "admin"
 
+class RoutineExpansion(str, Enum):
+    EXERCISES = "exercises"
+
+class ExpandedExerciseInRoutine(ExerciseInRoutine):
+    exercise: Optional[Exercise] = None
+
+class ExpandedWorkoutRoutine(WorkoutRoutine):
+    exercises: List[ExpandedExerciseInRoutine] = []
+
 class WorkoutRoutineUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -128,4 +155,36 @@ class UserProgressUpdate(BaseModel):
     reps: Optional[int] = None
     sets: Optional[int] = None
     duration_minutes: Optional[int] = None
-    personal_record: Optional[bool] = None
+
+class ProgressSeriesPoint(BaseModel):
+    bucket_start: date
+    records: int
+    max_weight_kg: Optional[float] = None
+    total_volume_kg: float
+    estimated_one_rep_max_kg: Optional[float] = None
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    fitness_level: DifficultyLevel
+    value: float
+    achieved_at: Optional[datetime] = None
+
+class RoutineRecommendation(BaseModel):
+    routine: WorkoutRoutine
+    score: float
+    difficulty_fit: float
+    muscle_coverage: float
+    duration_fit: float
+
+class BulkItemResult(BaseModel):
+    index: int
+    status_code: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkInsertResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
@@ -0,0 +1,72 @@
+import hashlib
+import time
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from app.timing import current_timings, timed_endpoint
+
+# Headers that describe the body and must not be sent with a 304
+_BODY_HEADERS = {"content-length", "content-type", "content-encoding"}
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGetRoute(APIRoute):
+    """Route class that adds an ETag to successful GET responses.
+
+    A request whose If-None-Match matches the current ETag gets an empty 304
+    instead of the full body. Responses are marked "Cache-Control: no-cache",
+    so browsers keep the body and revalidate it with the ETag on every fetch.
+
+    The time the handler spends outside the endpoint function (parameter
+    validation, response model validation and JSON encoding, the ETag) is
+    added to the request's "serialize" phase for Server-Timing.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            timings = current_timings()
+            if timings is None:
+                return await conditional_response(request)
+            start = time.perf_counter()
+            endpoint_before = timings.endpoint
+            try:
+                return await conditional_response(request)
+            finally:
+                elapsed = time.perf_counter() - start
+                timings.add_phase("serialize", elapsed - (timings.endpoint - endpoint_before))
+
+        async def conditional_response(request: Request) -> Response:
+            response = await handler(request)
+            body = getattr(response, "body", None)
+            if request.method not in ("GET", "HEAD") or response.status_code != 200 or body is None:
+                return response
+
+            etag = compute_etag(body)
+            response.headers["ETag"] = etag
+            response.headers.setdefault("Cache-Control", "no-cache")
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                headers = {
+                    name: value for name, value in response.headers.items()
+                    if name.lower() not in _BODY_HEADERS
+                }
+                return Response(status_code=304, headers=headers)
+            return response
+
+        return conditional_handler
@@ -1,177 +1,271 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.models.item import (
-    Exercise, ExerciseUpdate, ExerciseType, DifficultyLevel, MuscleGroup,
-    WorkoutRoutine, WorkoutRoutineUpdate, ExerciseInRoutine,
-    User, UserUpdate, WorkoutSession, WorkoutSessionUpdate,
-    UserProgress, UserProgressUpdate
+    Exercise, ExerciseUpdate, ExerciseType, DifficultyLevel, MuscleGroup, MatchMode,
+    WorkoutRoutine, WorkoutRoutineUpdate,
+    RoutineExpansion, ExpandedWorkoutRoutine, ExpandedExerciseInRoutine,
+    User, UserUpdate, WorkoutSession, WorkoutSessionUpdate, ExportFormat, SeriesBucket,
+    UserProgress, UserProgressUpdate, ProgressSeriesPoint, LeaderboardMetric, LeaderboardEntry,
+    RoutineRecommendation, BulkItemResult, BulkInsertResult
 )
-from app.db import supabase
-from typing import List, Dict, Optional
-from datetime import datetime
-
-router = APIRouter()
+from app.models.codec import (
+    RowCodec, encode, exercise_codec, routine_codec, user_codec, session_codec, progress_codec
+)
+from app.db import repository, ForeignKeyViolation, search_terms
+from app.db.cache import DerivedCache
+from app.routes.conditional import ConditionalGetRoute
+from app.routes.serialization import EXPORT_MEDIA_TYPES, csv_header, export_page, rows_response
+from typing import List, Dict, Optional, Union
+from datetime import datetime, timedelta
+from statistics import median
+import asyncio
+import base64
+import json
+
+# GET responses carry ETags and answer If-None-Match with 304
+router = APIRouter(route_class=ConditionalGetRoute)
+
+# ========== QUERY HELPERS ==========
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a cursor into the id after which the next page starts"""
+    if cursor is None:
+        return None
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def muscle_group_filter(
+    column: str, muscle_groups: Optional[List[MuscleGroup]], match: MatchMode
+) -> Dict[str, Dict[str, List[str]]]:
+    """Build the repository containment filter for a muscle group query"""
+    if not muscle_groups:
+        return {}
+    values = [mg.value for mg in muscle_groups]
+    key = "contains" if match == MatchMode.ALL else "contains_any"
+    return {key: {column: values}}
+
+def date_range(column: str, since: Optional[datetime], until: Optional[datetime]) -> Dict[str, Dict[str, str]]:
+    """Build the repository bounds for a [since, until) date range"""
+    bounds = {}
+    if since:
+        bounds["gte"] = {column: since.isoformat()}
+    if until:
+        bounds["lt"] = {column: until.isoformat()}
+    return bounds
+
+# Rows read per query when a route needs every matching row; at most
+# PostgREST's default max-rows, which silently truncates larger responses
+FULL_READ_PAGE_SIZE = 1000
+
+async def list_all(table: str, filters: Optional[Dict] = None, **kwargs) -> List[Dict]:
+    """Read every matching row in keyset pages; columns, if given, must include id"""
+    rows, after_id = [], None
+    while True:
+        page = await repository.list(table, filters, limit=FULL_READ_PAGE_SIZE, after_id=after_id, **kwargs)
+        rows.extend(page)
+        if len(page) < FULL_READ_PAGE_SIZE:
+            return rows
+        after_id = page[-1]["id"]
+
+def paginate(rows: List[Dict], limit: int, response: Response) -> List[Dict]:
+    """Trim a page fetched with limit + 1 rows and set the next-cursor header"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["id"])
+    return rows
+
+# ========== BULK INSERT HELPERS ==========
+
+BULK_CHUNK_SIZE = 500
+MAX_BULK_ITEMS = 10000
+
+def check_bulk_size(items: List) -> None:
+    """Reject bulk requests above the per-request item limit"""
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per bulk request")
+
+async def insert_in_chunks(table: str, pending: List[tuple], label: str) -> List[BulkItemResult]:
+    """Insert (index, row) pairs with one multi-row insert per chunk.
+
+    A rejected row fails its whole chunk, so that chunk is retried row by row
+    to report which items failed and still insert the others.
+    """
+    results = []
+    for start in range(0, len(pending), BULK_CHUNK_SIZE):
+        chunk = pending[start:start + BULK_CHUNK_SIZE]
+        try:
+            created = await repository.insert_many(table, [row for _, row in chunk])
+            results.extend(
+                BulkItemResult(index=index, status_code=200, id=row["id"])
+                for (index, _), row in zip(chunk, created)
+            )
+        except Exception:
+            for index, row in chunk:
+                try:
+                    created_row = await repository.insert(table, row)
+                    results.append(BulkItemResult(index=index, status_code=200, id=created_row["id"]))
+                except Exception as e:
+                    results.append(BulkItemResult(index=index, status_code=500, detail=f"Error creating {label}: {str(e)}"))
+    return results
+
+def bulk_result(results: List[BulkItemResult]) -> BulkInsertResult:
+    """Summarize per-item results in request order"""
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.status_code == 200)
+    return BulkInsertResult(created=created, failed=len(results) - created, results=results)
+
+# ========== WRITE HELPERS ==========
+
+RETURN_MINIMAL = "return=minimal"
+
+def wants_minimal(prefer: Optional[str]) -> bool:
+    """Check whether the client sent Prefer: return=minimal"""
+    return bool(prefer) and any(token.strip().lower() == RETURN_MINIMAL for token in prefer.split(","))
+
+def minimal_response() -> Response:
+    """Empty 204 sent instead of the row when return=minimal was requested"""
+    return Response(status_code=204, headers={"Preference-Applied": RETURN_MINIMAL})
+
+async def missing_reference(references: List[tuple], error: ForeignKeyViolation) -> HTTPException:
+    """Turn a foreign key violation into a 404 naming the missing row.
+
+    Inserts rely on the REFERENCES constraints instead of checking first, so
+    the lookups only run, concurrently, once an insert has been rejected.
+    """
+    found = await asyncio.gather(*(repository.exists(table, row_id) for table, row_id, _ in references))
+    for (_, _, label), exists in zip(references, found):
+        if not exists:
+            return HTTPException(status_code=404, detail=f"{label} not found")
+    return HTTPException(status_code=409, detail=f"Referenced row changed during the request: {str(error)}")
 
 # ========== EXERCISE CRUD OPERATIONS ==========
 
+def exercise_row(exercise: Exercise) -> Dict:
+    """Prepare an exercise for insertion into the database"""
+    return exercise_codec.encode(exercise)
+
 @router.post("/exercises", response_model=Exercise)
-def create_exercise(exercise: Exercise):
+async def create_exercise(exercise: Exercise):
     """Create a new exercise"""
-    # Prepare data for Supabase
-    exercise_data = {
-        "name": exercise.name,
-        "description": exercise.description,
-        "exercise_type": exercise.exercise_type.value,
-        "difficulty": exercise.difficulty.value,
-        "muscle_groups": [mg.value for mg in exercise.muscle_groups],
-        "duration_minutes": exercise.duration_minutes,
-        "calories_burned_per_minute": exercise.calories_burned_per_minute,
-        "equipment_needed": exercise.equipment_needed,
-        "instructions": exercise.instructions
-    }
+    exercise_data = exercise_row(exercise)
     
     try:
-        result = supabase.table("exercises").insert(exercise_data).execute()
-        if result.data:
-            created = result.data[0]
-            # Convert back to Exercise model
-            exercise.id = created["id"]
-            exercise.exercise_type = ExerciseType(created["exercise_type"])
-            exercise.difficulty = DifficultyLevel(created["difficulty"])
-            exercise.muscle_groups = [MuscleGroup(mg) for mg in created["muscle_groups"]]
-            return exercise
+        created = await repository.insert("exercises", exercise_data)
+        if created:
+            return exercise_codec.decode(created)
         raise HTTPException(status_code=500, detail="Failed to create exercise")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating exercise: {str(e)}")
 
+@router.post("/exercises/bulk", response_model=BulkInsertResult)
+async def create_exercises_bulk(exercises: List[Exercise]):
+    """Create many exercises with chunked multi-row inserts"""
+    check_bulk_size(exercises)
+    pending = [(index, exercise_row(exercise)) for index, exercise in enumerate(exercises)]
+    results = await insert_in_chunks("exercises", pending, "exercise")
+    return bulk_result(results)
+
 @router.get("/exercises", response_model=List[Exercise])
-def get_exercises(
+async def get_exercises(
+    response: Response,
     exercise_type: Optional[ExerciseType] = None,
     difficulty: Optional[DifficultyLevel] = None,
-    muscle_group: Optional[MuscleGroup] = None
+    muscle_group: Optional[List[MuscleGroup]] = Query(None),
+    muscle_group_match: MatchMode = MatchMode.ANY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
 ):
-    """Get all exercises with optional filtering"""
+    """Get all exercises with optional filtering, one keyset page at a time"""
+    after_id = decode_cursor(cursor)
     try:
-        query = supabase.table("exercises").select("*")
+        filters = {}
         
         if exercise_type:
-            query = query.eq("exercise_type", exercise_type.value)
+            filters["exercise_type"] = exercise_type.value
         if difficulty:
-            query = query.eq("difficulty", difficulty.value)
-        
-        result = query.execute()
-        
-        exercises = []
-        for row in result.data:
-            # Filter by muscle_group in Python if specified
-            if muscle_group:
-                muscle_groups = row.get("muscle_groups", [])
-                if muscle_group.value not in muscle_groups:
-                    continue
-            
-            exercise = Exercise(
-                id=row["id"],
-                name=row["name"],
-                description=row["description"],
-                exercise_type=ExerciseType(row["exercise_type"]),
-                difficulty=DifficultyLevel(row["difficulty"]),
-                muscle_groups=[MuscleGroup(mg) for mg in row["muscle_groups"]],
-                duration_minutes=row.get("duration_minutes"),
-                calories_burned_per_minute=row.get("calories_burned_per_minute"),
-                equipment_needed=row.get("equipment_needed", []),
-                instructions=row.get("instructions", [])
-            )
-            exercises.append(exercise)
+            filters["difficulty"] = difficulty.value
+        
+        # Filter by muscle groups in the database (JSONB containment)
+        muscle_filter = muscle_group_filter("muscle_groups", muscle_group, muscle_group_match)
+        
+        rows = await repository.list("exercises", filters, **muscle_filter, limit=limit + 1, after_id=after_id)
+        rows = paginate(rows, limit, response)
         
-        return exercises
+        # Rows are validated once and serialized straight to the response body
+        return rows_response(exercise_codec, rows, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching exercises: {str(e)}")
 
+@router.get("/exercises/search", response_model=List[Exercise])
+async def search_exercises(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search exercises by name, description and instructions, best match first.
+
+    Words match as prefixes, ignoring case and accents.
+    """
+    try:
+        rows = await repository.search_exercises(search_terms(q), limit)
+        return rows_response(exercise_codec, rows, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching exercises: {str(e)}")
+
 @router.get("/exercises/{exercise_id}", response_model=Exercise)
-def get_exercise(exercise_id: int):
+async def get_exercise(exercise_id: int):
     """Get a specific exercise by ID"""
     try:
-        result = supabase.table("exercises").select("*").eq("id", exercise_id).execute()
+        row = await repository.get("exercises", exercise_id)
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Exercise not found")
-        
-        row = result.data[0]
-        return Exercise(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            exercise_type=ExerciseType(row["exercise_type"]),
-            difficulty=DifficultyLevel(row["difficulty"]),
-            muscle_groups=[MuscleGroup(mg) for mg in row["muscle_groups"]],
-            duration_minutes=row.get("duration_minutes"),
-            calories_burned_per_minute=row.get("calories_burned_per_minute"),
-            equipment_needed=row.get("equipment_needed", []),
-            instructions=row.get("instructions", [])
-        )
+        return exercise_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching exercise: {str(e)}")
 
 @router.put("/exercises/{exercise_id}", response_model=Exercise)
-def update_exercise(exercise_id: int, exercise_update: ExerciseUpdate):
+async def update_exercise(exercise_id: int, exercise_update: ExerciseUpdate, prefer: Optional[str] = Header(None)):
     """Update an exercise"""
     try:
-        # Get existing exercise
-        result = supabase.table("exercises").select("*").eq("id", exercise_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Exercise not found")
+        update_data = encode(exercise_update, exclude_unset=True)
         
-        existing = result.data[0]
-        
-        # Prepare update data
-        update_data = exercise_update.model_dump(exclude_unset=True)
-        
-        # Convert enums to values if present
-        if "exercise_type" in update_data and update_data["exercise_type"]:
-            update_data["exercise_type"] = update_data["exercise_type"].value
-        if "difficulty" in update_data and update_data["difficulty"]:
-            update_data["difficulty"] = update_data["difficulty"].value
-        if "muscle_groups" in update_data and update_data["muscle_groups"]:
-            update_data["muscle_groups"] = [mg.value for mg in update_data["muscle_groups"]]
-        
-        # Update in Supabase
-        result = supabase.table("exercises").update(update_data).eq("id", exercise_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update exercise")
-        
-        row = result.data[0]
-        return Exercise(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            exercise_type=ExerciseType(row["exercise_type"]),
-            difficulty=DifficultyLevel(row["difficulty"]),
-            muscle_groups=[MuscleGroup(mg) for mg in row["muscle_groups"]],
-            duration_minutes=row.get("duration_minutes"),
-            calories_burned_per_minute=row.get("calories_burned_per_minute"),
-            equipment_needed=row.get("equipment_needed", []),
-            instructions=row.get("instructions", [])
-        )
+        # One returning write; no matching row means the exercise does not exist
+        minimal = wants_minimal(prefer)
+        row = await repository.update("exercises", exercise_id, update_data, returning=not minimal)
+        if not row:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+        if minimal:
+            return minimal_response()
+        return exercise_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating exercise: {str(e)}")
 
 @router.delete("/exercises/{exercise_id}")
-def delete_exercise(exercise_id: int):
+async def delete_exercise(exercise_id: int, prefer: Optional[str] = Header(None)):
     """Delete an exercise"""
     try:
-        # Get exercise before deleting
-        result = supabase.table("exercises").select("*").eq("id", exercise_id).execute()
-        if not result.data:
+        # DELETE ... RETURNING hands back the removed row in the same round trip
+        minimal = wants_minimal(prefer)
+        deleted_data = await repository.delete("exercises", exercise_id, returning=not minimal)
+        if not deleted_data:
             raise HTTPException(status_code=404, detail="Exercise not found")
-        
-        deleted_data = result.data[0]
-        
-        # Delete from Supabase
-        supabase.table("exercises").delete().eq("id", exercise_id).execute()
+        if minimal:
+            return minimal_response()
         
         return {"message": f"Exercise {exercise_id} deleted successfully", "deleted_exercise": deleted_data}
     except HTTPException:
@@ -181,145 +275,120 @@ def delete_exercise(exercise_id: int):
 
 # ========== WORKOUT ROUTINE CRUD OPERATIONS ==========
 
+async def expand_routines(routines: List[WorkoutRoutine]) -> List[ExpandedWorkoutRoutine]:
+    """Inline the referenced exercises, fetched with one "in" lookup shared by all routines.
+
+    An exercise that no longer exists is returned with exercise set to null.
+    """
+    exercise_ids = {ex.exercise_id for routine in routines for ex in routine.exercises}
+    exercises = {row["id"]: exercise_codec.decode(row) for row in await repository.get_many("exercises", exercise_ids)}
+    return [
+        ExpandedWorkoutRoutine(
+            **routine.model_dump(exclude={"exercises"}),
+            exercises=[
+                ExpandedExerciseInRoutine(**ex.model_dump(), exercise=exercises.get(ex.exercise_id))
+                for ex in routine.exercises
+            ]
+        )
+        for routine in routines
+    ]
+
 @router.post("/routines", response_model=WorkoutRoutine)
-def create_routine(routine: WorkoutRoutine):
+async def create_routine(routine: WorkoutRoutine):
     """Create a new workout routine"""
-    routine_data = {
-        "name": routine.name,
-        "description": routine.description,
-        "difficulty": routine.difficulty.value,
-        "target_muscle_groups": [mg.value for mg in routine.target_muscle_groups],
-        "estimated_duration_minutes": routine.estimated_duration_minutes,
-        "exercises": [ex.model_dump() for ex in routine.exercises],
-        "created_at": datetime.now().isoformat(),
-        "created_by": routine.created_by or "admin"
-    }
+    routine_data = routine_codec.encode(
+        routine, created_at=datetime.now().isoformat(), created_by=routine.created_by or "admin"
+    )
     
     try:
-        result = supabase.table("routines").insert(routine_data).execute()
-        if result.data:
-            created = result.data[0]
-            routine.id = created["id"]
-            routine.created_at = datetime.fromisoformat(created["created_at"].replace("Z", "+00:00"))
-            return routine
+        created = await repository.insert("routines", routine_data)
+        if created:
+            return routine_codec.decode(created)
         raise HTTPException(status_code=500, detail="Failed to create routine")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating routine: {str(e)}")
 
-@router.get("/routines", response_model=List[WorkoutRoutine])
-def get_routines(
+@router.get("/routines", response_model=List[Union[ExpandedWorkoutRoutine, WorkoutRoutine]])
+async def get_routines(
+    response: Response,
     difficulty: Optional[DifficultyLevel] = None,
-    muscle_group: Optional[MuscleGroup] = None
+    muscle_group: Optional[List[MuscleGroup]] = Query(None),
+    muscle_group_match: MatchMode = MatchMode.ANY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    expand: Optional[RoutineExpansion] = None
 ):
-    """Get all routines with optional filtering"""
+    """Get all routines with optional filtering, one keyset page at a time.
+
+    expand=exercises inlines the full exercises of every routine on the page.
+    """
+    after_id = decode_cursor(cursor)
     try:
-        query = supabase.table("routines").select("*")
+        filters = {}
         
         if difficulty:
-            query = query.eq("difficulty", difficulty.value)
-        
-        result = query.execute()
-        
-        routines = []
-        for row in result.data:
-            # Filter by muscle_group in Python if specified
-            if muscle_group:
-                target_muscle_groups = row.get("target_muscle_groups", [])
-                if muscle_group.value not in target_muscle_groups:
-                    continue
-            
-            routine = WorkoutRoutine(
-                id=row["id"],
-                name=row["name"],
-                description=row["description"],
-                difficulty=DifficultyLevel(row["difficulty"]),
-                target_muscle_groups=[MuscleGroup(mg) for mg in row["target_muscle_groups"]],
-                estimated_duration_minutes=row["estimated_duration_minutes"],
-                exercises=[ExerciseInRoutine(**ex) for ex in row.get("exercises", [])],
-                created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None,
-                created_by=row.get("created_by", "admin")
-            )
-            routines.append(routine)
+            filters["difficulty"] = difficulty.value
+        
+        # Filter by target muscle groups in the database (JSONB containment)
+        muscle_filter = muscle_group_filter("target_muscle_groups", muscle_group, muscle_group_match)
         
-        return routines
+        rows = await repository.list("routines", filters, **muscle_filter, limit=limit + 1, after_id=after_id)
+        rows = paginate(rows, limit, response)
+        
+        if expand == RoutineExpansion.EXERCISES:
+            return await expand_routines(routine_codec.decode_many(rows))
+        # Rows are validated once and serialized straight to the response body
+        return rows_response(routine_codec, rows, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching routines: {str(e)}")
 
-@router.get("/routines/{routine_id}", response_model=WorkoutRoutine)
-def get_routine(routine_id: int):
-    """Get a specific routine by ID"""
+@router.get("/routines/{routine_id}", response_model=Union[ExpandedWorkoutRoutine, WorkoutRoutine])
+async def get_routine(routine_id: int, expand: Optional[RoutineExpansion] = None):
+    """Get a specific routine by ID, with its exercises inlined when expand=exercises"""
     try:
-        result = supabase.table("routines").select("*").eq("id", routine_id).execute()
+        row = await repository.get("routines", routine_id)
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Routine not found")
-        
-        row = result.data[0]
-        return WorkoutRoutine(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            difficulty=DifficultyLevel(row["difficulty"]),
-            target_muscle_groups=[MuscleGroup(mg) for mg in row["target_muscle_groups"]],
-            estimated_duration_minutes=row["estimated_duration_minutes"],
-            exercises=[ExerciseInRoutine(**ex) for ex in row.get("exercises", [])],
-            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None,
-            created_by=row.get("created_by", "admin")
-        )
+        routine = routine_codec.decode(row)
+        if expand == RoutineExpansion.EXERCISES:
+            return (await expand_routines([routine]))[0]
+        return routine
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching routine: {str(e)}")
 
 @router.put("/routines/{routine_id}", response_model=WorkoutRoutine)
-def update_routine(routine_id: int, routine_update: WorkoutRoutineUpdate):
+async def update_routine(routine_id: int, routine_update: WorkoutRoutineUpdate, prefer: Optional[str] = Header(None)):
     """Update a routine"""
     try:
-        result = supabase.table("routines").select("*").eq("id", routine_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Routine not found")
+        update_data = encode(routine_update, exclude_unset=True)
         
-        update_data = routine_update.model_dump(exclude_unset=True)
-        
-        if "difficulty" in update_data and update_data["difficulty"]:
-            update_data["difficulty"] = update_data["difficulty"].value
-        if "target_muscle_groups" in update_data and update_data["target_muscle_groups"]:
-            update_data["target_muscle_groups"] = [mg.value for mg in update_data["target_muscle_groups"]]
-        if "exercises" in update_data and update_data["exercises"]:
-            update_data["exercises"] = [ex.model_dump() if hasattr(ex, "model_dump") else ex for ex in update_data["exercises"]]
-        
-        result = supabase.table("routines").update(update_data).eq("id", routine_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update routine")
-        
-        row = result.data[0]
-        return WorkoutRoutine(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            difficulty=DifficultyLevel(row["difficulty"]),
-            target_muscle_groups=[MuscleGroup(mg) for mg in row["target_muscle_groups"]],
-            estimated_duration_minutes=row["estimated_duration_minutes"],
-            exercises=[ExerciseInRoutine(**ex) for ex in row.get("exercises", [])],
-            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None,
-            created_by=row.get("created_by", "admin")
-        )
+        # One returning write; no matching row means the routine does not exist
+        minimal = wants_minimal(prefer)
+        row = await repository.update("routines", routine_id, update_data, returning=not minimal)
+        if not row:
+            raise HTTPException(status_code=404, detail="Routine not found")
+        if minimal:
+            return minimal_response()
+        return routine_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating routine: {str(e)}")
 
 @router.delete("/routines/{routine_id}")
-def delete_routine(routine_id: int):
+async def delete_routine(routine_id: int, prefer: Optional[str] = Header(None)):
     """Delete a routine"""
     try:
-        result = supabase.table("routines").select("*").eq("id", routine_id).execute()
-        if not result.data:
+        # DELETE ... RETURNING hands back the removed row in the same round trip
+        minimal = wants_minimal(prefer)
+        deleted_data = await repository.delete("routines", routine_id, returning=not minimal)
+        if not deleted_data:
             raise HTTPException(status_code=404, detail="Routine not found")
-        
-        deleted_data = result.data[0]
-        supabase.table("routines").delete().eq("id", routine_id).execute()
+        if minimal:
+            return minimal_response()
         
         return {"message": f"Routine {routine_id} deleted successfully", "deleted_routine": deleted_data}
     except HTTPException:
@@ -329,128 +398,160 @@ def delete_routine(routine_id: int):
 
 # ========== USER CRUD OPERATIONS ==========
 
+def user_row(user: User) -> Dict:
+    """Prepare a user for insertion into the database"""
+    return user_codec.encode(user, created_at=datetime.now().isoformat())
+
 @router.post("/users", response_model=User)
-def create_user(user: User):
+async def create_user(user: User):
     """Create a new user"""
-    user_data = {
-        "username": user.username,
-        "email": user.email,
-        "age": user.age,
-        "weight_kg": user.weight_kg,
-        "height_cm": user.height_cm,
-        "fitness_level": user.fitness_level.value,
-        "goals": user.goals,
-        "created_at": datetime.now().isoformat()
-    }
+    user_data = user_row(user)
     
     try:
-        result = supabase.table("users").insert(user_data).execute()
-        if result.data:
-            created = result.data[0]
-            user.id = created["id"]
-            user.fitness_level = DifficultyLevel(created["fitness_level"])
-            user.created_at = datetime.fromisoformat(created["created_at"].replace("Z", "+00:00"))
-            return user
+        created = await repository.insert("users", user_data)
+        if created:
+            return user_codec.decode(created)
         raise HTTPException(status_code=500, detail="Failed to create user")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
+@router.post("/users/bulk", response_model=BulkInsertResult)
+async def create_users_bulk(users: List[User]):
+    """Create many users with chunked multi-row inserts"""
+    check_bulk_size(users)
+    pending = [(index, user_row(user)) for index, user in enumerate(users)]
+    results = await insert_in_chunks("users", pending, "user")
+    return bulk_result(results)
+
 @router.get("/users", response_model=List[User])
-def get_users():
-    """Get all users"""
-    try:
-        result = supabase.table("users").select("*").execute()
-        
-        users = []
-        for row in result.data:
-            user = User(
-                id=row["id"],
-                username=row["username"],
-                email=row["email"],
-                age=row.get("age"),
-                weight_kg=row.get("weight_kg"),
-                height_cm=row.get("height_cm"),
-                fitness_level=DifficultyLevel(row["fitness_level"]),
-                goals=row.get("goals", []),
-                created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None
-            )
-            users.append(user)
+async def get_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get all users, one keyset page at a time"""
+    after_id = decode_cursor(cursor)
+    try:
+        rows = await repository.list("users", limit=limit + 1, after_id=after_id)
+        rows = paginate(rows, limit, response)
         
-        return users
+        # Rows are validated once and serialized straight to the response body
+        return rows_response(user_codec, rows, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
 @router.get("/users/{user_id}", response_model=User)
-def get_user(user_id: int):
+async def get_user(user_id: int):
     """Get a specific user by ID"""
     try:
-        result = supabase.table("users").select("*").eq("id", user_id).execute()
+        row = await repository.get("users", user_id)
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        row = result.data[0]
-        return User(
-            id=row["id"],
-            username=row["username"],
-            email=row["email"],
-            age=row.get("age"),
-            weight_kg=row.get("weight_kg"),
-            height_cm=row.get("height_cm"),
-            fitness_level=DifficultyLevel(row["fitness_level"]),
-            goals=row.get("goals", []),
-            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None
-        )
+        return user_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user: {str(e)}")
 
+# Training history that counts towards a user's recent muscle load
+RECENT_TRAINING_DAYS = 28
+
+# Routine feature matrix, rebuilt after any routine write or catalog cache TTL
+routine_catalogs = DerivedCache(ttl=repository.ttl)
+
+async def load_routine_catalog():
+    """Get the current routine feature matrix, rebuilding it if routines changed"""
+    from app.analytics.recommendations import RoutineCatalog
+
+    generation = repository.generation("routines")
+    catalog = routine_catalogs.get(generation)
+    if catalog is None:
+        catalog = RoutineCatalog(await list_all("routines"))
+        routine_catalogs.set(catalog, generation)
+    return catalog
+
+@router.get("/users/{user_id}/recommended-routines", response_model=List[RoutineRecommendation])
+async def get_recommended_routines(user_id: int, k: int = Query(5, ge=1, le=50)):
+    """Recommend routines for a user's level, goals and recent training.
+
+    Every routine is scored in one vectorized pass on difficulty fit, how much
+    of it targets muscle groups the user has trained least in the last four
+    weeks, and how close its duration is to the user's usual session.
+    """
+    # NumPy is imported on first use, keeping it off the cold start path
+    from app.analytics.recommendations import DEFAULT_SESSION_MINUTES, exercise_muscle_load, goal_vector
+
+    try:
+        since = (datetime.now() - timedelta(days=RECENT_TRAINING_DAYS)).isoformat()
+        user, catalog, sessions, progress = await asyncio.gather(
+            repository.get("users", user_id),
+            load_routine_catalog(),
+            list_all(
+                "sessions", {"user_id": user_id}, gte={"started_at": since},
+                columns="id,routine_id,completed,total_duration_minutes"
+            ),
+            list_all("progress", {"user_id": user_id}, gte={"date": since}, columns="id,exercise_id"),
+        )
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Recent load per muscle group: one count per session and per progress record
+        exercises = {
+            row["id"]: row["muscle_groups"]
+            for row in await repository.get_many("exercises", {record["exercise_id"] for record in progress})
+        }
+        trained = catalog.muscle_load(session["routine_id"] for session in sessions)
+        trained = trained + exercise_muscle_load((record["exercise_id"] for record in progress), exercises)
+
+        durations = [
+            session["total_duration_minutes"] for session in sessions
+            if session["completed"] and session["total_duration_minutes"]
+        ]
+        session_minutes = float(median(durations)) if durations else DEFAULT_SESSION_MINUTES
+
+        recommendations = catalog.recommend(
+            k, user["fitness_level"], trained, goal_vector(user.get("goals") or []), session_minutes
+        )
+        return [
+            RoutineRecommendation(**{**recommendation, "routine": routine_codec.decode(recommendation["routine"])})
+            for recommendation in recommendations
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recommending routines: {str(e)}")
+
 @router.put("/users/{user_id}", response_model=User)
-def update_user(user_id: int, user_update: UserUpdate):
+async def update_user(user_id: int, user_update: UserUpdate, prefer: Optional[str] = Header(None)):
     """Update a user"""
     try:
-        result = supabase.table("users").select("*").eq("id", user_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        update_data = user_update.model_dump(exclude_unset=True)
+        update_data = encode(user_update, exclude_unset=True)
         
-        if "fitness_level" in update_data and update_data["fitness_level"]:
-            update_data["fitness_level"] = update_data["fitness_level"].value
-        
-        result = supabase.table("users").update(update_data).eq("id", user_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update user")
-        
-        row = result.data[0]
-        return User(
-            id=row["id"],
-            username=row["username"],
-            email=row["email"],
-            age=row.get("age"),
-            weight_kg=row.get("weight_kg"),
-            height_cm=row.get("height_cm"),
-            fitness_level=DifficultyLevel(row["fitness_level"]),
-            goals=row.get("goals", []),
-            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if row.get("created_at") else None
-        )
+        # One returning write; no matching row means the user does not exist
+        minimal = wants_minimal(prefer)
+        row = await repository.update("users", user_id, update_data, returning=not minimal)
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+        if minimal:
+            return minimal_response()
+        return user_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating user: {str(e)}")
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: int):
+async def delete_user(user_id: int, prefer: Optional[str] = Header(None)):
     """Delete a user"""
     try:
-        result = supabase.table("users").select("*").eq("id", user_id).execute()
-        if not result.data:
+        # DELETE ... RETURNING hands back the removed row in the same round trip
+        minimal = wants_minimal(prefer)
+        deleted_data = await repository.delete("users", user_id, returning=not minimal)
+        if not deleted_data:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        deleted_data = result.data[0]
-        supabase.table("users").delete().eq("id", user_id).execute()
+        if minimal:
+            return minimal_response()
         
         return {"message": f"User {user_id} deleted successfully", "deleted_user": deleted_data}
     except HTTPException:
@@ -461,149 +562,102 @@ def delete_user(user_id: int):
 # ========== WORKOUT SESSION OPERATIONS ==========
 
 @router.post("/sessions", response_model=WorkoutSession)
-def start_workout_session(session: WorkoutSession):
+async def start_workout_session(session: WorkoutSession):
     """Start a new workout session"""
-    # Validate user and routine exist
-    user_result = supabase.table("users").select("id").eq("id", session.user_id).execute()
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    routine_result = supabase.table("routines").select("id").eq("id", session.routine_id).execute()
-    if not routine_result.data:
-        raise HTTPException(status_code=404, detail="Routine not found")
-    
-    session_data = {
-        "user_id": session.user_id,
-        "routine_id": session.routine_id,
-        "started_at": session.started_at.isoformat() if isinstance(session.started_at, datetime) else session.started_at,
-        "completed": session.completed,
-        "completed_at": session.completed_at.isoformat() if session.completed_at and isinstance(session.completed_at, datetime) else session.completed_at,
-        "total_duration_minutes": session.total_duration_minutes,
-        "calories_burned": session.calories_burned,
-        "notes": session.notes
-    }
+    session_data = session_codec.encode(session)
     
     try:
-        result = supabase.table("sessions").insert(session_data).execute()
-        if result.data:
-            created = result.data[0]
-            session.id = created["id"]
-            session.started_at = datetime.fromisoformat(created["started_at"].replace("Z", "+00:00"))
-            if created.get("completed_at"):
-                session.completed_at = datetime.fromisoformat(created["completed_at"].replace("Z", "+00:00"))
-            return session
+        created = await repository.insert("sessions", session_data)
+        if created:
+            return session_codec.decode(created)
         raise HTTPException(status_code=500, detail="Failed to create session")
     except HTTPException:
         raise
+    except ForeignKeyViolation as e:
+        # The user and routine are validated by the REFERENCES constraints
+        raise await missing_reference(
+            [("users", session.user_id, "User"), ("routines", session.routine_id, "Routine")], e
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating session: {str(e)}")
 
 @router.get("/sessions", response_model=List[WorkoutSession])
-def get_sessions(user_id: Optional[int] = None):
-    """Get all workout sessions, optionally filtered by user"""
+async def get_sessions(
+    response: Response,
+    user_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get all workout sessions, optionally filtered by user, one keyset page at a time"""
+    after_id = decode_cursor(cursor)
     try:
-        query = supabase.table("sessions").select("*")
+        filters = {}
         
         if user_id:
-            query = query.eq("user_id", user_id)
-        
-        result = query.execute()
-        
-        sessions = []
-        for row in result.data:
-            session = WorkoutSession(
-                id=row["id"],
-                user_id=row["user_id"],
-                routine_id=row["routine_id"],
-                started_at=datetime.fromisoformat(row["started_at"].replace("Z", "+00:00")),
-                completed_at=datetime.fromisoformat(row["completed_at"].replace("Z", "+00:00")) if row.get("completed_at") else None,
-                total_duration_minutes=row.get("total_duration_minutes"),
-                calories_burned=row.get("calories_burned"),
-                notes=row.get("notes"),
-                completed=row.get("completed", False)
-            )
-            sessions.append(session)
+            filters["user_id"] = user_id
         
-        return sessions
+        rows = await repository.list("sessions", filters, limit=limit + 1, after_id=after_id)
+        rows = paginate(rows, limit, response)
+        
+        # Rows are validated once and serialized straight to the response body
+        return rows_response(session_codec, rows, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
 
 @router.get("/sessions/{session_id}", response_model=WorkoutSession)
-def get_session(session_id: int):
+async def get_session(session_id: int):
     """Get a specific session by ID"""
     try:
-        result = supabase.table("sessions").select("*").eq("id", session_id).execute()
+        row = await repository.get("sessions", session_id)
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Session not found")
-        
-        row = result.data[0]
-        return WorkoutSession(
-            id=row["id"],
-            user_id=row["user_id"],
-            routine_id=row["routine_id"],
-            started_at=datetime.fromisoformat(row["started_at"].replace("Z", "+00:00")),
-            completed_at=datetime.fromisoformat(row["completed_at"].replace("Z", "+00:00")) if row.get("completed_at") else None,
-            total_duration_minutes=row.get("total_duration_minutes"),
-            calories_burned=row.get("calories_burned"),
-            notes=row.get("notes"),
-            completed=row.get("completed", False)
-        )
+        return session_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching session: {str(e)}")
 
 @router.patch("/sessions/{session_id}", response_model=WorkoutSession)
-def complete_workout_session(session_id: int, session_update: WorkoutSessionUpdate):
+async def complete_workout_session(
+    session_id: int, session_update: WorkoutSessionUpdate, prefer: Optional[str] = Header(None)
+):
     """Complete or update a workout session"""
     try:
-        result = supabase.table("sessions").select("*").eq("id", session_id).execute()
-        if not result.data:
+        update_data = encode(session_update, exclude_unset=True)
+        
+        minimal = wants_minimal(prefer)
+        row = None
+        # If completing the session, set completed_at only while it is still open;
+        # the condition is part of the write, so no prior read is needed
+        if session_update.completed:
+            row = await repository.update(
+                "sessions", session_id, {**update_data, "completed_at": datetime.now().isoformat()},
+                filters={"completed": False}, returning=not minimal
+            )
+        if not row:
+            row = await repository.update("sessions", session_id, update_data, returning=not minimal)
+        if not row:
             raise HTTPException(status_code=404, detail="Session not found")
-        
-        existing = result.data[0]
-        update_data = session_update.model_dump(exclude_unset=True)
-        
-        # If completing the session, set completed_at
-        if session_update.completed and not existing.get("completed"):
-            update_data["completed_at"] = datetime.now().isoformat()
-        
-        if "completed_at" in update_data and isinstance(update_data["completed_at"], datetime):
-            update_data["completed_at"] = update_data["completed_at"].isoformat()
-        
-        result = supabase.table("sessions").update(update_data).eq("id", session_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update session")
-        
-        row = result.data[0]
-        return WorkoutSession(
-            id=row["id"],
-            user_id=row["user_id"],
-            routine_id=row["routine_id"],
-            started_at=datetime.fromisoformat(row["started_at"].replace("Z", "+00:00")),
-            completed_at=datetime.fromisoformat(row["completed_at"].replace("Z", "+00:00")) if row.get("completed_at") else None,
-            total_duration_minutes=row.get("total_duration_minutes"),
-            calories_burned=row.get("calories_burned"),
-            notes=row.get("notes"),
-            completed=row.get("completed", False)
-        )
+        if minimal:
+            return minimal_response()
+        return session_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating session: {str(e)}")
 
 @router.delete("/sessions/{session_id}")
-def delete_session(session_id: int):
+async def delete_session(session_id: int, prefer: Optional[str] = Header(None)):
     """Delete a workout session"""
     try:
-        result = supabase.table("sessions").select("*").eq("id", session_id).execute()
-        if not result.data:
+        # DELETE ... RETURNING hands back the removed row in the same round trip
+        minimal = wants_minimal(prefer)
+        deleted_data = await repository.delete("sessions", session_id, returning=not minimal)
+        if not deleted_data:
             raise HTTPException(status_code=404, detail="Session not found")
-        
-        deleted_data = result.data[0]
-        supabase.table("sessions").delete().eq("id", session_id).execute()
+        if minimal:
+            return minimal_response()
         
         return {"message": f"Session {session_id} deleted successfully", "deleted_session": deleted_data}
     except HTTPException:
@@ -613,143 +667,151 @@ def delete_session(session_id: int):
 
 # ========== USER PROGRESS OPERATIONS ==========
 
+def progress_row(progress: UserProgress) -> Dict:
+    """Prepare a progress record for insertion into the database"""
+    row = progress_codec.encode(progress, date=(progress.date or datetime.now()).isoformat())
+    # personal_record is decided by the database when the record is written
+    del row["personal_record"]
+    return row
+
 @router.post("/progress", response_model=UserProgress)
-def record_progress(progress: UserProgress):
+async def record_progress(progress: UserProgress):
     """Record user progress for an exercise"""
-    # Validate user and exercise exist
-    user_result = supabase.table("users").select("id").eq("id", progress.user_id).execute()
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    exercise_result = supabase.table("exercises").select("id").eq("id", progress.exercise_id).execute()
-    if not exercise_result.data:
-        raise HTTPException(status_code=404, detail="Exercise not found")
-    
-    progress_data = {
-        "user_id": progress.user_id,
-        "exercise_id": progress.exercise_id,
-        "date": (progress.date or datetime.now()).isoformat() if isinstance(progress.date or datetime.now(), datetime) else (progress.date or datetime.now()),
-        "weight_kg": progress.weight_kg,
-        "reps": progress.reps,
-        "sets": progress.sets,
-        "duration_minutes": progress.duration_minutes,
-        "personal_record": progress.personal_record
-    }
+    progress_data = progress_row(progress)
     
     try:
-        result = supabase.table("progress").insert(progress_data).execute()
-        if result.data:
-            created = result.data[0]
-            progress.id = created["id"]
-            if created.get("date"):
-                progress.date = datetime.fromisoformat(created["date"].replace("Z", "+00:00"))
-            return progress
+        created = await repository.insert("progress", progress_data)
+        if created:
+            return progress_codec.decode(created)
         raise HTTPException(status_code=500, detail="Failed to create progress record")
     except HTTPException:
         raise
+    except ForeignKeyViolation as e:
+        # The user and exercise are validated by the REFERENCES constraints
+        raise await missing_reference(
+            [("users", progress.user_id, "User"), ("exercises", progress.exercise_id, "Exercise")], e
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating progress record: {str(e)}")
 
+@router.post("/progress/bulk", response_model=BulkInsertResult)
+async def record_progress_bulk(records: List[UserProgress]):
+    """Record many progress entries, validating all foreign keys in one lookup per table"""
+    check_bulk_size(records)
+    try:
+        user_ids, exercise_ids = await asyncio.gather(
+            repository.existing_ids("users", {record.user_id for record in records}),
+            repository.existing_ids("exercises", {record.exercise_id for record in records}),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error validating progress records: {str(e)}")
+    
+    results = []
+    pending = []
+    for index, record in enumerate(records):
+        if record.user_id not in user_ids:
+            results.append(BulkItemResult(index=index, status_code=404, detail="User not found"))
+        elif record.exercise_id not in exercise_ids:
+            results.append(BulkItemResult(index=index, status_code=404, detail="Exercise not found"))
+        else:
+            pending.append((index, progress_row(record)))
+    
+    results.extend(await insert_in_chunks("progress", pending, "progress record"))
+    return bulk_result(results)
+
 @router.get("/progress", response_model=List[UserProgress])
-def get_progress(user_id: Optional[int] = None, exercise_id: Optional[int] = None):
-    """Get progress records, optionally filtered by user or exercise"""
+async def get_progress(
+    response: Response,
+    user_id: Optional[int] = None,
+    exercise_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get progress records, optionally filtered by user or exercise, one keyset page at a time"""
+    after_id = decode_cursor(cursor)
     try:
-        query = supabase.table("progress").select("*")
+        filters = {}
         
         if user_id:
-            query = query.eq("user_id", user_id)
+            filters["user_id"] = user_id
         if exercise_id:
-            query = query.eq("exercise_id", exercise_id)
-        
-        result = query.execute()
-        
-        progress_records = []
-        for row in result.data:
-            progress = UserProgress(
-                id=row["id"],
-                user_id=row["user_id"],
-                exercise_id=row["exercise_id"],
-                date=datetime.fromisoformat(row["date"].replace("Z", "+00:00")) if row.get("date") else None,
-                weight_kg=row.get("weight_kg"),
-                reps=row.get("reps"),
-                sets=row.get("sets"),
-                duration_minutes=row.get("duration_minutes"),
-                personal_record=row.get("personal_record", False)
-            )
-            progress_records.append(progress)
+            filters["exercise_id"] = exercise_id
         
-        return progress_records
+        rows = await repository.list("progress", filters, limit=limit + 1, after_id=after_id)
+        rows = paginate(rows, limit, response)
+        
+        # Rows are validated once and serialized straight to the response body
+        return rows_response(progress_codec, rows, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching progress: {str(e)}")
 
+@router.get("/progress/series", response_model=List[ProgressSeriesPoint])
+async def get_progress_series(
+    user_id: int,
+    exercise_id: int,
+    bucket: SeriesBucket = SeriesBucket.WEEK,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to")
+):
+    """Get a user's progress on an exercise aggregated per day, week or month.
+
+    Each bucket has the max weight, total volume and best estimated one-rep max.
+    """
+    # NumPy is imported on first use, keeping it off the cold start path
+    from app.analytics.series import SERIES_COLUMNS, progress_series
+
+    try:
+        filters = {"user_id": user_id, "exercise_id": exercise_id}
+        bounds = date_range("date", date_from, date_to)
+        rows = await list_all("progress", filters, columns=SERIES_COLUMNS, **bounds)
+        return progress_series(rows, bucket.value)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing progress series: {str(e)}")
+
 @router.get("/progress/{progress_id}", response_model=UserProgress)
-def get_progress_record(progress_id: int):
+async def get_progress_record(progress_id: int):
     """Get a specific progress record by ID"""
     try:
-        result = supabase.table("progress").select("*").eq("id", progress_id).execute()
+        row = await repository.get("progress", progress_id)
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Progress record not found")
-        
-        row = result.data[0]
-        return UserProgress(
-            id=row["id"],
-            user_id=row["user_id"],
-            exercise_id=row["exercise_id"],
-            date=datetime.fromisoformat(row["date"].replace("Z", "+00:00")) if row.get("date") else None,
-            weight_kg=row.get("weight_kg"),
-            reps=row.get("reps"),
-            sets=row.get("sets"),
-            duration_minutes=row.get("duration_minutes"),
-            personal_record=row.get("personal_record", False)
-        )
+        return progress_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching progress record: {str(e)}")
 
 @router.put("/progress/{progress_id}", response_model=UserProgress)
-def update_progress(progress_id: int, progress_update: UserProgressUpdate):
+async def update_progress(progress_id: int, progress_update: UserProgressUpdate, prefer: Optional[str] = Header(None)):
     """Update a progress record"""
     try:
-        result = supabase.table("progress").select("*").eq("id", progress_id).execute()
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Progress record not found")
-        
-        update_data = progress_update.model_dump(exclude_unset=True)
+        update_data = encode(progress_update, exclude_unset=True)
         
-        result = supabase.table("progress").update(update_data).eq("id", progress_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update progress record")
-        
-        row = result.data[0]
-        return UserProgress(
-            id=row["id"],
-            user_id=row["user_id"],
-            exercise_id=row["exercise_id"],
-            date=datetime.fromisoformat(row["date"].replace("Z", "+00:00")) if row.get("date") else None,
-            weight_kg=row.get("weight_kg"),
-            reps=row.get("reps"),
-            sets=row.get("sets"),
-            duration_minutes=row.get("duration_minutes"),
-            personal_record=row.get("personal_record", False)
-        )
+        # One returning write; no matching row means the progress record does not exist
+        minimal = wants_minimal(prefer)
+        row = await repository.update("progress", progress_id, update_data, returning=not minimal)
+        if not row:
+            raise HTTPException(status_code=404, detail="Progress record not found")
+        if minimal:
+            return minimal_response()
+        return progress_codec.decode(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating progress record: {str(e)}")
 
 @router.delete("/progress/{progress_id}")
-def delete_progress(progress_id: int):
+async def delete_progress(progress_id: int, prefer: Optional[str] = Header(None)):
     """Delete a progress record"""
     try:
-        result = supabase.table("progress").select("*").eq("id", progress_id).execute()
-        if not result.data:
+        # DELETE ... RETURNING hands back the removed row in the same round trip
+        minimal = wants_minimal(prefer)
+        deleted_data = await repository.delete("progress", progress_id, returning=not minimal)
+        if not deleted_data:
             raise HTTPException(status_code=404, detail="Progress record not found")
-        
-        deleted_data = result.data[0]
-        supabase.table("progress").delete().eq("id", progress_id).execute()
+        if minimal:
+            return minimal_response()
         
         return {"message": f"Progress record {progress_id} deleted successfully", "deleted_progress": deleted_data}
     except HTTPException:
@@ -757,36 +819,92 @@ def delete_progress(progress_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting progress record: {str(e)}")
 
+# ========== EXPORT OPERATIONS ==========
+
+EXPORT_PAGE_SIZE = 1000
+
+async def export_response(
+    table: str, codec: RowCodec, filters: Dict, bounds: Dict, export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    """Stream every matching row, fetched one keyset page at a time.
+
+    Only one page is held in memory, however long the history. The first page
+    is read before the response starts, so a failing query still gets a 500.
+    """
+    rows = await repository.list(table, filters, limit=EXPORT_PAGE_SIZE, **bounds)
+
+    async def body(rows):
+        if export_format == ExportFormat.CSV:
+            yield csv_header(codec)
+        while rows:
+            yield export_page(codec, rows, export_format)
+            if len(rows) < EXPORT_PAGE_SIZE:
+                break
+            rows = await repository.list(table, filters, limit=EXPORT_PAGE_SIZE, after_id=rows[-1]["id"], **bounds)
+
+    return StreamingResponse(
+        body(rows),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'}
+    )
+
+@router.get("/export/sessions")
+async def export_sessions(
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format")
+):
+    """Export workout sessions as NDJSON or CSV, optionally filtered by user and start date"""
+    try:
+        filters = {"user_id": user_id} if user_id else {}
+        bounds = date_range("started_at", since, until)
+        return await export_response("sessions", session_codec, filters, bounds, export_format, "sessions")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting sessions: {str(e)}")
+
+@router.get("/export/progress")
+async def export_progress(
+    user_id: Optional[int] = None,
+    exercise_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format")
+):
+    """Export progress records as NDJSON or CSV, optionally filtered by user, exercise and date"""
+    try:
+        filters = {}
+        
+        if user_id:
+            filters["user_id"] = user_id
+        if exercise_id:
+            filters["exercise_id"] = exercise_id
+        
+        bounds = date_range("date", since, until)
+        return await export_response("progress", progress_codec, filters, bounds, export_format, "progress")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting progress: {str(e)}")
+
 # ========== ANALYTICS AND STATS ==========
 
 @router.get("/stats/user/{user_id}")
-def get_user_stats(user_id: int):
+async def get_user_stats(user_id: int):
     """Get statistics for a specific user"""
     try:
-        # Check if user exists
-        user_result = supabase.table("users").select("id").eq("id", user_id).execute()
-        if not user_result.data:
+        # Rollup maintained by database triggers: one keyed read
+        totals = await repository.user_stats(user_id)
+        if not totals:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Get user's sessions
-        sessions_result = supabase.table("sessions").select("*").eq("user_id", user_id).execute()
-        user_sessions = sessions_result.data
-        completed_sessions = [s for s in user_sessions if s.get("completed", False)]
-        
-        # Get user's progress
-        progress_result = supabase.table("progress").select("*").eq("user_id", user_id).execute()
-        user_progress = progress_result.data
-        personal_records = [p for p in user_progress if p.get("personal_record", False)]
-        
         stats = {
             "user_id": user_id,
-            "total_sessions": len(user_sessions),
-            "completed_sessions": len(completed_sessions),
-            "total_workout_time_minutes": sum(s.get("total_duration_minutes") or 0 for s in completed_sessions),
-            "total_calories_burned": sum(s.get("calories_burned") or 0 for s in completed_sessions),
-            "progress_records": len(user_progress),
-            "personal_records": len(personal_records),
-            "completion_rate": len(completed_sessions) / len(user_sessions) if user_sessions else 0
+            "total_sessions": totals["total_sessions"],
+            "completed_sessions": totals["completed_sessions"],
+            "total_workout_time_minutes": totals["total_workout_time_minutes"],
+            "total_calories_burned": totals["total_calories_burned"],
+            "progress_records": totals["progress_records"],
+            "personal_records": totals["personal_records"],
+            "completion_rate": totals["completed_sessions"] / totals["total_sessions"] if totals["total_sessions"] else 0
         }
         
         return stats
@@ -796,31 +914,24 @@ def get_user_stats(user_id: int):
         raise HTTPException(status_code=500, detail=f"Error fetching user stats: {str(e)}")
 
 @router.get("/stats/exercise/{exercise_id}")
-def get_exercise_stats(exercise_id: int):
+async def get_exercise_stats(exercise_id: int):
     """Get statistics for a specific exercise"""
     try:
-        # Check if exercise exists
-        exercise_result = supabase.table("exercises").select("id, name").eq("id", exercise_id).execute()
-        if not exercise_result.data:
+        # Rollup maintained by database triggers: one keyed read
+        totals = await repository.exercise_stats(exercise_id)
+        if not totals:
             raise HTTPException(status_code=404, detail="Exercise not found")
         
-        exercise_name = exercise_result.data[0]["name"]
-        
-        # Get exercise progress
-        progress_result = supabase.table("progress").select("*").eq("exercise_id", exercise_id).execute()
-        exercise_progress = progress_result.data
-        personal_records = [p for p in exercise_progress if p.get("personal_record", False)]
-        
-        unique_users = len(set(p["user_id"] for p in exercise_progress))
+        total_attempts = totals["total_attempts"]
         
         stats = {
             "exercise_id": exercise_id,
-            "exercise_name": exercise_name,
-            "total_attempts": len(exercise_progress),
-            "unique_users": unique_users,
-            "personal_records": len(personal_records),
-            "average_weight": sum(p.get("weight_kg") or 0 for p in exercise_progress) / len(exercise_progress) if exercise_progress else 0,
-            "average_reps": sum(p.get("reps") or 0 for p in exercise_progress) / len(exercise_progress) if exercise_progress else 0
+            "exercise_name": totals["exercise_name"],
+            "total_attempts": total_attempts,
+            "unique_users": totals["unique_users"],
+            "personal_records": totals["personal_records"],
+            "average_weight": float(totals["total_weight"]) / total_attempts if total_attempts else 0,
+            "average_reps": totals["total_reps"] / total_attempts if total_attempts else 0
         }
         
         return stats
@@ -828,3 +939,35 @@ def get_exercise_stats(exercise_id: int):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching exercise stats: {str(e)}")
+
+@router.get("/leaderboards/exercise/{exercise_id}", response_model=List[LeaderboardEntry])
+async def get_exercise_leaderboard(
+    exercise_id: int,
+    metric: LeaderboardMetric = LeaderboardMetric.WEIGHT,
+    k: int = Query(10, ge=1, le=100),
+    fitness_level: Optional[DifficultyLevel] = None
+):
+    """Get the top k users of an exercise by their best weight, reps or volume"""
+    try:
+        # Top of a (exercise, best, date) index over the per-user bests
+        rows = await repository.leaderboard(
+            exercise_id, metric.value, k, fitness_level.value if fitness_level else None
+        )
+        if not rows and not await repository.exists("exercises", exercise_id):
+            raise HTTPException(status_code=404, detail="Exercise not found")
+        return [LeaderboardEntry(rank=rank, **row) for rank, row in enumerate(rows, start=1)]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching leaderboard: {str(e)}")
+
+@router.get("/stats/cache")
+async def get_cache_stats():
+    """Get hit/miss/eviction counters of the exercise and routine cache"""
+    return repository.stats()
+
+@router.get("/stats/http")
+async def get_http_pool_stats():
+    """Get connection reuse and pool wait counters of this worker's PostgREST connection pool"""
+    from app.db.http_pool import PoolSettings, pool_metrics
+    return {"settings": PoolSettings.from_env().stats(), "connections": pool_metrics.stats()}
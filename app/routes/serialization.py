@@ -0,0 +1,44 @@
+import csv
+import io
+from typing import Any, Dict, List, Optional
+from fastapi import Response
+from app.models.codec import RowCodec
+from app.models.item import ExportFormat
+from app.timing import phase
+
+EXPORT_MEDIA_TYPES = {ExportFormat.NDJSON: "application/x-ndjson", ExportFormat.CSV: "text/csv"}
+
+# Headers of the handler's placeholder response that describe its empty body
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+def rows_response(codec: RowCodec, rows: List[Dict[str, Any]], response: Optional[Response] = None) -> Response:
+    """Validate database rows once and write them straight to a JSON response.
+
+    Rows are validated by the model's compiled validator (enums, datetimes,
+    defaults) and dumped by pydantic-core, the same serializer FastAPI uses
+    for response_model, so the bytes are unchanged. Headers already set on
+    the handler's response (e.g. the next-page cursor) are carried over.
+    """
+    body = codec.dump_json(rows)
+    headers = {}
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _BODY_HEADERS}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def csv_header(codec: RowCodec) -> bytes:
+    """CSV header line with the model's field names"""
+    return (",".join(codec.model.model_fields) + "\r\n").encode()
+
+
+def export_page(codec: RowCodec, rows: List[Dict[str, Any]], export_format: ExportFormat) -> bytes:
+    """Serialize one page of rows as NDJSON lines or CSV records"""
+    models = codec.decode_many(rows)
+    with phase("serialize"):
+        if export_format == ExportFormat.NDJSON:
+            return b"".join(model.model_dump_json().encode() + b"\n" for model in models)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(codec.model.model_fields))
+        writer.writerows(model.model_dump(mode="json") for model in models)
+        return buffer.getvalue().encode()
@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from fastapi import Request, Response
+from app.routes.conditional import etag_matches
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it assets are offered as gzip only
+    brotli = None
+
+# Cache-Control for URLs carrying the asset's content hash (?v=...), which
+# never change, and for plain URLs, which are revalidated with the ETag
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Brotli quality for the compressed variants. Quality 11 is only ~10% smaller
+# on these files but takes ~25x longer, and the first request of every cold
+# start pays for it
+BROTLI_QUALITY = 6
+
+# Content codings in order of preference when the client accepts several
+COMPRESSORS = {"gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS = {"br": lambda body: brotli.compress(body, quality=BROTLI_QUALITY), **COMPRESSORS}
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into coding -> q value"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Pick the preferred available coding the client accepts, or "identity" """
+    accepted = accepted_encodings(accept_encoding)
+    for coding in available:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+class StaticAsset:
+    """A file held in memory with a content-hash version and ETag.
+
+    Each compressed variant is built the first time a client asks for it and
+    kept for the life of the process, so no request compresses twice.
+    Variants that come out larger than the original are never offered.
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()
+        self.version = digest[:12]
+        self.etag = '"' + digest[:32] + '"'
+        self._variants: Dict[str, Optional[bytes]] = {"identity": body}
+
+    def variant(self, coding: str) -> Optional[bytes]:
+        if coding not in self._variants:
+            compressed = COMPRESSORS[coding](self.body)
+            self._variants[coding] = compressed if len(compressed) < len(self.body) else None
+        return self._variants[coding]
+
+    def response(self, request: Request, immutable: bool = False) -> Response:
+        """Serve the best variant for the request, or 304 if the client has it"""
+        coding = negotiate_encoding(request.headers.get("accept-encoding"), COMPRESSORS)
+        body = self.variant(coding) if coding != "identity" else self.body
+        if body is None:
+            coding, body = "identity", self.body
+        # Each coding is a distinct representation, so it gets its own strong ETag
+        etag = self.etag if coding == "identity" else self.etag[:-1] + "-" + coding + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """The web interface's files, read and hashed once at startup.
+
+    index.html is rewritten to request app.js and styles.css by versioned
+    URLs (app.js?v=<hash>), which are served as immutable: a repeat visit
+    revalidates index.html and downloads nothing else.
+    """
+
+    def __init__(self, root: Path, files: Dict[str, str], index: str = "index.html"):
+        self.assets: Dict[str, StaticAsset] = {}
+        for name, media_type in files.items():
+            path = root / name
+            if path.is_file():
+                self.assets[name] = StaticAsset(path.read_bytes(), media_type)
+        index_path = root / index
+        self.index: Optional[StaticAsset] = None
+        if index_path.is_file():
+            html = index_path.read_text(encoding="utf-8")
+            for name, asset in self.assets.items():
+                html = html.replace(f'"{name}"', f'"{name}?v={asset.version}"')
+            self.index = StaticAsset(html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def url(self, name: str) -> str:
+        """Versioned URL of an asset"""
+        return f"/{name}?v={self.assets[name].version}"
+
+    def response(self, name: str, request: Request) -> Optional[Response]:
+        """Serve an asset, immutable when requested by its current version"""
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        return asset.response(request, immutable=request.query_params.get("v") == asset.version)
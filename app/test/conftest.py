@@ -0,0 +1,30 @@
+import asyncio
+import os
+import pytest
+
+# Run the test suite against a fresh in-memory SQLite database instead of Supabase
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion from a synchronous test"""
+    return asyncio.run
+
+
+@pytest.fixture
+def sqlite_repository():
+    """A fresh in-memory SQLite backend, separate from the one the app uses"""
+    # Imported here so app.db is first loaded with the environment above
+    from app.db.sqlite_repository import SQLiteRepository
+    return SQLiteRepository(":memory:")
+
+
+@pytest.fixture
+def add_user(run):
+    """Insert a user into a repository and return its id; email is derived from username"""
+    def add(repository, username, **fields):
+        row = {"username": username, "email": f"{username}@example.com", **fields}
+        return run(repository.insert("users", row))["id"]
+    return add
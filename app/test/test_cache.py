@@ -0,0 +1,104 @@
+import asyncio
+import time
+from app.db.cache import TTLCache, CachedRepository, DerivedCache
+from app.db.sqlite_repository import SQLiteRepository
+
+# ========== TTL CACHE TESTS ==========
+
+def test_cache_hits_and_misses():
+    """Test that lookups are counted as hits or misses"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_cache_evicts_least_recently_used():
+    """Test that a full cache evicts the least recently used entry"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_entries_expire():
+    """Test that entries older than the TTL are dropped"""
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+# ========== CACHED REPOSITORY TESTS ==========
+
+def test_cached_repository_invalidates_on_write(run, sqlite_repository):
+    """Test that writes to a cached table clear its cached reads"""
+    repository = CachedRepository(sqlite_repository, tables=("exercises",))
+    exercise = {
+        "name": "Burpees",
+        "description": "Full body",
+        "exercise_type": "cardio",
+        "difficulty": "intermediate",
+        "muscle_groups": ["full_body"]
+    }
+    run(repository.insert("exercises", exercise))
+    assert len(run(repository.list("exercises"))) == 1
+    assert len(run(repository.list("exercises"))) == 1
+    assert repository.stats()["exercises"]["hits"] == 1
+
+    run(repository.insert("exercises", exercise))
+    assert len(run(repository.list("exercises"))) == 2
+
+    run(repository.update("exercises", 1, {"name": "Jumping Burpees"}))
+    assert run(repository.get("exercises", 1))["name"] == "Jumping Burpees"
+
+    run(repository.delete("exercises", 1))
+    assert run(repository.get("exercises", 1)) is None
+    assert repository.generation("exercises") == 4
+    assert repository.generation("users") == 0
+
+class SlowReadRepository(SQLiteRepository):
+    """Backend whose reads return only after a delay, like a network round trip"""
+
+    async def get(self, table, row_id, columns="*"):
+        row = await super().get(table, row_id, columns)
+        await asyncio.sleep(0.01)
+        return row
+
+def test_read_overlapping_a_write_is_not_cached(run):
+    """Test that a read started before a write cannot cache the old row"""
+    repository = CachedRepository(SlowReadRepository(":memory:"), tables=("exercises",))
+    run(repository.insert("exercises", {
+        "name": "Lunges", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }))
+
+    async def scenario():
+        read = asyncio.create_task(repository.get("exercises", 1))
+        await asyncio.sleep(0)
+        await repository.update("exercises", 1, {"name": "Walking Lunges"})
+        stale = await read
+        return stale, await repository.get("exercises", 1)
+
+    stale, fresh = run(scenario())
+    assert stale["name"] == "Lunges"
+    assert fresh["name"] == "Walking Lunges"
+
+def test_derived_cache_follows_generation():
+    """Test that a derived value is dropped once its table's generation moves on"""
+    cache = DerivedCache(ttl=60)
+    assert cache.get(0) is None
+    cache.set("catalog", 0)
+    assert cache.get(0) == "catalog"
+    assert cache.get(1) is None
+    cache = DerivedCache(ttl=0)
+    cache.set("catalog", 0)
+    assert cache.get(0) is None
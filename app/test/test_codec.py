@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from app.models.codec import encode, exercise_codec, routine_codec, session_codec
+from app.models.item import DifficultyLevel, ExerciseType, MuscleGroup, WorkoutSession, WorkoutSessionUpdate
+
+# ========== ROW DECODING TESTS ==========
+
+def test_decode_converts_enums_and_ignores_extra_columns():
+    """Test that enum values become members and unknown columns are dropped"""
+    exercise = exercise_codec.decode({
+        "id": 1, "name": "Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs", "core"], "created_at": "2024-01-15T10:00:00Z"
+    })
+    assert exercise.exercise_type is ExerciseType.STRENGTH
+    assert exercise.difficulty is DifficultyLevel.BEGINNER
+    assert exercise.muscle_groups == [MuscleGroup.LEGS, MuscleGroup.CORE]
+    assert exercise.equipment_needed == []
+
+def test_decode_parses_timestamps_with_z_suffix():
+    """Test that PostgREST and SQLite timestamp formats decode to the same value"""
+    rows = [
+        {"id": 1, "user_id": 1, "routine_id": 1, "started_at": "2024-01-15T10:00:00Z"},
+        {"id": 2, "user_id": 1, "routine_id": 1, "started_at": "2024-01-15T10:00:00+00:00"},
+    ]
+    first, second = session_codec.decode_many(rows)
+    assert first.started_at == second.started_at == datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+def test_decode_nested_routine_exercises():
+    """Test that JSON exercise entries decode into ExerciseInRoutine models"""
+    routine = routine_codec.decode({
+        "id": 1, "name": "Full Body", "description": "All", "difficulty": "advanced",
+        "target_muscle_groups": ["full_body"], "estimated_duration_minutes": 45,
+        "exercises": [{"exercise_id": 3, "sets": 4}], "created_by": None
+    })
+    assert routine.exercises[0].exercise_id == 3
+    assert routine.exercises[0].rest_seconds == 60
+    assert routine.created_by is None
+
+# ========== ROW ENCODING TESTS ==========
+
+def test_encode_uses_enum_values_and_isoformat():
+    """Test insert payloads: no id, enum values, isoformat timestamps"""
+    started_at = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+    data = session_codec.encode(WorkoutSession(user_id=1, routine_id=2, started_at=started_at), notes="x")
+    assert "id" not in data
+    assert data["started_at"] == "2024-01-15T10:00:00+00:00"
+    assert data["completed_at"] is None
+    assert data["notes"] == "x"
+
+def test_encode_partial_update_keeps_only_set_fields():
+    """Test that update payloads only contain the fields the client sent"""
+    completed_at = datetime(2024, 1, 15, 11, 30)
+    data = encode(WorkoutSessionUpdate(completed=True, completed_at=completed_at), exclude_unset=True)
+    assert data == {"completed": True, "completed_at": "2024-01-15T11:30:00"}
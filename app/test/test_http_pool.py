@@ -0,0 +1,106 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+from app.db.http_pool import PoolMetrics, PoolSettings, pooled_client
+from app.db.supabase_client import create_client
+from app.db.supabase_repository import SupabaseRepository
+
+EXERCISES = [{"id": 1, "name": "Bench press"}, {"id": 2, "name": "Squat"}]
+
+
+async def postgrest_stand_in(scope, receive, send):
+    """Answers every PostgREST read with the exercise rows after a short delay"""
+    if scope["type"] != "http":
+        return
+    await asyncio.sleep(0.02)
+    table = scope["path"].rsplit("/", 1)[-1]
+    body = json.dumps(EXERCISES if table == "exercises" else []).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-range", b"0-1/*")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture(scope="module")
+def stand_in_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(postgrest_stand_in, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.should_exit = True
+    thread.join()
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("SUPABASE_HTTP_MAX_CONNECTIONS", "8")
+    monkeypatch.setenv("SUPABASE_HTTP_KEEPALIVE_SECONDS", "90")
+    monkeypatch.setenv("SUPABASE_HTTP2", "off")
+    monkeypatch.setenv("SUPABASE_HTTP_POOL_TIMEOUT", "0.5")
+    settings = PoolSettings.from_env()
+    # Keep-alive follows the pool size unless set on its own
+    assert (settings.max_connections, settings.max_keepalive) == (8, 8)
+    assert settings.keepalive_expiry == 90
+    assert settings.http2 is False
+    assert settings.timeout().pool == 0.5
+
+    monkeypatch.setenv("SUPABASE_HTTP_MAX_KEEPALIVE", "4")
+    assert PoolSettings.from_env().max_keepalive == 4
+
+
+def test_supabase_queries_reuse_one_connection(stand_in_url, run):
+    metrics = PoolMetrics()
+
+    async def scenario():
+        client = create_client(stand_in_url, "placeholder-key", PoolSettings(http2=False), metrics)
+        repository = SupabaseRepository(lambda: client)
+        results = [await repository.list("exercises") for _ in range(5)]
+        await client.postgrest.aclose()
+        return results
+
+    results = run(scenario())
+    assert all(rows == EXERCISES for rows in results)
+    stats = metrics.stats()
+    assert stats["requests"] == 5
+    assert (stats["connections_opened"], stats["connections_reused"]) == (1, 4)
+    assert stats["reuse_rate"] == 0.8
+
+
+def test_requests_above_pool_size_wait_for_a_connection(stand_in_url, run):
+    metrics = PoolMetrics()
+
+    async def scenario():
+        async with pooled_client(PoolSettings(max_connections=2, http2=False), metrics) as client:
+            responses = await asyncio.gather(*(client.get(f"{stand_in_url}/rest/v1/exercises") for _ in range(6)))
+        return [response.status_code for response in responses]
+
+    assert run(scenario()) == [200] * 6
+    stats = metrics.stats()
+    # Six queries share two connections, so four queue for one to be released
+    assert (stats["connections_opened"], stats["connections_reused"]) == (2, 4)
+    assert stats["max_pool_wait_ms"] >= 15
+    assert stats["pool_timeouts"] == 0
+
+
+def test_pool_timeout_is_counted(stand_in_url, run):
+    metrics = PoolMetrics()
+    settings = PoolSettings(max_connections=1, pool_timeout=0.005, http2=False)
+
+    async def scenario():
+        async with pooled_client(settings, metrics) as client:
+            return await asyncio.gather(
+                *(client.get(f"{stand_in_url}/rest/v1/exercises") for _ in range(2)), return_exceptions=True
+            )
+
+    results = run(scenario())
+    assert sum(isinstance(result, Exception) for result in results) == 1
+    assert metrics.pool_timeouts == 1
@@ -0,0 +1,80 @@
+import re
+from fastapi.testclient import TestClient
+from app.db.instrumented import InstrumentedRepository
+from app.main import app
+from app.metrics import Counter, Histogram, render
+
+client = TestClient(app)
+
+
+def sample_value(text, sample):
+    """Value of one sample line in a Prometheus exposition, or 0 if absent"""
+    match = re.search("^" + re.escape(sample) + r" (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/a",), value)
+    assert histogram.samples() == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("requests_total", "Requests", ("route",))
+    counter.inc(('say "hi"\\',))
+    assert counter.samples() == ['requests_total{route="say \\"hi\\"\\\\"} 1']
+
+
+def test_instrumented_repository_reports_each_call(run, sqlite_repository, add_user):
+    calls = []
+    repository = InstrumentedRepository(sqlite_repository, lambda *call: calls.append(call))
+    add_user(repository, "ana")
+
+    async def scenario():
+        await repository.exists("users", 1)
+        await repository.user_stats(1)
+        try:
+            await repository.get("no_such_table", 1)
+        except Exception:
+            pass
+
+    run(scenario())
+    assert [(table, operation, failed) for table, operation, _, failed in calls] == [
+        ("users", "insert", False),
+        ("users", "get", False),
+        ("user_rollups", "user_stats", False),
+        ("no_such_table", "get", True),
+    ]
+    assert all(seconds >= 0 for _, _, seconds, _ in calls)
+
+
+def test_metrics_endpoint_reports_route_templates_and_queries():
+    before = client.get("/metrics").text
+    assert client.get("/exercises/999998").status_code == 404
+    assert client.get("/exercises/999999").status_code == 404
+    assert client.get("/exercises").status_code == 200
+    client.get("/no/such/path")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    labels = 'route="/exercises/{exercise_id}",method="GET"'
+    sample = f'http_requests_total{{{labels},status="404"}}'
+    assert sample_value(text, sample) - sample_value(before, sample) == 2
+    count = f"http_request_duration_seconds_count{{{labels}}}"
+    assert sample_value(text, count) - sample_value(before, count) == 2
+    assert sample_value(text, f"http_response_size_bytes_sum{{{labels}}}") > 0
+    assert 'http_requests_total{route="/exercises",method="GET",status="200"}' in text
+    # Unknown paths share one series instead of one per URL
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"}' in text
+    assert "/no/such/path" not in text
+    assert 'db_query_duration_seconds_count{table="exercises",operation="list"}' in text
+    assert render().startswith("# HELP http_requests_total")
@@ -0,0 +1,55 @@
+import numpy as np
+from app.analytics.recommendations import (
+    MUSCLE_GROUPS, RoutineCatalog, exercise_muscle_load, goal_vector, muscle_vector
+)
+
+ROUTINES = [
+    {"id": 1, "difficulty": "beginner", "target_muscle_groups": ["legs"], "estimated_duration_minutes": 30},
+    {"id": 2, "difficulty": "beginner", "target_muscle_groups": ["chest", "arms"], "estimated_duration_minutes": 30},
+    {"id": 3, "difficulty": "advanced", "target_muscle_groups": ["full_body"], "estimated_duration_minutes": 90},
+    {"id": 4, "difficulty": "intermediate", "target_muscle_groups": ["legs", "core"], "estimated_duration_minutes": 45},
+]
+
+# ========== FEATURE TESTS ==========
+
+def test_muscle_and_goal_vectors():
+    """Test muscle group encoding, including full_body and goal keywords"""
+    assert muscle_vector(["full_body"]).tolist() == [1.0] * len(MUSCLE_GROUPS)
+    assert muscle_vector(["legs", "core"]).tolist() == [0, 0, 0, 0, 1, 1]
+    assert goal_vector(["Piernas más fuertes", "glúteos", "lose_weight"]).tolist() == [0, 0, 0, 0, 1, 0]
+    assert goal_vector(["full body strength"]).tolist() == [1.0] * len(MUSCLE_GROUPS)
+
+def test_exercise_muscle_load_counts_records_per_exercise():
+    """Test that each progress record adds its exercise's muscle groups once"""
+    exercises = {7: ["chest", "arms"], 8: ["legs"]}
+    assert exercise_muscle_load([7, 8, 7, 99, 7], exercises).tolist() == [3, 0, 0, 3, 1, 0]
+    assert exercise_muscle_load([], exercises).tolist() == [0.0] * len(MUSCLE_GROUPS)
+
+# ========== SCORING TESTS ==========
+
+def test_scores_difficulty_coverage_and_duration():
+    """Test each score component across the whole catalog"""
+    catalog = RoutineCatalog(ROUTINES)
+    trained = catalog.muscle_load([1, 1, 99])
+    assert trained.tolist() == [0, 0, 0, 0, 2, 0]
+
+    scores = catalog.score("beginner", trained, np.zeros(len(MUSCLE_GROUPS)), 30.0)
+    assert scores[:, 1].tolist() == [1.0, 1.0, 0.0, 0.5]
+    # Legs were just trained, so only the other targets count as needed
+    assert scores[:, 2].tolist() == [0.0, 1.0, 5 / 6, 0.5]
+    assert scores[:, 3].tolist() == [1.0, 1.0, 0.0, 0.5]
+    assert np.allclose(scores[:, 0], scores[:, 1:] @ [0.4, 0.4, 0.2])
+
+    # A goal keeps a trained group wanted
+    scores = catalog.score("beginner", trained, goal_vector(["legs"]), 30.0)
+    assert scores[0, 2] == 1.0
+
+def test_recommend_orders_top_k():
+    """Test that recommendations are the k best, ties broken by id"""
+    catalog = RoutineCatalog(ROUTINES)
+    none = np.zeros(len(MUSCLE_GROUPS))
+    top = catalog.recommend(3, "beginner", none, none, 30.0)
+    assert [item["routine"]["id"] for item in top] == [1, 2, 4]
+    assert top[0]["score"] == 1.0
+    assert len(catalog.recommend(10, "advanced", none, none, 90.0)) == 4
+    assert RoutineCatalog([]).recommend(3, "beginner", none, none, 30.0) == []
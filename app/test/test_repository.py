@@ -0,0 +1,322 @@
+import sqlite3
+import pytest
+from app.db.repository import ForeignKeyViolation, Repository, search_terms
+from app.db.sqlite_repository import SQLiteRepository
+
+repository = SQLiteRepository(":memory:")
+
+# ========== SQLITE REPOSITORY TESTS ==========
+
+def test_insert_round_trips_json_and_bool_columns(run):
+    """Test that JSONB and BOOLEAN columns come back as Python values"""
+    user = run(repository.insert("users", {
+        "username": "repo_user",
+        "email": "repo@example.com",
+        "goals": ["build_muscle"]
+    }))
+    assert user["id"] == 1
+    assert user["goals"] == ["build_muscle"]
+    assert user["fitness_level"] == "beginner"
+    assert user["created_at"]
+
+    exercise = run(repository.insert("exercises", {
+        "name": "Deadlift",
+        "description": "Hip hinge",
+        "exercise_type": "strength",
+        "difficulty": "advanced",
+        "muscle_groups": ["back", "legs"]
+    }))
+    progress = run(repository.insert("progress", {
+        "user_id": user["id"],
+        "exercise_id": exercise["id"],
+        "weight_kg": 100.0
+    }))
+    assert progress["personal_record"] is True
+    assert run(repository.get("exercises", exercise["id"]))["muscle_groups"] == ["back", "legs"]
+
+def test_list_filters_by_equality(run):
+    """Test filtering rows by column values"""
+    rows = run(repository.list("exercises", {"difficulty": "advanced"}))
+    assert [row["name"] for row in rows] == ["Deadlift"]
+    assert run(repository.list("exercises", {"difficulty": "beginner"})) == []
+
+def test_update_and_delete_return_row(run):
+    """Test that update and delete return the affected row or None"""
+    updated = run(repository.update("users", 1, {"weight_kg": 80.5}))
+    assert updated["weight_kg"] == 80.5
+    assert run(repository.update("users", 999, {"weight_kg": 80.5})) is None
+    assert run(repository.delete("users", 999)) is None
+    assert run(repository.delete("users", 1))["username"] == "repo_user"
+    # ON DELETE CASCADE removes the user's progress
+    assert run(repository.list("progress")) == []
+
+def test_foreign_keys_are_enforced(run):
+    """Test that REFERENCES constraints reject unknown ids"""
+    with pytest.raises(ForeignKeyViolation):
+        run(repository.insert("sessions", {"user_id": 999, "routine_id": 999, "started_at": "2024-01-15T10:00:00"}))
+
+def test_unknown_columns_are_rejected(run):
+    """Test that column names are validated before building SQL"""
+    with pytest.raises(ValueError):
+        run(repository.list("users", {"username; DROP TABLE users": "x"}))
+
+def test_insert_many_returns_rows_in_order(run):
+    """Test multi-row inserts and set-based id lookups"""
+    rows = run(repository.insert_many("users", [
+        {"username": f"many_{i}", "email": f"many_{i}@example.com", "goals": [str(i)]}
+        for i in range(5)
+    ]))
+    assert [row["username"] for row in rows] == [f"many_{i}" for i in range(5)]
+    assert rows[2]["goals"] == ["2"]
+    ids = {row["id"] for row in rows}
+    assert run(repository.existing_ids("users", ids | {999})) == ids
+    fetched = run(repository.get_many("users", [*ids, *ids, 999]))
+    assert [row["id"] for row in fetched] == sorted(ids)
+    assert fetched[2]["goals"] == ["2"]
+
+def test_insert_many_is_atomic(run):
+    """Test that one rejected row rejects the whole statement"""
+    before = len(run(repository.list("users")))
+    with pytest.raises(sqlite3.IntegrityError):
+        run(repository.insert_many("users", [
+            {"username": "atomic", "email": "atomic@example.com"},
+            {"username": "atomic", "email": "atomic2@example.com"}
+        ]))
+    assert len(run(repository.list("users"))) == before
+
+# ========== ROLLUP TESTS ==========
+
+def test_rollups_follow_inserts_updates_and_cascades(run, sqlite_repository, add_user):
+    """Test that triggers keep user and exercise rollups current"""
+    rollups = sqlite_repository
+    alice = add_user(rollups, "alice")
+    bob = add_user(rollups, "bob")
+    squat = run(rollups.insert("exercises", {
+        "name": "Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }))["id"]
+    routine = run(rollups.insert("routines", {
+        "name": "Legs", "description": "Legs", "difficulty": "beginner",
+        "target_muscle_groups": ["legs"], "estimated_duration_minutes": 30
+    }))["id"]
+
+    session = run(rollups.insert("sessions", {"user_id": alice, "routine_id": routine, "started_at": "2024-01-15T10:00:00"}))
+    run(rollups.update("sessions", session["id"], {"completed": True, "total_duration_minutes": 30, "calories_burned": 250}))
+    first = run(rollups.insert("progress", {"user_id": alice, "exercise_id": squat, "weight_kg": 60.0, "reps": 5}))
+    run(rollups.insert("progress", {"user_id": alice, "exercise_id": squat, "weight_kg": 50.0, "reps": 5}))
+    run(rollups.insert("progress", {"user_id": bob, "exercise_id": squat, "weight_kg": 40.0, "reps": 10}))
+    run(rollups.update("progress", first["id"], {"weight_kg": 70.0}))
+
+    user = run(rollups.user_stats(alice))
+    assert user["total_sessions"] == 1
+    assert user["completed_sessions"] == 1
+    assert user["total_workout_time_minutes"] == 30
+    assert user["total_calories_burned"] == 250
+    assert user["progress_records"] == 2
+    assert user["personal_records"] == 1
+
+    exercise = run(rollups.exercise_stats(squat))
+    assert exercise["exercise_name"] == "Squat"
+    assert exercise["total_attempts"] == 3
+    assert exercise["unique_users"] == 2
+    assert exercise["total_weight"] == 160.0
+    assert exercise["total_reps"] == 20
+
+    # Deleting bob cascades to his progress and his (user, exercise) pair
+    run(rollups.delete("users", bob))
+    exercise = run(rollups.exercise_stats(squat))
+    assert exercise["total_attempts"] == 2
+    assert exercise["unique_users"] == 1
+    assert run(rollups.user_stats(bob)) is None
+
+    before = (run(rollups.user_stats(alice)), run(rollups.exercise_stats(squat)))
+    rollups.conn.execute("UPDATE user_rollups SET progress_records = 99")
+    run(rollups.rebuild_rollups())
+    assert (run(rollups.user_stats(alice)), run(rollups.exercise_stats(squat))) == before
+
+def test_personal_records_follow_best_per_pair(run, sqlite_repository, add_user):
+    """Test that the database decides personal records and keeps the bests current"""
+    records = sqlite_repository
+    user = add_user(records, "lifter")
+    bench = run(records.insert("exercises", {
+        "name": "Bench", "description": "Chest", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["chest"]
+    }))["id"]
+
+    def best():
+        return dict(records.conn.execute(
+            "SELECT best_weight_kg, best_reps FROM user_exercise_rollups WHERE user_id = ? AND exercise_id = ?",
+            (user, bench),
+        ).fetchone())
+
+    first = run(records.insert("progress", {"user_id": user, "exercise_id": bench, "weight_kg": 60.0, "reps": 5}))
+    lighter = run(records.insert("progress", {"user_id": user, "exercise_id": bench, "weight_kg": 50.0, "reps": 5, "personal_record": True}))
+    assert first["personal_record"] is True
+    assert lighter["personal_record"] is False
+
+    # Later rows of a bulk insert are compared with the earlier ones
+    heavy, heavier = run(records.insert_many("progress", [
+        {"user_id": user, "exercise_id": bench, "weight_kg": 70.0, "reps": 3},
+        {"user_id": user, "exercise_id": bench, "weight_kg": 65.0, "reps": 3},
+    ]))
+    assert heavy["personal_record"] is True
+    assert heavier["personal_record"] is False
+    assert best() == {"best_weight_kg": 70.0, "best_reps": 5}
+
+    # Editing or deleting the record that held the best recomputes it, and
+    # re-flags the records after it
+    assert run(records.update("progress", heavy["id"], {"weight_kg": 55.0}))["personal_record"] is False
+    assert best() == {"best_weight_kg": 65.0, "best_reps": 5}
+    assert run(records.get("progress", heavier["id"]))["personal_record"] is True
+    assert run(records.update("progress", lighter["id"], {"weight_kg": 80.0}))["personal_record"] is True
+    assert run(records.get("progress", heavier["id"]))["personal_record"] is False
+    run(records.delete("progress", lighter["id"]))
+    assert best() == {"best_weight_kg": 65.0, "best_reps": 5}
+    assert [row["id"] for row in run(records.list("progress", {"personal_record": True}))] == [first["id"], heavier["id"]]
+    assert run(records.user_stats(user))["personal_records"] == 2
+
+def test_personal_records_follow_date_order(run, sqlite_repository, add_user):
+    """Test that backdated records are compared with the records dated before them"""
+    records = sqlite_repository
+    user = add_user(records, "importer")
+    squat = run(records.insert("exercises", {
+        "name": "Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }))["id"]
+
+    def flags():
+        rows = run(records.list("progress", {"user_id": user}))
+        return {row["date"][:10]: row["personal_record"] for row in rows}
+
+    def lift(day, weight):
+        return {"user_id": user, "exercise_id": squat, "weight_kg": weight, "reps": 5, "date": f"2024-05-{day:02d}T08:00:00"}
+
+    run(records.insert("progress", lift(10, 80.0)))
+    # A history import inserted later but dated before: the 90 kg lift takes the
+    # record from the later 80 kg one
+    run(records.insert_many("progress", [lift(1, 70.0), lift(5, 90.0)]))
+    assert flags() == {"2024-05-10": False, "2024-05-01": True, "2024-05-05": True}
+    assert run(records.user_stats(user))["personal_records"] == 2
+
+    # Lowering the best hands the record back to the later lift
+    ninety = run(records.list("progress", {"weight_kg": 90.0}))[0]["id"]
+    run(records.update("progress", ninety, {"weight_kg": 60.0}))
+    assert flags() == {"2024-05-10": True, "2024-05-01": True, "2024-05-05": False}
+    assert run(records.user_stats(user))["personal_records"] == 2
+
+    # Moving a record's date re-flags both its old and new neighbours
+    seventy = run(records.list("progress", {"weight_kg": 70.0}))[0]["id"]
+    run(records.update("progress", seventy, {"date": "2024-05-20T08:00:00"}))
+    assert flags() == {"2024-05-10": True, "2024-05-20": False, "2024-05-05": True}
+    run(records.delete("progress", ninety))
+    assert flags() == {"2024-05-10": True, "2024-05-20": False}
+    assert run(records.user_stats(user))["personal_records"] == 1
+    assert run(records.exercise_stats(squat))["personal_records"] == 1
+
+    # A rebuild re-flags every record from scratch and agrees
+    records.conn.execute("UPDATE progress SET personal_record = 1")
+    run(records.rebuild_rollups())
+    assert flags() == {"2024-05-10": True, "2024-05-20": False}
+    assert run(records.user_stats(user))["personal_records"] == 1
+
+def test_rollups_are_backfilled_for_files_without_them(tmp_path, run, add_user):
+    """Test that opening a database written before the rollup tables fills them"""
+    path = str(tmp_path / "old.db")
+    old = SQLiteRepository(path)
+    user = add_user(old, "old_user")
+    squat = run(old.insert("exercises", {
+        "name": "Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }))["id"]
+    run(old.insert("progress", {"user_id": user, "exercise_id": squat, "weight_kg": 50.0, "reps": 5}))
+    # Strip the rollup tables and their triggers, as in files from before them
+    for (name,) in old.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%rollup%'"
+    ).fetchall():
+        old.conn.execute(f"DROP TRIGGER {name}")
+    for table in ("user_rollups", "exercise_rollups", "user_exercise_rollups"):
+        old.conn.execute(f"DROP TABLE {table}")
+    old.conn.close()
+
+    reopened = SQLiteRepository(path)
+    assert run(reopened.user_stats(user))["progress_records"] == 1
+    assert run(reopened.exercise_stats(squat))["total_attempts"] == 1
+    assert [r["value"] for r in run(reopened.leaderboard(squat, "weight", 10))] == [50.0]
+    # The best is known, so a lighter set is not a personal record
+    lighter = run(reopened.insert("progress", {"user_id": user, "exercise_id": squat, "weight_kg": 40.0, "reps": 5}))
+    assert lighter["personal_record"] is False
+    reopened.conn.close()
+
+def test_leaderboard_reads_bests_with_date_tie_break(run, sqlite_repository, add_user):
+    """Test that leaderboards rank users by their best and break ties by date"""
+    board = sqlite_repository
+    row = run(board.insert("exercises", {
+        "name": "Row", "description": "Back", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["back"]
+    }))["id"]
+    users = [
+        add_user(board, name, fitness_level=level)
+        for name, level in (("ana", "beginner"), ("ben", "advanced"), ("cai", "beginner"))
+    ]
+    ana, ben, cai = users
+    run(board.insert_many("progress", [
+        {"user_id": ana, "exercise_id": row, "weight_kg": 80.0, "reps": 5, "sets": 3, "date": "2024-03-02T10:00:00"},
+        {"user_id": ben, "exercise_id": row, "weight_kg": 80.0, "reps": 8, "sets": 1, "date": "2024-03-01T10:00:00"},
+        {"user_id": cai, "exercise_id": row, "weight_kg": 60.0, "reps": 10, "sets": 3, "date": "2024-03-03T10:00:00"},
+        {"user_id": ana, "exercise_id": row, "weight_kg": 80.0, "reps": 3, "sets": 1, "date": "2024-02-01T10:00:00"},
+    ]))
+
+    ranked = run(board.leaderboard(row, "weight", 10))
+    assert [(r["user_id"], r["value"]) for r in ranked] == [(ana, 80.0), (ben, 80.0), (cai, 60.0)]
+    assert ranked[0]["achieved_at"] == "2024-02-01T10:00:00"
+    assert [r["user_id"] for r in run(board.leaderboard(row, "volume", 2))] == [cai, ana]
+    assert [r["user_id"] for r in run(board.leaderboard(row, "reps", 10, "beginner"))] == [cai, ana]
+
+    # Removing the earliest best moves the pair's date to the next holder
+    first = board.conn.execute("SELECT id FROM progress WHERE date = '2024-02-01T10:00:00'").fetchone()["id"]
+    run(board.delete("progress", first))
+    assert [r["user_id"] for r in run(board.leaderboard(row, "weight", 2))] == [ben, ana]
+
+    before = run(board.leaderboard(row, "volume", 10))
+    run(board.rebuild_rollups())
+    assert run(board.leaderboard(row, "volume", 10)) == before
+
+def test_search_exercises_follows_writes(run, sqlite_repository):
+    """Test that exercise search matches prefixes without accents and tracks edits"""
+    catalog = sqlite_repository
+    squat = run(catalog.insert("exercises", {
+        "name": "Sentadilla búlgara", "description": "Pierna atrasada sobre un banco", "exercise_type": "strength",
+        "difficulty": "intermediate", "muscle_groups": ["legs"], "instructions": ["Baja despacio", "Empuja con el talón"]
+    }))["id"]
+    press = run(catalog.insert("exercises", {
+        "name": "Bench press", "description": "Press on a flat bench", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["chest"], "instructions": ["Lower the bar to the chest"]
+    }))["id"]
+
+    def ids(query):
+        return [row["id"] for row in run(catalog.search_exercises(search_terms(query), 10))]
+
+    assert ids("SENTADILLA bulg") == [squat]
+    assert ids("talon") == [squat]
+    assert ids("banc") == [squat]
+    # A name match ranks above a description match
+    assert ids("bench") == [press]
+    assert ids("press chest") == [press]
+    assert ids("press: \"*") == [press]
+    assert ids("!!!") == []
+
+    run(catalog.update("exercises", press, {"name": "Push-up"}))
+    assert ids("push") == [press]
+    run(catalog.delete("exercises", squat))
+    assert ids("sentadilla") == []
+
+# ========== INTERFACE TESTS ==========
+
+def test_incomplete_repository_cannot_be_constructed():
+    """Test that a backend missing a method fails at construction, not at first call"""
+    class PartialRepository(Repository):
+        async def get(self, table, row_id, columns="*"):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialRepository()
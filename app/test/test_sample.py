@@ -1,6 +1,9 @@
 from fastapi.testclient import TestClient
 from app.main import app
 from datetime import datetime
+import csv
+import io
+import json
 
 client = TestClient(app)
 
@@ -428,3 +431,552 @@ def test_record_progress_invalid_exercise():
     assert response.status_code == 404
     assert "Exercise not found" in response.json()["detail"]
 
+
+# ========== PAGINATION TESTS ==========
+
+def test_list_pagination_with_cursor():
+    """Test walking a list endpoint page by page with the next cursor"""
+    all_ids = [exercise["id"] for exercise in client.get("/exercises").json()]
+    assert len(all_ids) >= 3
+
+    seen = []
+    response = client.get("/exercises?limit=2")
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(exercise["id"] for exercise in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        response = client.get(f"/exercises?limit=2&cursor={cursor}")
+    assert seen == all_ids
+
+def test_list_pagination_last_page_has_no_cursor():
+    """Test that a page holding the remaining rows has no next cursor"""
+    response = client.get("/users?limit=1000")
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+def test_list_pagination_invalid_cursor():
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/progress?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+# ========== MUSCLE GROUP FILTER TESTS ==========
+
+def test_get_exercises_by_muscle_group_any_and_all():
+    """Test filtering exercises by several muscle groups"""
+    client.post("/exercises", json={
+        "name": "Lunges",
+        "description": "Leg and core exercise",
+        "exercise_type": "strength",
+        "difficulty": "beginner",
+        "muscle_groups": ["legs", "core"]
+    })
+
+    response = client.get("/exercises?muscle_group=legs&muscle_group=core&limit=1000")
+    assert response.status_code == 200
+    names = {exercise["name"] for exercise in response.json()}
+    assert {"Running", "Squats", "Planks", "Lunges"} <= names
+    assert "Bench Press" not in names
+
+    response = client.get("/exercises?muscle_group=legs&muscle_group=core&muscle_group_match=all")
+    assert response.status_code == 200
+    assert [exercise["name"] for exercise in response.json()] == ["Lunges"]
+
+def test_get_routines_by_muscle_group():
+    """Test filtering routines by target muscle group"""
+    response = client.get("/routines?muscle_group=legs")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) >= 1
+    assert all("legs" in routine["target_muscle_groups"] for routine in data)
+
+    response = client.get("/routines?muscle_group=chest")
+    assert response.status_code == 200
+    assert response.json() == []
+
+# ========== CACHE TESTS ==========
+
+def test_get_cache_stats():
+    """Test that repeated catalog reads are served from the cache"""
+    client.get("/exercises/2")
+    client.get("/exercises/2")
+    response = client.get("/stats/cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["exercises"]["hits"] >= 1
+    assert "evictions" in data["routines"]
+
+def test_http_pool_stats():
+    """Test the PostgREST connection pool settings and counters"""
+    response = client.get("/stats/http")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["settings"]["max_keepalive"] == data["settings"]["max_connections"]
+    assert "connections_reused" in data["connections"]
+
+def test_cache_is_invalidated_by_update():
+    """Test that an update is visible immediately after a cached read"""
+    client.get("/exercises/2")
+    client.put("/exercises/2", json={"name": "Cached Running"})
+    response = client.get("/exercises/2")
+    assert response.json()["name"] == "Cached Running"
+
+# ========== CONDITIONAL GET TESTS ==========
+
+def test_get_returns_etag_and_304_when_unchanged():
+    """Test that a matching If-None-Match returns 304 without a body"""
+    response = client.get("/exercises")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('"')
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get("/exercises", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get("/exercises", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+def test_etag_changes_after_update():
+    """Test that modified data gets a new ETag"""
+    etag = client.get("/users/2").headers["ETag"]
+    client.put("/users/2", json={"age": 31})
+    response = client.get("/users/2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["age"] == 31
+
+def test_errors_have_no_etag():
+    """Test that only successful responses are tagged"""
+    response = client.get("/users/999")
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
+
+# ========== BULK INSERT TESTS ==========
+
+def test_create_exercises_bulk():
+    """Test creating several exercises in one request"""
+    response = client.post("/exercises/bulk", json=[
+        {"name": f"Bulk Exercise {i}", "description": "Imported", "exercise_type": "strength",
+         "difficulty": "beginner", "muscle_groups": ["arms"]}
+        for i in range(3)
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert data["failed"] == 0
+    ids = [result["id"] for result in data["results"]]
+    assert ids == sorted(ids)
+    assert client.get(f"/exercises/{ids[1]}").json()["name"] == "Bulk Exercise 1"
+
+def test_create_users_bulk_reports_duplicates():
+    """Test that a rejected user does not block the rest of the batch"""
+    response = client.post("/users/bulk", json=[
+        {"username": "bulk_user_1", "email": "bulk1@example.com"},
+        {"username": "bulk_user_1", "email": "bulk1b@example.com"},
+        {"username": "bulk_user_2", "email": "bulk2@example.com"}
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [result["status_code"] for result in data["results"]] == [200, 500, 200]
+
+def test_record_progress_bulk_validates_foreign_keys():
+    """Test that unknown users and exercises are reported per item"""
+    user_id = client.post("/users", json={"username": "bulk_progress_user", "email": "bulk_progress@example.com"}).json()["id"]
+    exercise_id = client.get("/exercises").json()[0]["id"]
+    response = client.post("/progress/bulk", json=[
+        {"user_id": user_id, "exercise_id": exercise_id, "weight_kg": 40.0, "reps": 10},
+        {"user_id": 999, "exercise_id": exercise_id, "weight_kg": 40.0},
+        {"user_id": user_id, "exercise_id": 999, "weight_kg": 40.0},
+        {"user_id": user_id, "exercise_id": exercise_id, "weight_kg": 45.0, "reps": 8}
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["results"][1] == {"index": 1, "status_code": 404, "id": None, "detail": "User not found"}
+    assert data["results"][2]["detail"] == "Exercise not found"
+    assert len(client.get(f"/progress?user_id={user_id}").json()) == 2
+
+# ========== AGGREGATED STATS TESTS ==========
+
+def test_user_stats_aggregates_history():
+    """Test that user stats add up sessions and progress"""
+    user_id = client.post("/users", json={"username": "aggregate_user", "email": "aggregate@example.com"}).json()["id"]
+    routine_id = client.post("/routines", json={
+        "name": "Aggregate Routine", "description": "Stats", "difficulty": "beginner",
+        "target_muscle_groups": ["core"], "estimated_duration_minutes": 20
+    }).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "Aggregate Exercise", "description": "Stats", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["core"]
+    }).json()["id"]
+    for minutes in (20, 30):
+        session_id = client.post("/sessions", json={
+            "user_id": user_id, "routine_id": routine_id, "started_at": datetime.now().isoformat()
+        }).json()["id"]
+        client.patch(f"/sessions/{session_id}", json={
+            "completed": True, "total_duration_minutes": minutes, "calories_burned": 100
+        })
+    client.post("/sessions", json={"user_id": user_id, "routine_id": routine_id, "started_at": datetime.now().isoformat()})
+    client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "weight_kg": 20.0, "reps": 10, "personal_record": True})
+    client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "reps": 5})
+
+    data = client.get(f"/stats/user/{user_id}").json()
+    assert data["total_sessions"] == 3
+    assert data["completed_sessions"] == 2
+    assert data["total_workout_time_minutes"] == 50
+    assert data["total_calories_burned"] == 200
+    assert data["progress_records"] == 2
+    assert data["personal_records"] == 1
+    assert data["completion_rate"] == 2 / 3
+
+    data = client.get(f"/stats/exercise/{exercise_id}").json()
+    assert data["exercise_name"] == "Aggregate Exercise"
+    assert data["total_attempts"] == 2
+    assert data["unique_users"] == 1
+    assert data["average_weight"] == 10.0
+    assert data["average_reps"] == 7.5
+
+def test_stats_for_missing_rows():
+    """Test that stats for unknown ids return 404"""
+    assert client.get("/stats/user/999").status_code == 404
+    assert client.get("/stats/exercise/999").status_code == 404
+
+# ========== SINGLE ROUND-TRIP WRITE TESTS ==========
+
+def test_update_and_delete_missing_rows():
+    """Test that writes to unknown ids return 404"""
+    assert client.put("/exercises/9999", json={"name": "Ghost"}).status_code == 404
+    assert client.put("/users/9999", json={"age": 30}).status_code == 404
+    assert client.patch("/sessions/9999", json={"completed": True}).status_code == 404
+    assert client.delete("/routines/9999").status_code == 404
+    assert client.delete("/progress/9999", headers={"Prefer": "return=minimal"}).status_code == 404
+
+def test_prefer_return_minimal():
+    """Test that Prefer: return=minimal answers writes with an empty 204"""
+    user_id = client.post("/users", json={"username": "minimal_user", "email": "minimal@example.com"}).json()["id"]
+    response = client.put(f"/users/{user_id}", json={"age": 41}, headers={"Prefer": "return=minimal"})
+    assert response.status_code == 204
+    assert response.headers["Preference-Applied"] == "return=minimal"
+    assert response.content == b""
+    assert client.get(f"/users/{user_id}").json()["age"] == 41
+
+    response = client.delete(f"/users/{user_id}", headers={"Prefer": "return=minimal"})
+    assert response.status_code == 204
+    assert client.get(f"/users/{user_id}").status_code == 404
+
+def test_completing_session_keeps_first_completed_at():
+    """Test that completed_at is only set when a session is first completed"""
+    user_id = client.post("/users", json={"username": "complete_user", "email": "complete@example.com"}).json()["id"]
+    routine_id = client.post("/routines", json={
+        "name": "Complete Routine", "description": "Once", "difficulty": "beginner",
+        "target_muscle_groups": ["core"], "estimated_duration_minutes": 10
+    }).json()["id"]
+    session_id = client.post("/sessions", json={
+        "user_id": user_id, "routine_id": routine_id, "started_at": datetime.now().isoformat()
+    }).json()["id"]
+
+    first = client.patch(f"/sessions/{session_id}", json={"completed": True}).json()
+    assert first["completed"] is True
+    assert first["completed_at"] is not None
+    second = client.patch(f"/sessions/{session_id}", json={"completed": True, "notes": "again"}).json()
+    assert second["completed_at"] == first["completed_at"]
+    assert second["notes"] == "again"
+
+# ========== FOREIGN KEY VALIDATION TESTS ==========
+
+def test_record_progress_skips_existence_lookups(monkeypatch):
+    """Test that a valid progress record is inserted without prior lookups"""
+    user_id = client.post("/users", json={"username": "fk_user", "email": "fk@example.com"}).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "FK Exercise", "description": "Constraints", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["arms"]
+    }).json()["id"]
+
+    from app.db import repository
+    lookups = []
+    original_exists = repository.exists
+    async def counting_exists(table, row_id):
+        lookups.append(table)
+        return await original_exists(table, row_id)
+    monkeypatch.setattr(repository, "exists", counting_exists)
+
+    response = client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "reps": 12})
+    assert response.status_code == 200
+    assert lookups == []
+
+    response = client.post("/progress", json={"user_id": user_id, "exercise_id": 9999, "reps": 12})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Exercise not found"
+
+# ========== ROUTINE EXPANSION TESTS ==========
+
+def test_get_routine_expand_exercises():
+    """Test that expand=exercises inlines the referenced exercises"""
+    squat_id = client.post("/exercises", json={
+        "name": "Expand Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }).json()["id"]
+    plank_id = client.post("/exercises", json={
+        "name": "Expand Plank", "description": "Core", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["core"]
+    }).json()["id"]
+    routine_id = client.post("/routines", json={
+        "name": "Expand Routine", "description": "Inline", "difficulty": "beginner",
+        "target_muscle_groups": ["legs", "core"], "estimated_duration_minutes": 15,
+        "exercises": [{"exercise_id": squat_id, "sets": 3}, {"exercise_id": plank_id}, {"exercise_id": 9999}]
+    }).json()["id"]
+
+    plain = client.get(f"/routines/{routine_id}").json()
+    assert "exercise" not in plain["exercises"][0]
+
+    expanded = client.get(f"/routines/{routine_id}", params={"expand": "exercises"}).json()
+    assert expanded["exercises"][0]["sets"] == 3
+    assert expanded["exercises"][0]["exercise"]["name"] == "Expand Squat"
+    assert expanded["exercises"][1]["exercise"]["muscle_groups"] == ["core"]
+    assert expanded["exercises"][2]["exercise"] is None
+
+    routines = client.get("/routines", params={"expand": "exercises", "limit": 1000}).json()
+    routine = next(r for r in routines if r["id"] == routine_id)
+    assert routine["exercises"][1]["exercise"]["id"] == plank_id
+
+    assert client.get(f"/routines/{routine_id}", params={"expand": "bogus"}).status_code == 422
+
+# ========== SERIALIZATION TESTS ==========
+
+def test_list_items_match_single_reads():
+    """Test that list pages serialize rows exactly like the single-row endpoints"""
+    for path in ("/exercises", "/routines", "/users", "/sessions", "/progress"):
+        response = client.get(path, params={"limit": 3})
+        assert response.headers["content-type"] == "application/json"
+        for item in response.json():
+            assert client.get(f"{path}/{item['id']}").json() == item
+
+# ========== EXPORT TESTS ==========
+
+def test_export_progress_ndjson_across_pages(monkeypatch):
+    """Test that NDJSON exports stream every matching row across pages"""
+    from app.routes import sample
+    monkeypatch.setattr(sample, "EXPORT_PAGE_SIZE", 2)
+    user_id = client.post("/users", json={"username": "export_user", "email": "export@example.com"}).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "Export Exercise", "description": "History", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs"]
+    }).json()["id"]
+    for day in range(1, 6):
+        client.post("/progress", json={
+            "user_id": user_id, "exercise_id": exercise_id, "reps": day, "date": f"2024-03-0{day}T08:00:00"
+        })
+
+    response = client.get("/export/progress", params={"user_id": user_id})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "progress.ndjson" in response.headers["content-disposition"]
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["reps"] for record in records] == [1, 2, 3, 4, 5]
+
+    response = client.get("/export/progress", params={
+        "user_id": user_id, "since": "2024-03-02T00:00:00", "until": "2024-03-04T00:00:00"
+    })
+    assert [json.loads(line)["reps"] for line in response.text.splitlines()] == [2, 3]
+
+def test_export_sessions_csv():
+    """Test that CSV exports start with a header row"""
+    user_id = client.post("/users", json={"username": "csv_user", "email": "csv@example.com"}).json()["id"]
+    routine_id = client.post("/routines", json={
+        "name": "CSV Routine", "description": "Export", "difficulty": "beginner",
+        "target_muscle_groups": ["core"], "estimated_duration_minutes": 10
+    }).json()["id"]
+    client.post("/sessions", json={"user_id": user_id, "routine_id": routine_id, "started_at": "2024-03-01T08:00:00", "notes": "a, b"})
+
+    response = client.get("/export/sessions", params={"user_id": user_id, "format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = list(csv.reader(io.StringIO(response.text)))
+    assert lines[0][:3] == ["id", "user_id", "routine_id"]
+    assert len(lines) == 2
+    assert lines[1][lines[0].index("notes")] == "a, b"
+
+# ========== PROGRESS SERIES TESTS ==========
+
+def cap_list_responses(monkeypatch, max_rows):
+    """Truncate every list read at max_rows, like PostgREST's max-rows, and page at that size"""
+    from app.routes import sample
+    monkeypatch.setattr(sample, "FULL_READ_PAGE_SIZE", max_rows)
+    original_list = sample.repository.list
+    async def capped_list(table, filters=None, *args, limit=None, **kwargs):
+        return await original_list(table, filters, *args, limit=min(limit or max_rows, max_rows), **kwargs)
+    monkeypatch.setattr(sample.repository, "list", capped_list)
+
+def test_get_progress_series():
+    """Test bucketed progress for one user and exercise"""
+    user_id = client.post("/users", json={"username": "series_user", "email": "series@example.com"}).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "Series Bench", "description": "Chest", "exercise_type": "strength",
+        "difficulty": "intermediate", "muscle_groups": ["chest"]
+    }).json()["id"]
+    for day, weight in ((4, 60.0), (6, 65.0), (12, 70.0)):
+        client.post("/progress", json={
+            "user_id": user_id, "exercise_id": exercise_id, "weight_kg": weight,
+            "reps": 5, "sets": 3, "date": f"2024-03-{day:02d}T08:00:00"
+        })
+
+    response = client.get("/progress/series", params={"user_id": user_id, "exercise_id": exercise_id})
+    assert response.status_code == 200
+    points = response.json()
+    assert [point["bucket_start"] for point in points] == ["2024-03-04", "2024-03-11"]
+    assert points[0]["max_weight_kg"] == 65.0
+    assert points[0]["total_volume_kg"] == 15 * 60.0 + 15 * 65.0
+
+    response = client.get("/progress/series", params={
+        "user_id": user_id, "exercise_id": exercise_id, "bucket": "day", "from": "2024-03-05T00:00:00"
+    })
+    assert [point["bucket_start"] for point in response.json()] == ["2024-03-06", "2024-03-12"]
+
+def test_progress_series_reads_every_page(monkeypatch):
+    """Test that the series covers rows beyond one page, as PostgREST caps responses at max-rows"""
+    cap_list_responses(monkeypatch, 2)
+    user_id = client.post("/users", json={"username": "paged_series_user", "email": "paged_series@example.com"}).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "Paged Series Row", "description": "Back", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["back"]
+    }).json()["id"]
+    for day in range(1, 6):
+        client.post("/progress", json={
+            "user_id": user_id, "exercise_id": exercise_id, "weight_kg": 40.0 + day,
+            "reps": 10, "sets": 1, "date": f"2024-05-0{day}T08:00:00"
+        })
+
+    response = client.get("/progress/series", params={"user_id": user_id, "exercise_id": exercise_id, "bucket": "day"})
+    assert response.status_code == 200
+    assert [point["bucket_start"] for point in response.json()] == [f"2024-05-0{day}" for day in range(1, 6)]
+
+# ========== PERSONAL RECORD TESTS ==========
+
+def test_personal_records_are_decided_by_the_server():
+    """Test that personal_record is computed from the user's best for the exercise"""
+    user_id = client.post("/users", json={"username": "pr_user", "email": "pr@example.com"}).json()["id"]
+    exercise_id = client.post("/exercises", json={
+        "name": "PR Squat", "description": "Legs", "exercise_type": "strength",
+        "difficulty": "intermediate", "muscle_groups": ["legs"]
+    }).json()["id"]
+
+    first = client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "weight_kg": 100.0, "reps": 5}).json()
+    lower = client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "weight_kg": 90.0, "reps": 5, "personal_record": True}).json()
+    assert first["personal_record"] == True
+    assert lower["personal_record"] == False
+
+    response = client.put(f"/progress/{lower['id']}", json={"weight_kg": 110.0})
+    assert response.json()["personal_record"] == True
+    assert client.get(f"/stats/user/{user_id}").json()["personal_records"] == 2
+
+# ========== LEADERBOARD TESTS ==========
+
+def test_exercise_leaderboard():
+    """Test ranking users of an exercise by metric and fitness level"""
+    exercise_id = client.post("/exercises", json={
+        "name": "Board Deadlift", "description": "Back", "exercise_type": "strength",
+        "difficulty": "advanced", "muscle_groups": ["back", "legs"]
+    }).json()["id"]
+    for name, level, weight, reps in (("board_a", "beginner", 100.0, 5), ("board_b", "advanced", 140.0, 3), ("board_c", "beginner", 120.0, 2)):
+        user_id = client.post("/users", json={"username": name, "email": f"{name}@example.com", "fitness_level": level}).json()["id"]
+        client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_id, "weight_kg": weight, "reps": reps})
+
+    data = client.get(f"/leaderboards/exercise/{exercise_id}?metric=weight&k=2").json()
+    assert [(entry["rank"], entry["username"], entry["value"]) for entry in data] == [(1, "board_b", 140.0), (2, "board_c", 120.0)]
+    data = client.get(f"/leaderboards/exercise/{exercise_id}?metric=volume&fitness_level=beginner").json()
+    assert [entry["username"] for entry in data] == ["board_a", "board_c"]
+    assert data[0]["fitness_level"] == "beginner"
+
+    assert client.get(f"/leaderboards/exercise/{exercise_id}?metric=speed").status_code == 422
+    assert client.get("/leaderboards/exercise/9999").status_code == 404
+
+# ========== EXERCISE SEARCH TESTS ==========
+
+def test_search_exercises():
+    """Test ranked, accent-insensitive exercise search"""
+    client.post("/exercises", json={
+        "name": "Zancada con mancuernas", "description": "Trabajo de pierna y glúteo", "exercise_type": "strength",
+        "difficulty": "intermediate", "muscle_groups": ["legs"], "instructions": ["Da un paso largo", "Flexiona ambas rodillas"]
+    })
+    client.post("/exercises", json={
+        "name": "Glute bridge", "description": "Hip extension on the floor", "exercise_type": "strength",
+        "difficulty": "beginner", "muscle_groups": ["legs", "core"], "instructions": ["Squeeze the zancada-free glutes"]
+    })
+
+    data = client.get("/exercises/search?q=gluteo").json()
+    assert [exercise["name"] for exercise in data] == ["Zancada con mancuernas"]
+    data = client.get("/exercises/search?q=zancad").json()
+    assert [exercise["name"] for exercise in data] == ["Zancada con mancuernas", "Glute bridge"]
+    assert client.get("/exercises/search?q=rodilla&limit=1").json()[0]["instructions"][1] == "Flexiona ambas rodillas"
+    assert client.get("/exercises/search?q=nothinglikethis").json() == []
+    assert client.get("/exercises/search").status_code == 422
+
+# ========== RECOMMENDATION TESTS ==========
+
+def test_recommended_routines():
+    """Test routine recommendations for a user's level, goals and recent training"""
+    user_id = client.post("/users", json={
+        "username": "recommend_user", "email": "recommend@example.com",
+        "fitness_level": "advanced", "goals": ["Fortalecer la espalda"]
+    }).json()["id"]
+    back_id = client.post("/routines", json={
+        "name": "Advanced Back", "description": "Pull day", "difficulty": "advanced",
+        "target_muscle_groups": ["back"], "estimated_duration_minutes": 45
+    }).json()["id"]
+
+    data = client.get(f"/users/{user_id}/recommended-routines?k=3").json()
+    assert len(data) <= 3
+    assert data[0]["routine"]["id"] == back_id
+    assert data[0]["difficulty_fit"] == 1.0
+    assert data[0]["muscle_coverage"] == 1.0
+    assert data[0]["duration_fit"] == 1.0
+    assert all(a["score"] >= b["score"] for a, b in zip(data, data[1:]))
+
+    # A new routine is scored on the next request
+    arms_id = client.post("/routines", json={
+        "name": "Advanced Arms", "description": "Arm day", "difficulty": "advanced",
+        "target_muscle_groups": ["arms"], "estimated_duration_minutes": 45
+    }).json()["id"]
+    ids = [item["routine"]["id"] for item in client.get(f"/users/{user_id}/recommended-routines").json()]
+    assert ids[:2] == [back_id, arms_id]
+
+    assert client.get("/users/9999/recommended-routines").status_code == 404
+
+def test_recommended_routines_read_every_page(monkeypatch):
+    """Test that the catalog and recent history are read past PostgREST's max-rows"""
+    user_id = client.post("/users", json={
+        "username": "paged_recommend_user", "email": "paged_recommend@example.com", "fitness_level": "beginner"
+    }).json()["id"]
+    exercise_ids = {
+        group: client.post("/exercises", json={
+            "name": f"Paged Recommend {group}", "description": "Load", "exercise_type": "strength",
+            "difficulty": "beginner", "muscle_groups": [group]
+        }).json()["id"]
+        for group in ("chest", "legs")
+    }
+    # Two chest records fill the first page; the legs load only shows on later pages
+    for group in ("chest", "chest", "legs", "legs", "legs"):
+        client.post("/progress", json={"user_id": user_id, "exercise_id": exercise_ids[group], "reps": 10})
+    routine_ids = {
+        group: client.post("/routines", json={
+            "name": f"Paged Recommend {group}", "description": "Paged", "difficulty": "beginner",
+            "target_muscle_groups": [group], "estimated_duration_minutes": 45
+        }).json()["id"]
+        for group in ("chest", "legs")
+    }
+
+    cap_list_responses(monkeypatch, 2)
+    data = client.get(f"/users/{user_id}/recommended-routines", params={"k": 50}).json()
+    coverage = {item["routine"]["id"]: item["muscle_coverage"] for item in data}
+    # The newest routines are past the first catalog page
+    assert coverage[routine_ids["legs"]] == 0.0
+    assert coverage[routine_ids["chest"]] == round(1 - 2 / 3, 4)
@@ -0,0 +1,58 @@
+import numpy as np
+from app.analytics.series import bucket_starts, progress_series, utc_dates
+
+# ========== BUCKETING TESTS ==========
+
+def test_week_buckets_start_on_monday():
+    """Test that weekly buckets start on the ISO week's Monday"""
+    dates = np.array(["2024-03-03T23:00:00", "2024-03-04T00:00:00", "2024-03-10T12:00:00"], dtype="datetime64[s]")
+    starts = [str(start) for start in bucket_starts(dates, "week")]
+    assert starts == ["2024-02-26", "2024-03-04", "2024-03-04"]
+
+def test_month_and_day_buckets():
+    """Test day and month bucket starts"""
+    dates = np.array(["2024-02-29T18:30:00"], dtype="datetime64[s]")
+    assert str(bucket_starts(dates, "day")[0]) == "2024-02-29"
+    assert str(bucket_starts(dates, "month")[0]) == "2024-02-01"
+
+def test_offset_timestamps_are_bucketed_in_utc():
+    """Test that a timestamp's UTC offset moves it across midnight before bucketing"""
+    values = ["2024-03-04T00:30:00+02:00", "2024-03-03T23:30:00.250-01:00", "2024-03-03T23:30:00Z", "2024-03-03T23:30:00"]
+    assert [str(date) for date in utc_dates(values)] == [
+        "2024-03-03T22:30:00", "2024-03-04T00:30:00", "2024-03-03T23:30:00", "2024-03-03T23:30:00"
+    ]
+    rows = [{"date": value, "weight_kg": 50.0, "reps": 5, "sets": 1} for value in values]
+    assert [(point["bucket_start"], point["records"]) for point in progress_series(rows, "day")] == [
+        ("2024-03-03", 3), ("2024-03-04", 1)
+    ]
+    assert [point["bucket_start"] for point in progress_series(rows, "week")] == ["2024-02-26", "2024-03-04"]
+
+# ========== SERIES TESTS ==========
+
+def test_progress_series_aggregates_per_bucket():
+    """Test max weight, volume and estimated 1RM per bucket"""
+    rows = [
+        {"date": "2024-03-05T08:00:00+00:00", "weight_kg": 100.0, "reps": 5, "sets": 3},
+        {"date": "2024-03-01T08:00:00Z", "weight_kg": 80.0, "reps": 10, "sets": None},
+        {"date": "2024-03-06T08:00:00", "weight_kg": 110.0, "reps": 1, "sets": 1},
+        {"date": "2024-03-07T08:00:00", "weight_kg": None, "reps": 20, "sets": 2},
+        {"date": None, "weight_kg": 500.0, "reps": 1, "sets": 1},
+    ]
+    first, second = progress_series(rows, "week")
+    assert first == {
+        "bucket_start": "2024-02-26", "records": 1, "max_weight_kg": 80.0,
+        "total_volume_kg": 800.0, "estimated_one_rep_max_kg": 106.67
+    }
+    assert second["bucket_start"] == "2024-03-04"
+    assert second["records"] == 3
+    assert second["max_weight_kg"] == 110.0
+    assert second["total_volume_kg"] == 3 * 5 * 100.0 + 110.0
+    assert second["estimated_one_rep_max_kg"] == 116.67
+
+def test_progress_series_without_weights():
+    """Test that buckets with no weighted sets report no max or 1RM"""
+    (point,) = progress_series([{"date": "2024-03-01", "weight_kg": None, "reps": 30, "sets": None}], "month")
+    assert point["max_weight_kg"] is None
+    assert point["estimated_one_rep_max_kg"] is None
+    assert point["total_volume_kg"] == 0.0
+    assert progress_series([], "day") == []
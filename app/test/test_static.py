@@ -0,0 +1,53 @@
+import gzip
+import brotli
+from fastapi.testclient import TestClient
+from app.main import app, static_assets
+from app.routes.static import negotiate_encoding
+
+client = TestClient(app)
+
+# ========== CONTENT NEGOTIATION TESTS ==========
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding parsing with preferences and q values"""
+    available = ("br", "gzip")
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0.5", available) == "gzip"
+    assert negotiate_encoding("*", available) == "br"
+    assert negotiate_encoding("deflate", available) == "identity"
+    assert negotiate_encoding(None, available) == "identity"
+
+# ========== STATIC ASSET TESTS ==========
+
+def test_assets_are_served_compressed_with_etags():
+    """Test that static files come from memory compressed and revalidate with 304"""
+    raw = client.get("/app.js", headers={"Accept-Encoding": "identity"})
+    assert raw.status_code == 200
+    assert raw.headers["content-type"].startswith("application/javascript")
+    assert raw.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in raw.headers
+
+    compressed = client.get("/app.js", headers={"Accept-Encoding": "br"})
+    assert compressed.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.headers["etag"] != raw.headers["etag"]
+    assert int(compressed.headers["content-length"]) < len(raw.content)
+    # httpx only decodes the encodings it supports, so check the bytes directly
+    assert brotli.decompress(static_assets.assets["app.js"].variant("br")) == raw.content
+    assert gzip.decompress(static_assets.assets["app.js"].variant("gzip")) == raw.content
+
+    revalidated = client.get("/app.js", headers={"Accept-Encoding": "br", "If-None-Match": compressed.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+def test_index_links_versioned_immutable_assets():
+    """Test that index.html points at hashed asset URLs cached as immutable"""
+    index = client.get("/")
+    assert index.status_code == 200
+    assert index.headers["cache-control"] == "no-cache"
+    for name in ("styles.css", "app.js"):
+        url = static_assets.url(name)
+        assert f'"{url[1:]}"' in index.text
+        assert client.get(url).headers["cache-control"] == "public, max-age=31536000, immutable"
+    # An outdated version is still served, but must be revalidated
+    assert client.get("/styles.css?v=stale").headers["cache-control"] == "no-cache"
@@ -0,0 +1,86 @@
+import logging
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app.db.instrumented import InstrumentedRepository
+from app.main import app
+from app.routes.conditional import ConditionalGetRoute
+from app.timing import RequestTimings, ServerTimingMiddleware, record_query, timed_endpoint
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def timed_app(sqlite_repository, add_user):
+    """Builds an app whose one route reads a user and then their rollup"""
+    repository = InstrumentedRepository(sqlite_repository, record_query)
+    add_user(repository, "ana")
+    router = APIRouter(route_class=ConditionalGetRoute)
+
+    @router.get("/users/{user_id}/summary")
+    async def user_summary(user_id: int):
+        user = await repository.get("users", user_id)
+        stats = await repository.user_stats(user_id)
+        return {"username": user["username"], "sessions": stats["total_sessions"]}
+
+    def build(slow_request_ms):
+        timed = FastAPI()
+        timed.include_router(router)
+        timed.add_middleware(ServerTimingMiddleware, slow_request_ms=slow_request_ms)
+        return timed
+
+    return build
+
+
+def test_server_timing_header_splits_request_time():
+    # users are not cached, so the list is always read from the database
+    response = client.get("/users")
+    assert response.status_code == 200
+    entries = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert entries[:2] == ["db", "db-users"]
+    assert "model" in entries and "serialize" in entries
+    assert entries[-1] == "total"
+
+
+def test_server_timing_counts_queries_per_table():
+    timings = RequestTimings()
+    timings.add_query("users", "get", 0.002, False)
+    timings.add_query("progress", "insert", 0.004, False)
+    timings.add_query("users", "update", 0.001, False)
+    timings.add_phase("serialize", 0.0005)
+    assert timings.server_timing(0.010) == (
+        'db;desc="3 queries";dur=7.0, db-users;desc="2 queries";dur=3.0, '
+        'db-progress;desc="1 query";dur=4.0, serialize;dur=0.5, total;dur=10.0'
+    )
+
+
+def test_slow_request_log_records_query_sequence(caplog, timed_app):
+    timed = timed_app(slow_request_ms=0.001)
+    with caplog.at_level(logging.WARNING, logger="app.slow_requests"):
+        response = TestClient(timed).get("/users/1/summary")
+
+    assert response.json() == {"username": "ana", "sessions": 0}
+    assert "db-users" in response.headers["server-timing"]
+    assert "db-user_rollups" in response.headers["server-timing"]
+    [record] = caplog.records
+    lines = record.getMessage().splitlines()
+    assert lines[0].startswith("Slow request GET /users/1/summary (/users/{user_id}/summary)")
+    assert "in 2 queries" in lines[0]
+    assert [line.split()[2] for line in lines[1:]] == ["users.get", "user_rollups.user_stats"]
+
+
+def test_endpoints_are_wrapped_once():
+    async def endpoint(user_id: int):
+        return user_id
+
+    timed = timed_endpoint(endpoint)
+    assert timed.__wrapped__ is endpoint
+    # Routes re-created from an existing route (include_router) keep one wrapper
+    assert timed_endpoint(timed) is timed
+
+
+def test_fast_requests_are_not_logged(caplog, timed_app):
+    timed = timed_app(slow_request_ms=0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_requests"):
+        TestClient(timed).get("/users/1/summary")
+    assert caplog.records == []
@@ -0,0 +1,175 @@
+import functools
+import inspect
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from app.metrics import UNMATCHED_ROUTE
+
+logger = logging.getLogger("app.slow_requests")
+
+# Requests taking at least this long are logged with their full query
+# sequence; 0 disables the log
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+# Set SERVER_TIMING=0 to stop sending the Server-Timing header, e.g. to
+# keep table names out of public responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _queries(count: int) -> str:
+    return f"{count} query" if count == 1 else f"{count} queries"
+
+
+class RequestTimings:
+    """Where one request spent its time.
+
+    queries holds every backend call in order as (table, operation, offset,
+    seconds, failed), offset being seconds since the request started.
+    phases accumulates the time of named phases ("model", "serialize").
+    endpoint is the time spent inside route handler functions.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries: List[Tuple[str, str, float, float, bool]] = []
+        self.phases: Dict[str, float] = {}
+        self.endpoint = 0.0
+
+    def add_query(self, table: str, operation: str, seconds: float, failed: bool) -> None:
+        offset = time.perf_counter() - seconds - self.start
+        self.queries.append((table, operation, offset, seconds, failed))
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def db_by_table(self) -> Dict[str, Tuple[int, float]]:
+        """Number of calls and total seconds per table, in order of first call"""
+        tables: Dict[str, Tuple[int, float]] = {}
+        for table, _, _, seconds, _ in self.queries:
+            count, total = tables.get(table, (0, 0.0))
+            tables[table] = (count + 1, total + seconds)
+        return tables
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value: db time overall and per table, model, serialize, total"""
+        entries = []
+        if self.queries:
+            db_total = sum(query[3] for query in self.queries)
+            entries.append(f'db;desc="{_queries(len(self.queries))}";dur={db_total * 1000:.1f}')
+            for table, (count, seconds) in self.db_by_table().items():
+                entries.append(f'db-{table};desc="{_queries(count)}";dur={seconds * 1000:.1f}')
+        for name, seconds in self.phases.items():
+            entries.append(f"{name};dur={seconds * 1000:.1f}")
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def log_lines(self, method: str, path: str, route: str, total: float) -> List[str]:
+        db_total = sum(query[3] for query in self.queries)
+        phases = "".join(f", {name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        lines = [
+            f"Slow request {method} {path} ({route}) {total * 1000:.1f} ms: "
+            f"db {db_total * 1000:.1f} ms in {_queries(len(self.queries))}{phases}"
+        ]
+        for table, operation, offset, seconds, failed in self.queries:
+            lines.append(
+                f"  +{offset * 1000:.1f} ms {table}.{operation} {seconds * 1000:.1f} ms" + (" FAILED" if failed else "")
+            )
+        return lines
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_query(table: str, operation: str, seconds: float, failed: bool) -> None:
+    """InstrumentedRepository observer adding a backend call to the current request"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_query(table, operation, seconds, failed)
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        timings = _current.get()
+        if timings is not None:
+            timings.add_phase(self.name, time.perf_counter() - self.start)
+
+
+def phase(name: str) -> _Phase:
+    """Context manager adding the time of a block to a phase of the current request"""
+    return _Phase(name)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an async route handler to add its run time to RequestTimings.endpoint.
+
+    functools.wraps keeps the signature FastAPI reads parameters from.
+    Endpoints already wrapped (routes re-created by include_router) and
+    sync ones are returned as they are.
+    """
+    if getattr(endpoint, "_timed", False) or not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings = _current.get()
+            if timings is not None:
+                timings.endpoint += time.perf_counter() - start
+
+    timed._timed = True
+    return timed
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that accounts each request's time.
+
+    The Server-Timing header shows, in the browser's network panel, the
+    backend calls per table, model construction and serialization up to the
+    moment the response starts; work done while a body is streamed only
+    reaches the slow request log. Requests slower than SLOW_REQUEST_MS are
+    logged with every backend call in order.
+    """
+
+    def __init__(self, app, slow_request_ms: float = SLOW_REQUEST_MS, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                header = timings.server_timing(time.perf_counter() - timings.start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            total = time.perf_counter() - timings.start
+            if self.slow_request_seconds > 0 and total >= self.slow_request_seconds:
+                route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+                logger.warning("\n".join(timings.log_lines(scope["method"], scope["path"], route, total)))
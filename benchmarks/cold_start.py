@@ -0,0 +1,90 @@
+"""Serverless cold start: importing the Vercel entry point and serving a first request.
+
+before: the Supabase SDK and NumPy imported and the client built at import
+        time, as app.main used to do (--eager reproduces it)
+after:  the client and heavy imports deferred until a request needs them
+
+Every sample runs in a fresh interpreter, like a new serverless instance.
+The Supabase backend is configured with a placeholder URL; none of the
+measured paths query it.
+
+Usage: python -m benchmarks.cold_start [--runs 5] [--path / --path /docs]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_PATHS = ("/", "/styles.css", "/docs", "/openapi.json")
+
+# Modules whose import the lazy setup keeps off the cold start path
+HEAVY_MODULES = ("supabase", "postgrest", "numpy")
+
+
+def child(path, eager):
+    """Measure one cold start in this interpreter and print it as JSON"""
+    start = time.perf_counter()
+    if eager:
+        import numpy  # noqa: F401
+        from app.db.supabase_client import get_supabase
+        get_supabase()
+    import api.index
+    imported = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    # The test client's own imports are not part of the request
+    from fastapi.testclient import TestClient
+    client = TestClient(api.index.app)
+    request_start = time.perf_counter()
+    status = client.get(path).status_code
+    done = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "first_request_ms": (done - request_start) * 1000,
+        "status": status,
+        "loaded": loaded,
+    }))
+
+
+def sample(path, eager):
+    env = {
+        **os.environ,
+        "DB_BACKEND": "supabase",
+        "SUPABASE_URL": os.environ.get("SUPABASE_URL", "http://127.0.0.1:9"),
+        "SUPABASE_KEY": os.environ.get("SUPABASE_KEY", "placeholder"),
+    }
+    command = [sys.executable, "-m", "benchmarks.cold_start", "--child", path]
+    if eager:
+        command.append("--eager")
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.eager)
+        return
+
+    print(f"{'path':<16}{'mode':<8}{'import ms':>11}{'request ms':>12}{'total ms':>10}  heavy modules loaded")
+    for path in args.paths or DEFAULT_PATHS:
+        for mode, eager in (("before", True), ("after", False)):
+            runs = [sample(path, eager) for _ in range(args.runs)]
+            assert all(run["status"] == 200 for run in runs), f"{path}: unexpected status"
+            imported = statistics.median(run["import_ms"] for run in runs)
+            request = statistics.median(run["first_request_ms"] for run in runs)
+            loaded = ", ".join(runs[-1]["loaded"]) or "-"
+            print(f"{path:<16}{mode:<8}{imported:>11.1f}{request:>12.1f}{imported + request:>10.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
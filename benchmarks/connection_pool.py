@@ -0,0 +1,140 @@
+"""Query latency against a local PostgREST stand-in under bursts of concurrent queries.
+
+before: httpx's default pool, which the Supabase SDK used (up to 100
+        connections, 20 kept alive for 5 seconds)
+after:  PoolSettings defaults (20 connections, all kept alive for 30 seconds)
+
+The default pause between bursts is longer than the old keep-alive, the
+traffic of a worker serving a query every few seconds; shorten it with
+--pause and raise --concurrency to see churn from the keep-alive count.
+
+The stand-in runs in its own process over TLS with a throwaway self-signed
+certificate (made with the openssl command), so every new connection pays
+a real TCP and TLS handshake. The stand-in speaks HTTP/1.1 only, so both
+modes run without HTTP/2 unless --http2 is given: with it httpx queues
+requests on the first connection until ALPN settles the protocol, which
+only pays off against a server that multiplexes, like Supabase's gateway.
+
+Usage: python -m benchmarks.connection_pool [--bursts 6] [--concurrency 20] [--pause 6] [--latency 0.05] [--http2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from app.db.http_pool import PoolMetrics, PoolSettings, pooled_client
+
+ROWS = [{"id": i, "name": f"Exercise {i}"} for i in range(20)]
+
+# httpx's defaults, which postgrest-py used when no client was given
+SDK_DEFAULTS = PoolSettings(max_connections=100, max_keepalive=20, keepalive_expiry=5.0, read_timeout=120.0)
+
+
+# Seconds the stand-in takes per query (--latency), roughly a round trip
+# from a serverless function to Supabase plus a small indexed query
+LATENCY = 0.05
+
+
+async def postgrest_stand_in(scope, receive, send):
+    """Answers every read with 20 rows after LATENCY seconds"""
+    if scope["type"] != "http":
+        return
+    await asyncio.sleep(LATENCY)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": json.dumps(ROWS).encode()})
+
+
+def serve(port, certdir, latency):
+    global LATENCY
+    LATENCY = latency
+    import uvicorn
+    uvicorn.run(
+        postgrest_stand_in, host="127.0.0.1", port=port, log_level="warning", lifespan="off",
+        # Idle connections are kept like an nginx gateway does, not uvicorn's 5 seconds
+        timeout_keep_alive=75,
+        ssl_keyfile=os.path.join(certdir, "key.pem"), ssl_certfile=os.path.join(certdir, "cert.pem"),
+    )
+
+
+async def measure(url, settings, bursts, concurrency, pause):
+    metrics = PoolMetrics()
+    latencies = []
+
+    async def query(client):
+        start = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    async with pooled_client(settings, metrics, verify=False) as client:
+        for _ in range(bursts):
+            await asyncio.gather(*(query(client) for _ in range(concurrency)))
+            await asyncio.sleep(pause)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        **metrics.stats(),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pause", type=float, default=6.0, help="seconds between bursts")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds per query in the stand-in")
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--certdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.certdir, args.latency)
+        return
+
+    with tempfile.TemporaryDirectory() as certdir:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+             "-keyout", os.path.join(certdir, "key.pem"), "-out", os.path.join(certdir, "cert.pem")],
+            check=True, capture_output=True,
+        )
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.connection_pool", "--serve", str(port), "--certdir", certdir,
+             "--latency", str(args.latency)]
+        )
+        try:
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            url = f"https://127.0.0.1:{port}/rest/v1/exercises"
+            print(f"{'mode':<8}{'p50 ms':>8}{'p99 ms':>8}{'opened':>8}{'reused':>8}{'TLS':>6}{'wait ms':>9}")
+            for mode, settings in (("before", SDK_DEFAULTS), ("after", PoolSettings())):
+                settings.http2 = args.http2
+                result = asyncio.run(measure(url, settings, args.bursts, args.concurrency, args.pause))
+                print(
+                    f"{mode:<8}{result['p50_ms']:>8.1f}{result['p99_ms']:>8.1f}{result['connections_opened']:>8}"
+                    f"{result['connections_reused']:>8}{result['tls_handshakes']:>6}{result['mean_pool_wait_ms']:>9.2f}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Cost of decoding database rows into models.
+
+before: per-field construction, as the handlers used to do
+        (Enum(value), [MuscleGroup(mg) ...], datetime.fromisoformat(...))
+after:  RowCodec.decode_many(), one compiled validator call per result
+
+Usage: python -m benchmarks.row_codec [--rows 10000] [--repeat 10]
+"""
+import argparse
+import os
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from app.models.codec import exercise_codec, session_codec
+from benchmarks.serialization import (
+    build_exercises, build_sessions, exercise_rows, session_rows, _timed
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = [
+        ("exercises", exercise_codec, build_exercises, exercise_rows(args.rows)),
+        ("sessions", session_codec, build_sessions, session_rows(args.rows)),
+    ]
+    print(f"{'table':<12}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for table, codec, build, rows in cases:
+        assert build(rows) == codec.decode_many(rows), f"{table}: decoded models differ"
+        old = min(_timed(lambda: build(rows)) for _ in range(args.repeat)) * 1e3
+        new = min(_timed(lambda: codec.decode_many(rows)) for _ in range(args.repeat)) * 1e3
+        print(f"{table:<12}{old:>12.1f}{new:>12.1f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Per-row cost of turning database rows into a JSON list response.
+
+before: build each model field by field, then let FastAPI validate and
+        serialize the list through the route's response_model
+after:  rows_response(), which validates the rows once and dumps them
+
+Usage: python -m benchmarks.serialization [--rows 1000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+# The routes import the repository; keep the benchmark off the network
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from fastapi.routing import serialize_response
+from app.models.item import (
+    Exercise, ExerciseType, DifficultyLevel, MuscleGroup, WorkoutSession
+)
+from app.models.codec import exercise_codec, session_codec
+from app.routes.sample import router
+from app.routes.serialization import rows_response
+
+
+def exercise_rows(count):
+    return [
+        {
+            "id": i, "name": f"Exercise {i}", "description": "Benchmark exercise",
+            "exercise_type": "strength", "difficulty": "intermediate",
+            "muscle_groups": ["chest", "arms"], "duration_minutes": 10,
+            "calories_burned_per_minute": 8, "equipment_needed": ["barbell"],
+            "instructions": ["Lift", "Lower"], "created_at": "2024-01-15T10:00:00.123456+00:00",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def session_rows(count):
+    start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i, "user_id": 1 + i % 50, "routine_id": 1 + i % 10,
+            "started_at": (start + timedelta(hours=i)).isoformat(),
+            "completed_at": (start + timedelta(hours=i, minutes=45)).isoformat(),
+            "total_duration_minutes": 45, "calories_burned": 350,
+            "notes": "Benchmark session", "completed": True,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def build_exercises(rows):
+    return [
+        Exercise(
+            id=row["id"],
+            name=row["name"],
+            description=row["description"],
+            exercise_type=ExerciseType(row["exercise_type"]),
+            difficulty=DifficultyLevel(row["difficulty"]),
+            muscle_groups=[MuscleGroup(mg) for mg in row["muscle_groups"]],
+            duration_minutes=row.get("duration_minutes"),
+            calories_burned_per_minute=row.get("calories_burned_per_minute"),
+            equipment_needed=row.get("equipment_needed", []),
+            instructions=row.get("instructions", [])
+        )
+        for row in rows
+    ]
+
+
+def build_sessions(rows):
+    return [
+        WorkoutSession(
+            id=row["id"],
+            user_id=row["user_id"],
+            routine_id=row["routine_id"],
+            started_at=datetime.fromisoformat(row["started_at"].replace("Z", "+00:00")),
+            completed_at=datetime.fromisoformat(row["completed_at"].replace("Z", "+00:00")) if row.get("completed_at") else None,
+            total_duration_minutes=row.get("total_duration_minutes"),
+            calories_burned=row.get("calories_burned"),
+            notes=row.get("notes"),
+            completed=row.get("completed", False)
+        )
+        for row in rows
+    ]
+
+
+def response_field(path):
+    return next(route.response_field for route in router.routes if route.path == path and "GET" in route.methods)
+
+
+def before(field, build, rows):
+    return asyncio.run(serialize_response(field=field, response_content=build(rows), dump_json=True))
+
+
+def after(codec, rows):
+    return rows_response(codec, rows).body
+
+
+def per_row_us(fn, rows, repeat):
+    fn()
+    best = min(_timed(fn) for _ in range(repeat))
+    return best / len(rows) * 1e6
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("/exercises", exercise_codec, build_exercises, exercise_rows(args.rows)),
+        ("/sessions", session_codec, build_sessions, session_rows(args.rows)),
+    ]
+    print(f"{'endpoint':<12}{'before us/row':>15}{'after us/row':>15}{'speedup':>10}")
+    for path, codec, build, rows in cases:
+        field = response_field(path)
+        assert before(field, build, rows) == after(codec, rows), f"{path}: payload bytes differ"
+        old = per_row_us(lambda: before(field, build, rows), rows, args.repeat)
+        new = per_row_us(lambda: after(codec, rows), rows, args.repeat)
+        print(f"{path:<12}{old:>15.2f}{new:>15.2f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -77,3 +77,478 @@ CREATE INDEX IF NOT EXISTS idx_sessions_routine_id ON sessions(routine_id);
 CREATE INDEX IF NOT EXISTS idx_progress_user_id ON progress(user_id);
 CREATE INDEX IF NOT EXISTS idx_progress_exercise_id ON progress(exercise_id);
 CREATE INDEX IF NOT EXISTS idx_progress_date ON progress(date);
+CREATE INDEX IF NOT EXISTS idx_progress_user_exercise_date ON progress(user_id, exercise_id, date);
+
+-- GIN indexes for muscle group filters (JSONB containment, @>)
+CREATE INDEX IF NOT EXISTS idx_exercises_muscle_groups ON exercises USING GIN (muscle_groups jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_routines_target_muscle_groups ON routines USING GIN (target_muscle_groups jsonb_path_ops);
+
+-- ========== EXERCISE SEARCH ==========
+-- One weighted tsvector per exercise: name (A), description (B) and the
+-- instruction steps (C). The 'simple' configuration does no stemming, so
+-- Spanish and English text index alike; unaccent folds accents on both the
+-- documents and the queries. A trigger keeps the vectors current and
+-- search_exercises() ranks GIN index matches with ts_rank.
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE TABLE IF NOT EXISTS exercise_search (
+    exercise_id BIGINT PRIMARY KEY REFERENCES exercises(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_exercise_search_document ON exercise_search USING GIN (document);
+
+CREATE OR REPLACE FUNCTION exercise_search_document(e exercises) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('simple', unaccent(e.name)), 'A')
+        || setweight(to_tsvector('simple', unaccent(e.description)), 'B')
+        || setweight(to_tsvector('simple', unaccent(COALESCE(
+               (SELECT string_agg(step, ' ') FROM jsonb_array_elements_text(e.instructions) step), ''
+           ))), 'C');
+$$;
+
+CREATE OR REPLACE FUNCTION exercises_search() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO exercise_search (exercise_id, document) VALUES (NEW.id, exercise_search_document(NEW))
+    ON CONFLICT (exercise_id) DO UPDATE SET document = EXCLUDED.document;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER exercises_search AFTER INSERT OR UPDATE OF name, description, instructions ON exercises
+    FOR EACH ROW EXECUTE FUNCTION exercises_search();
+
+-- Exercises matching every term as a word prefix, best rank first
+CREATE OR REPLACE FUNCTION search_exercises(terms TEXT[], max_results INTEGER) RETURNS SETOF exercises
+LANGUAGE sql STABLE AS $$
+    SELECT e.*
+    FROM exercise_search s
+    JOIN exercises e ON e.id = s.exercise_id,
+         to_tsquery('simple', (
+             SELECT string_agg(quote_literal(unaccent(term)) || ':*', ' & ') FROM unnest(terms) term
+         )) query
+    WHERE s.document @@ query
+    ORDER BY ts_rank(s.document, query) DESC, e.id
+    LIMIT max_results;
+$$;
+
+-- Index exercises stored before the search table existed
+INSERT INTO exercise_search (exercise_id, document)
+SELECT e.id, exercise_search_document(e) FROM exercises e
+ON CONFLICT (exercise_id) DO NOTHING;
+
+-- ========== STATISTICS ROLLUPS ==========
+-- Running totals per user, per exercise and per (user, exercise) pair.
+-- Triggers keep them current on every insert, update and delete, including
+-- rows removed by ON DELETE CASCADE, so /stats/* is a single keyed read.
+-- Run SELECT rebuild_rollups(); to recompute them from scratch.
+
+CREATE TABLE IF NOT EXISTS user_rollups (
+    user_id BIGINT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_sessions BIGINT NOT NULL DEFAULT 0,
+    completed_sessions BIGINT NOT NULL DEFAULT 0,
+    total_workout_time_minutes BIGINT NOT NULL DEFAULT 0,
+    total_calories_burned BIGINT NOT NULL DEFAULT 0,
+    progress_records BIGINT NOT NULL DEFAULT 0,
+    personal_records BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS exercise_rollups (
+    exercise_id BIGINT PRIMARY KEY REFERENCES exercises(id) ON DELETE CASCADE,
+    total_attempts BIGINT NOT NULL DEFAULT 0,
+    unique_users BIGINT NOT NULL DEFAULT 0,
+    personal_records BIGINT NOT NULL DEFAULT 0,
+    total_weight NUMERIC NOT NULL DEFAULT 0,
+    total_reps BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_exercise_rollups (
+    user_id BIGINT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    exercise_id BIGINT NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    attempts BIGINT NOT NULL DEFAULT 0,
+    best_weight_kg NUMERIC(5,2),
+    best_reps INTEGER,
+    best_duration_minutes INTEGER,
+    best_volume_kg NUMERIC,
+    best_weight_kg_at TIMESTAMPTZ,
+    best_reps_at TIMESTAMPTZ,
+    best_volume_kg_at TIMESTAMPTZ,
+    PRIMARY KEY (user_id, exercise_id)
+);
+
+-- Best values per pair, for databases created before they were tracked
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_weight_kg NUMERIC(5,2);
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_reps INTEGER;
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_duration_minutes INTEGER;
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_volume_kg NUMERIC;
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_weight_kg_at TIMESTAMPTZ;
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_reps_at TIMESTAMPTZ;
+ALTER TABLE user_exercise_rollups ADD COLUMN IF NOT EXISTS best_volume_kg_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_exercise_id ON user_exercise_rollups(exercise_id);
+
+-- Leaderboards: the top k of an exercise is the head of one of these indexes
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_weight ON user_exercise_rollups(exercise_id, best_weight_kg DESC, best_weight_kg_at);
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_reps ON user_exercise_rollups(exercise_id, best_reps DESC, best_reps_at);
+CREATE INDEX IF NOT EXISTS idx_user_exercise_rollups_volume ON user_exercise_rollups(exercise_id, best_volume_kg DESC, best_volume_kg_at);
+
+CREATE OR REPLACE FUNCTION users_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO user_rollups (user_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION exercises_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO exercise_rollups (exercise_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$;
+
+-- unique_users follows the (user, exercise) pairs, including cascaded deletes
+CREATE OR REPLACE FUNCTION user_exercise_rollups_count() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE exercise_rollups SET unique_users = unique_users + 1 WHERE exercise_id = NEW.exercise_id;
+    ELSE
+        UPDATE exercise_rollups SET unique_users = unique_users - 1 WHERE exercise_id = OLD.exercise_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sessions_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE user_rollups SET
+            total_sessions = total_sessions - 1,
+            completed_sessions = completed_sessions - (CASE WHEN OLD.completed THEN 1 ELSE 0 END),
+            total_workout_time_minutes = total_workout_time_minutes - (CASE WHEN OLD.completed THEN COALESCE(OLD.total_duration_minutes, 0) ELSE 0 END),
+            total_calories_burned = total_calories_burned - (CASE WHEN OLD.completed THEN COALESCE(OLD.calories_burned, 0) ELSE 0 END)
+        WHERE user_id = OLD.user_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE user_rollups SET
+            total_sessions = total_sessions + 1,
+            completed_sessions = completed_sessions + (CASE WHEN NEW.completed THEN 1 ELSE 0 END),
+            total_workout_time_minutes = total_workout_time_minutes + (CASE WHEN NEW.completed THEN COALESCE(NEW.total_duration_minutes, 0) ELSE 0 END),
+            total_calories_burned = total_calories_burned + (CASE WHEN NEW.completed THEN COALESCE(NEW.calories_burned, 0) ELSE 0 END)
+        WHERE user_id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Fold a progress record into its pair's bests. Volume is sets x reps x
+-- weight, counting a missing sets value as one set. The *_at columns keep
+-- the date the best was first reached, the leaderboard tie-breaker.
+CREATE OR REPLACE FUNCTION progress_merge_best(p progress) RETURNS void LANGUAGE sql AS $$
+    UPDATE user_exercise_rollups SET
+        best_weight_kg = GREATEST(best_weight_kg, p.weight_kg),
+        best_reps = GREATEST(best_reps, p.reps),
+        best_duration_minutes = GREATEST(best_duration_minutes, p.duration_minutes),
+        best_volume_kg = GREATEST(best_volume_kg, COALESCE(p.sets, 1) * p.reps * p.weight_kg),
+        best_weight_kg_at = CASE
+            WHEN COALESCE(p.weight_kg > best_weight_kg, p.weight_kg IS NOT NULL) THEN p.date
+            WHEN p.weight_kg = best_weight_kg THEN LEAST(best_weight_kg_at, p.date)
+            ELSE best_weight_kg_at END,
+        best_reps_at = CASE
+            WHEN COALESCE(p.reps > best_reps, p.reps IS NOT NULL) THEN p.date
+            WHEN p.reps = best_reps THEN LEAST(best_reps_at, p.date)
+            ELSE best_reps_at END,
+        best_volume_kg_at = CASE
+            WHEN COALESCE(COALESCE(p.sets, 1) * p.reps * p.weight_kg > best_volume_kg, p.reps * p.weight_kg IS NOT NULL) THEN p.date
+            WHEN COALESCE(p.sets, 1) * p.reps * p.weight_kg = best_volume_kg THEN LEAST(best_volume_kg_at, p.date)
+            ELSE best_volume_kg_at END
+    WHERE user_id = p.user_id AND exercise_id = p.exercise_id;
+$$;
+
+-- Recompute a pair's bests from its records when p, a record just removed
+-- or changed, held one of them. Other edits never rescan history.
+CREATE OR REPLACE FUNCTION progress_rescan_best(p progress) RETURNS void LANGUAGE sql AS $$
+    UPDATE user_exercise_rollups r SET
+        best_weight_kg = b.best_weight_kg,
+        best_reps = b.best_reps,
+        best_duration_minutes = b.best_duration_minutes,
+        best_volume_kg = b.best_volume_kg,
+        best_weight_kg_at = b.best_weight_kg_at,
+        best_reps_at = b.best_reps_at,
+        best_volume_kg_at = b.best_volume_kg_at
+    FROM (
+        SELECT MAX(weight_kg) AS best_weight_kg,
+               MAX(reps) AS best_reps,
+               MAX(duration_minutes) AS best_duration_minutes,
+               MAX(COALESCE(sets, 1) * reps * weight_kg) AS best_volume_kg,
+               (ARRAY_AGG(date ORDER BY weight_kg DESC, date) FILTER (WHERE weight_kg IS NOT NULL))[1] AS best_weight_kg_at,
+               (ARRAY_AGG(date ORDER BY reps DESC, date) FILTER (WHERE reps IS NOT NULL))[1] AS best_reps_at,
+               (ARRAY_AGG(date ORDER BY COALESCE(sets, 1) * reps * weight_kg DESC, date)
+                    FILTER (WHERE reps * weight_kg IS NOT NULL))[1] AS best_volume_kg_at
+        FROM progress WHERE user_id = p.user_id AND exercise_id = p.exercise_id
+    ) b
+    WHERE r.user_id = p.user_id AND r.exercise_id = p.exercise_id
+      AND (p.weight_kg >= r.best_weight_kg
+           OR p.reps >= r.best_reps
+           OR p.duration_minutes >= r.best_duration_minutes
+           OR COALESCE(p.sets, 1) * p.reps * p.weight_kg >= r.best_volume_kg);
+$$;
+
+CREATE OR REPLACE FUNCTION progress_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND (NEW.user_id, NEW.exercise_id, NEW.date, NEW.weight_kg, NEW.reps, NEW.sets, NEW.duration_minutes)
+           IS NOT DISTINCT FROM (OLD.user_id, OLD.exercise_id, OLD.date, OLD.weight_kg, OLD.reps, OLD.sets, OLD.duration_minutes) THEN
+        -- Only personal_record changed, as when progress_reflag re-flags a record
+        UPDATE user_rollups SET
+            personal_records = personal_records
+                + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END) - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END)
+        WHERE user_id = NEW.user_id;
+        UPDATE exercise_rollups SET
+            personal_records = personal_records
+                + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END) - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END)
+        WHERE exercise_id = NEW.exercise_id;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE user_rollups SET
+            progress_records = progress_records - 1,
+            personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END)
+        WHERE user_id = OLD.user_id;
+        UPDATE exercise_rollups SET
+            total_attempts = total_attempts - 1,
+            personal_records = personal_records - (CASE WHEN OLD.personal_record THEN 1 ELSE 0 END),
+            total_weight = total_weight - COALESCE(OLD.weight_kg, 0),
+            total_reps = total_reps - COALESCE(OLD.reps, 0)
+        WHERE exercise_id = OLD.exercise_id;
+        UPDATE user_exercise_rollups SET attempts = attempts - 1
+        WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id;
+        DELETE FROM user_exercise_rollups
+        WHERE user_id = OLD.user_id AND exercise_id = OLD.exercise_id AND attempts <= 0;
+        PERFORM progress_rescan_best(OLD);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE user_rollups SET
+            progress_records = progress_records + 1,
+            personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END)
+        WHERE user_id = NEW.user_id;
+        UPDATE exercise_rollups SET
+            total_attempts = total_attempts + 1,
+            personal_records = personal_records + (CASE WHEN NEW.personal_record THEN 1 ELSE 0 END),
+            total_weight = total_weight + COALESCE(NEW.weight_kg, 0),
+            total_reps = total_reps + COALESCE(NEW.reps, 0)
+        WHERE exercise_id = NEW.exercise_id;
+        INSERT INTO user_exercise_rollups (user_id, exercise_id, attempts) VALUES (NEW.user_id, NEW.exercise_id, 1)
+            ON CONFLICT (user_id, exercise_id) DO UPDATE SET attempts = user_exercise_rollups.attempts + 1;
+        -- Inserts were merged by progress_personal_record, before the row was written
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM progress_merge_best(NEW);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- personal_record is decided by the database: a record is a PR when its
+-- weight, reps or duration beats every record of its (user, exercise) pair
+-- dated before it (records with the same date are ordered by id), or when
+-- none of those has a value for that metric. An insert dated after every
+-- record of its pair, the usual case, compares against the bests in
+-- user_exercise_rollups, a primary-key lookup, and advances them right away
+-- so later rows of a bulk insert see them. Backdated inserts and edits
+-- compare against the records dated before them; progress_reflag then
+-- re-flags the records dated after them.
+-- Whether p's pair has records dated after p (by date, then id)
+CREATE OR REPLACE FUNCTION progress_later_exists(p progress) RETURNS boolean LANGUAGE sql AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM progress
+        WHERE user_id = p.user_id AND exercise_id = p.exercise_id
+          AND (date > p.date OR (p.date IS NULL AND date IS NOT NULL)
+               OR (date IS NOT DISTINCT FROM p.date AND id > p.id))
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION progress_personal_record() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    best RECORD;
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.user_id = OLD.user_id AND NEW.exercise_id = OLD.exercise_id
+       AND NEW.date IS NOT DISTINCT FROM OLD.date
+       AND NEW.weight_kg IS NOT DISTINCT FROM OLD.weight_kg
+       AND NEW.reps IS NOT DISTINCT FROM OLD.reps
+       AND NEW.duration_minutes IS NOT DISTINCT FROM OLD.duration_minutes THEN
+        NEW.personal_record := OLD.personal_record;
+        RETURN NEW;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        -- Creating and locking the pair row serializes concurrent inserts for the pair
+        INSERT INTO user_exercise_rollups (user_id, exercise_id) VALUES (NEW.user_id, NEW.exercise_id)
+            ON CONFLICT DO NOTHING;
+        SELECT best_weight_kg, best_reps, best_duration_minutes INTO best
+        FROM user_exercise_rollups
+        WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id
+        FOR UPDATE;
+    END IF;
+    IF TG_OP = 'UPDATE' OR progress_later_exists(NEW) THEN
+        SELECT MAX(weight_kg) AS best_weight_kg, MAX(reps) AS best_reps, MAX(duration_minutes) AS best_duration_minutes INTO best
+        FROM progress
+        WHERE user_id = NEW.user_id AND exercise_id = NEW.exercise_id AND id <> NEW.id
+          AND (date < NEW.date OR (date IS NULL AND NEW.date IS NOT NULL)
+               OR (date IS NOT DISTINCT FROM NEW.date AND id < NEW.id));
+    END IF;
+    NEW.personal_record := COALESCE(NEW.weight_kg > best.best_weight_kg, NEW.weight_kg IS NOT NULL)
+        OR COALESCE(NEW.reps > best.best_reps, NEW.reps IS NOT NULL)
+        OR COALESCE(NEW.duration_minutes > best.best_duration_minutes, NEW.duration_minutes IS NOT NULL);
+    IF TG_OP = 'INSERT' THEN
+        PERFORM progress_merge_best(NEW);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+-- Recompute personal_record for every record of p's pair in one window pass
+CREATE OR REPLACE FUNCTION progress_reflag_pair(p progress) RETURNS void LANGUAGE sql AS $$
+    UPDATE progress SET personal_record = f.personal_record
+    FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WHERE user_id = p.user_id AND exercise_id = p.exercise_id
+        WINDOW earlier AS (ORDER BY date NULLS FIRST, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS DISTINCT FROM f.personal_record;
+$$;
+
+-- A write with records of its pair dated after it (a backdated entry, an
+-- edit or a delete) can change their flags, so the pair is re-flagged.
+-- Writing the pair's newest record, the usual case, finds none and skips it.
+-- The re-flag only sets personal_record, which fires none of the triggers
+-- that call this one.
+CREATE OR REPLACE FUNCTION progress_reflag() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    reflagged BOOLEAN := FALSE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND progress_later_exists(OLD) THEN
+        PERFORM progress_reflag_pair(OLD);
+        reflagged := TRUE;
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NOT (
+        reflagged AND NEW.user_id = OLD.user_id AND NEW.exercise_id = OLD.exercise_id
+    )) THEN
+        IF progress_later_exists(NEW) THEN
+            PERFORM progress_reflag_pair(NEW);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER users_rollup AFTER INSERT ON users
+    FOR EACH ROW EXECUTE FUNCTION users_rollup();
+CREATE OR REPLACE TRIGGER exercises_rollup AFTER INSERT ON exercises
+    FOR EACH ROW EXECUTE FUNCTION exercises_rollup();
+CREATE OR REPLACE TRIGGER user_exercise_rollups_count AFTER INSERT OR DELETE ON user_exercise_rollups
+    FOR EACH ROW EXECUTE FUNCTION user_exercise_rollups_count();
+CREATE OR REPLACE TRIGGER sessions_rollup AFTER INSERT OR UPDATE OR DELETE ON sessions
+    FOR EACH ROW EXECUTE FUNCTION sessions_rollup();
+CREATE OR REPLACE TRIGGER progress_rollup AFTER INSERT OR UPDATE OR DELETE ON progress
+    FOR EACH ROW EXECUTE FUNCTION progress_rollup();
+CREATE OR REPLACE TRIGGER progress_personal_record
+    BEFORE INSERT OR UPDATE OF user_id, exercise_id, date, weight_kg, reps, duration_minutes ON progress
+    FOR EACH ROW EXECUTE FUNCTION progress_personal_record();
+CREATE OR REPLACE TRIGGER progress_reflag
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, exercise_id, date, weight_kg, reps, duration_minutes ON progress
+    FOR EACH ROW EXECUTE FUNCTION progress_reflag();
+
+-- Recompute every rollup from the base tables (repair after drift or migration).
+-- exercise_rollups is emptied first and refilled last so the unique_users
+-- trigger on user_exercise_rollups has nothing to update in between.
+CREATE OR REPLACE FUNCTION rebuild_rollups() RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE users, exercises, sessions, progress IN SHARE MODE;
+
+    DELETE FROM exercise_rollups WHERE TRUE;
+    DELETE FROM user_exercise_rollups WHERE TRUE;
+    DELETE FROM user_rollups WHERE TRUE;
+
+    -- Flags written under earlier rules are recomputed in date order
+    UPDATE progress SET personal_record = f.personal_record
+    FROM (
+        SELECT id,
+               COALESCE(weight_kg > MAX(weight_kg) OVER earlier, weight_kg IS NOT NULL)
+               OR COALESCE(reps > MAX(reps) OVER earlier, reps IS NOT NULL)
+               OR COALESCE(duration_minutes > MAX(duration_minutes) OVER earlier, duration_minutes IS NOT NULL)
+               AS personal_record
+        FROM progress
+        WINDOW earlier AS (
+            PARTITION BY user_id, exercise_id ORDER BY date NULLS FIRST, id
+            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        )
+    ) f
+    WHERE progress.id = f.id AND progress.personal_record IS DISTINCT FROM f.personal_record;
+
+    INSERT INTO user_exercise_rollups (
+        user_id, exercise_id, attempts, best_weight_kg, best_reps, best_duration_minutes, best_volume_kg,
+        best_weight_kg_at, best_reps_at, best_volume_kg_at
+    )
+    SELECT user_id, exercise_id, COUNT(*),
+           MAX(weight_kg), MAX(reps), MAX(duration_minutes), MAX(COALESCE(sets, 1) * reps * weight_kg),
+           (ARRAY_AGG(date ORDER BY weight_kg DESC, date) FILTER (WHERE weight_kg IS NOT NULL))[1],
+           (ARRAY_AGG(date ORDER BY reps DESC, date) FILTER (WHERE reps IS NOT NULL))[1],
+           (ARRAY_AGG(date ORDER BY COALESCE(sets, 1) * reps * weight_kg DESC, date)
+                FILTER (WHERE reps * weight_kg IS NOT NULL))[1]
+    FROM progress GROUP BY user_id, exercise_id;
+
+    INSERT INTO user_rollups (
+        user_id, total_sessions, completed_sessions, total_workout_time_minutes,
+        total_calories_burned, progress_records, personal_records
+    )
+    SELECT u.id,
+           COALESCE(s.total_sessions, 0),
+           COALESCE(s.completed_sessions, 0),
+           COALESCE(s.total_workout_time_minutes, 0),
+           COALESCE(s.total_calories_burned, 0),
+           COALESCE(p.progress_records, 0),
+           COALESCE(p.personal_records, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id,
+               COUNT(*) AS total_sessions,
+               COUNT(*) FILTER (WHERE completed) AS completed_sessions,
+               SUM(total_duration_minutes) FILTER (WHERE completed) AS total_workout_time_minutes,
+               SUM(calories_burned) FILTER (WHERE completed) AS total_calories_burned
+        FROM sessions GROUP BY user_id
+    ) s ON s.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id,
+               COUNT(*) AS progress_records,
+               COUNT(*) FILTER (WHERE personal_record) AS personal_records
+        FROM progress GROUP BY user_id
+    ) p ON p.user_id = u.id;
+
+    INSERT INTO exercise_rollups (
+        exercise_id, total_attempts, unique_users, personal_records, total_weight, total_reps
+    )
+    SELECT e.id,
+           COALESCE(p.total_attempts, 0),
+           COALESCE(p.unique_users, 0),
+           COALESCE(p.personal_records, 0),
+           COALESCE(p.total_weight, 0),
+           COALESCE(p.total_reps, 0)
+    FROM exercises e
+    LEFT JOIN (
+        SELECT exercise_id,
+               COUNT(*) AS total_attempts,
+               COUNT(DISTINCT user_id) AS unique_users,
+               COUNT(*) FILTER (WHERE personal_record) AS personal_records,
+               SUM(weight_kg) AS total_weight,
+               SUM(reps) AS total_reps
+        FROM progress GROUP BY exercise_id
+    ) p ON p.exercise_id = e.id;
+END;
+$$;
+
+-- Populate rollups for data that existed before they were added
+SELECT rebuild_rollups();